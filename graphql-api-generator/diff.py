@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import sys
+
+from graphql import build_schema
+
+from utils.compare import diff_schemas, format_changes
+
+
+def cmd(args):
+    with open(args.old) as f:
+        old_schema = build_schema(f.read())
+    with open(args.new) as f:
+        new_schema = build_schema(f.read())
+
+    changes = diff_schemas(old_schema, new_schema)
+    print(format_changes(changes))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([change.to_dict() for change in changes], f, indent=2)
+
+    if args.fail_on_breaking and any(change.breaking for change in changes):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='List the changes between two (API) schemas')
+    parser.add_argument('--old', type=str, required=True,
+                        help='Previous schema file')
+    parser.add_argument('--new', type=str, required=True,
+                        help='New schema file')
+    parser.add_argument('--json', type=str,
+                        help='Write the changes to the given JSON file')
+    parser.add_argument('--fail-on-breaking', action='store_true',
+                        help='Exit with code 1 if any change is breaking')
+    sys.exit(cmd(parser.parse_args()))
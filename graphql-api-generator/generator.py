@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
 import argparse
+import json
+import multiprocessing
 import os
+import sys
+import time
+from functools import partial
 from io import UnsupportedOperation
 
 import yaml
+from graphql import version as graphql_version
 from utils.utils import *
+from utils.extender import SchemaExtender
+from utils.cache import BuildCache, ParseCache, get_cache_key, get_source_files
+from utils.memory import compact_schema, get_peak_memory
+from utils.profiler import StepProfiler
+from utils.scheduler import Step, StepScheduler
+from utils.watch import watch
+from utils.costs import get_cost_manifest
+from utils.indexes import get_index_manifest
+from utils.incremental import Provenance, get_affected_types, get_changed_types, get_db_type_names, make_sub_schema, \
+    splice_output
 
 string_transforms = {
     'uppercase': uppercase,
@@ -15,40 +31,350 @@ string_transforms = {
 
 
 def cmd(args):
-    # load config
-    config = {}
-    if args.config:
-        with open(args.config) as f:
-            config = yaml.safe_load(f)
+    # generate the API schemas listed in a manifest
+    if args.batch:
+        sys.exit(run_batch(args.batch, args.cache_dir, args.workers))
+
+    # regenerate the API schema whenever the DB schema or the config changes
+    if args.watch:
+        run_watch(args.input, args.output, args.config, args.workers)
+        return
 
+    # load config
+    config = load_config(args.config)
+
+    # report the generation steps that will run, and those that are skipped
+    if args.plan:
+        schema = build_ast_schema(parse_schema_files(get_schema_files(args.input)))
+        print(StepScheduler(get_generation_steps(config)).format_plan(config.get('generation') or {}, schema),
+              file=sys.stderr)
+
+    generate(args.input, args.output, config, args.config, cache_dir=args.cache_dir, profile=args.profile,
+             previous_input=args.previous_input, previous_output=args.previous_output, workers=args.workers,
+             low_memory=args.low_memory, index_manifest=args.index_manifest, cost_manifest=args.cost_manifest)
+
+
+def load_config(config_file: str = None):
+    """
+    Load a configuration file. Files are parsed only once per process, which matters in batch mode, where many schemas
+    usually share a few configuration files.
+    :param config_file: path to the configuration file, or None for the empty configuration
+    :return dict:
+    """
+    if not config_file:
+        return {}
+    path = os.path.abspath(config_file)
+    if path not in _configs:
+        with open(path) as f:
+            _configs[path] = yaml.safe_load(f)
+    return _configs[path]
+
+
+# the configuration files loaded so far, by path
+_configs = {}
+
+
+def generate(input_path: str, output_path: str, config: dict, config_file: str = None, cache_dir: str = None,
+             profile: str = None, previous_input: str = None, previous_output: str = None, workers: int = 1,
+             low_memory: bool = False, index_manifest: str = None, cost_manifest: str = None):
+    """
+    Generate the API schema for a DB schema and write it to a file (or stdout).
+    :param input_path: DB schema files (separated by commas), or a directory of schema files
+    :param output_path: output file, or None for stdout
+    :param config:
+    :param config_file: path of the configuration file, part of the cache key
+    :param cache_dir: cache directory, or None for no caching
+    :param profile: file to write the profile of the generation steps to, or None for no profiling
+    :param previous_input: DB schema files (or directory) that previous_output was generated from
+    :param previous_output: API schema file previously generated with the same configuration
+    :param workers: number of processes making the definitions of independent generation steps
+    :param low_memory: compact the schema after each generation step, and report the peak memory to stderr
+    :param index_manifest: file to write the indexes for the API schema to (see utils.indexes), or None
+    :param cost_manifest: file to write the costs of the fields of the API schema to (see utils.costs), or None
+    :return:
+    """
     # get list of schema files
+    files = get_schema_files(input_path)
+
+    # check the cache, the key covers the input files, the config, the generator itself and the graphql-core version
+    # (which the printed schema depends on), and, for incremental runs, the previous input and output, since the order
+    # of the fields of an incremental run may differ from that of a full run
+    incremental = bool(previous_input and previous_output)
+    cache = None
+    output = None
+    if cache_dir:
+        cache = BuildCache(cache_dir)
+        generator_dir = os.path.dirname(os.path.abspath(__file__))
+        source_files = get_source_files(f'{generator_dir}/generator.py', f'{generator_dir}/utils')
+        config_files = [config_file] if config_file else []
+        previous_files = get_schema_files(previous_input) + [previous_output] if incremental else []
+        key = get_cache_key(files + config_files + source_files + previous_files, 'api-schema', graphql_version,
+                            'incremental' if incremental else 'full')
+        output = cache.get(key)
+
+    if output is None:
+        # run, only regenerating the types affected by the changes since the previous run if possible
+        profiler = StepProfiler() if profile else None
+        if incremental:
+            schema_string = read_schema_files(files)
+            previous_schema_string = read_schema_files(get_schema_files(previous_input))
+            with open(previous_output, 'r') as f:
+                previous_output_string = f.read()
+            chunks = [run_incremental(schema_string, config, previous_schema_string, previous_output_string, profiler,
+                                      workers, low_memory)]
+        else:
+            # build the schema from the separately parsed (and cached) files, the schema is printed one type at a time
+            # while it is written
+            schema = build_ast_schema(parse_schema_files(files, cache_dir, workers))
+            chunks = iter_schema_with_directives(run(schema, config, profiler, workers, low_memory))
+
+        # report the time, memory and schema growth of each step
+        if profiler is not None:
+            print(profiler.format_table(), file=sys.stderr)
+            profiler.write_json(profile)
+        if cache is not None:
+            chunks = cache.tee(key, chunks)
+    else:
+        chunks = [output]
+
+    # the manifests are made from the output, which is the same whether it was generated or cached
+    manifests = [(path, f) for path, f in ((index_manifest, get_index_manifest), (cost_manifest, get_cost_manifest))
+                 if path]
+    if manifests:
+        chunks = list(chunks)
+
+    # write to file or stdout
+    write_output(chunks, output_path)
+
+    if manifests:
+        api_schema = build_schema(''.join(chunks))
+        for path, f in manifests:
+            with open(path, 'w') as out:
+                json.dump(f(api_schema, config), out, indent=2)
+
+    if low_memory and get_peak_memory() is not None:
+        print(f'Peak memory: {get_peak_memory():.0f} MiB', file=sys.stderr)
+
+
+def read_manifest(manifest: str):
+    """
+    Read a batch manifest: a YAML (or JSON) list of schemas to generate, each with an input (DB schema files or
+    directory), an output file and, optionally, a config file. Relative paths are relative to the manifest.
+    :param manifest: path to the manifest
+    :return: list of dicts with the keys input, output and config
+    """
+    with open(manifest) as f:
+        entries = yaml.safe_load(f) or []
+    manifest_dir = os.path.dirname(os.path.abspath(manifest))
+
+    def resolve(path):
+        if not path:
+            return path
+        return ','.join(os.path.join(manifest_dir, p) for p in str(path).split(','))
+
+    return [{key: resolve(entry.get(key)) for key in ('input', 'output', 'config')} for entry in entries]
+
+
+def generate_batch_item(item: dict, cache_dir: str = None):
+    """
+    Generate the API schema of one batch item, catching any error.
+    :param item: dict with the keys input, output and config (see read_manifest)
+    :param cache_dir:
+    :return: tuple of the item, the error message (None on success) and the time in seconds
+    """
+    start = time.perf_counter()
+    try:
+        if not item['input'] or not item['output']:
+            raise ValueError('input and output are required')
+        generate(item['input'], item['output'], load_config(item['config']), item['config'], cache_dir=cache_dir)
+        error = None
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    return item, error, time.perf_counter() - start
+
+
+def run_batch(manifest: str, cache_dir: str = None, workers: int = 1):
+    """
+    Generate the API schemas listed in a manifest (see read_manifest) in this process, or in a pool of worker
+    processes, reporting the result of each schema to stderr. A failing schema does not stop the batch.
+    :param manifest:
+    :param cache_dir:
+    :param workers: number of processes generating schemas in parallel
+    :return: exit code, 0 if all schemas were generated and 1 otherwise
+    """
+    items = read_manifest(manifest)
+    if workers > 1 and len(items) > 1:
+        with multiprocessing.Pool(min(workers, len(items))) as pool:
+            results = pool.imap(partial(generate_batch_item, cache_dir=cache_dir), items)
+            failed = _report_batch(results)
+    else:
+        failed = _report_batch(generate_batch_item(item, cache_dir) for item in items)
+    print(f'{len(items) - failed} of {len(items)} schemas generated', file=sys.stderr)
+    return 1 if failed else 0
+
+
+def _report_batch(results):
+    # report the results in manifest order, as they come in
+    failed = 0
+    for item, error, seconds in results:
+        if error is None:
+            print(f'ok      {item["output"]} ({seconds:.2f} s)', file=sys.stderr)
+        else:
+            failed += 1
+            print(f'FAILED  {item["output"] or item["input"]}: {error}', file=sys.stderr)
+    return failed
+
+
+def run_watch(input_path: str, output_path: str = None, config_file: str = None, workers: int = 1):
+    """
+    Generate the API schema, and regenerate it whenever the DB schema files or the config change, until interrupted.
+    The previous DB schema and API schema are kept in memory, so that a change to the DB schema only regenerates the
+    affected types (see run_incremental). A change to the config regenerates the whole API schema.
+    :param input_path: DB schema files (separated by commas), or a directory of schema files
+    :param output_path: output file, or None for stdout
+    :param config_file: path to the configuration file
+    :param workers: number of processes making the definitions of independent generation steps
+    :return:
+    """
+    state = {}
+
+    def regenerate():
+        # the config is reloaded, rather than taken from the cache of load_config, since it may have changed
+        config = {}
+        if config_file:
+            with open(config_file) as f:
+                config = yaml.safe_load(f)
+        schema_string = read_schema_files(get_schema_files(input_path))
+        if state and state['config'] == config:
+            if state['schema_string'] == schema_string:
+                return
+            output = run_incremental(schema_string, config, state['schema_string'], state['output'], workers=workers)
+        else:
+            output = print_schema_with_directives(run(build_schema(schema_string), config, workers=workers))
+        write_output([output], output_path)
+        state.update(config=config, schema_string=schema_string, output=output)
+
+    watch([input_path, config_file], regenerate, ignore=[output_path])
+
+
+def write_output(chunks, path: str = None):
+    """
+    Write the output, chunk by chunk, to a file or stdout.
+    :param chunks: iterable of strings
+    :param path: output file, or None for stdout
+    :return:
+    """
+    if path:
+        with open(path, 'w') as out:
+            for chunk in chunks:
+                out.write(chunk)
+    else:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        sys.stdout.write('\n')
+
+
+def get_schema_files(path: str):
+    """
+    Get the list of schema files: the .graphql files in path, if path is a directory, or the files in the
+    comma-separated list path.
+    :param path:
+    :return:
+    """
     files = []
-    if os.path.isdir(args.input):
-        for filename in os.listdir(args.input):
+    if os.path.isdir(path):
+        for filename in os.listdir(path):
             if filename.endswith(".graphql"):
-                files.append(f'{args.input}/{filename}')
+                files.append(f'{path}/{filename}')
     else:
-        files = args.input.split(',')
+        files = path.split(',')
+    return files
+
 
-    # build schema
+def read_schema_files(files):
     schema_string = ''
     for file in files:
         with open(file, 'r') as f:
             schema_string += f.read() + '\n'
-    schema = build_schema(schema_string)
-    
-    # run
-    schema = run(schema, config)
-
-    # write to file or stdout
-    if args.output:
-        with open(args.output, 'w') as out:
-            out.write(print_schema_with_directives(schema))
+    return schema_string
+
+
+def parse_schema_files(files, cache_dir: str = None, workers: int = 1):
+    """
+    Parse the schema files into one document. Each file is parsed on its own, so that the parsed files can be cached
+    (keyed by their content) and the files that are not cached can be parsed in parallel. The definitions are merged
+    in the order of the files, as if the files were concatenated.
+    :param files:
+    :param cache_dir: cache directory, or None for no caching
+    :param workers: number of processes parsing the files that are not cached
+    :return DocumentNode:
+    """
+    cache = ParseCache(cache_dir) if cache_dir else None
+    sources = []
+    for file in files:
+        with open(file, 'r') as f:
+            sources.append(Source(f.read(), file))
+    keys = [ParseCache.get_key(source.body) for source in sources]
+    documents = [cache.get(key) if cache is not None else None for key in keys]
+
+    missing = [i for i, document in enumerate(documents) if document is None]
+    if workers > 1 and len(missing) > 1:
+        with multiprocessing.Pool(min(workers, len(missing))) as pool:
+            parsed = pool.map(_parse_source, [sources[i] for i in missing])
     else:
-        print(print_schema_with_directives(schema))
+        parsed = [_parse_source(sources[i]) for i in missing]
+    for i, document in zip(missing, parsed):
+        documents[i] = document
+        if cache is not None:
+            cache.put(keys[i], document)
+
+    return DocumentNode(definitions=[definition for document in documents for definition in document.definitions])
+
+
+def _parse_source(source: Source):
+    # locations are left out, they refer to the tokens of the whole file and would make the cached documents large
+    return parse(source, no_location=True)
+
+
+def run_incremental(schema_string: str, config: dict, previous_schema_string: str, previous_output: str,
+                    profiler: StepProfiler = None, workers: int = 1, low_memory: bool = False):
+    """
+    Generate the API schema for a DB schema, given the API schema previously generated (with the same config) for
+    another version of the DB schema. Only the types and fields generated for the DB types affected by the changes
+    are regenerated, the rest is copied from the previous API schema. Falls back to generating the whole API schema if
+    anything but object, interface and union types changed.
+    :param schema_string: the DB schema
+    :param config:
+    :param previous_schema_string: the previous DB schema
+    :param previous_output: the API schema generated for the previous DB schema
+    :return string: the API schema
+    """
+    document = parse(schema_string)
+    schema = build_ast_schema(document)
+    previous_schema = build_schema(previous_schema_string)
+    if config.get('validate'):
+        validate_names(schema, config.get('validate'))
+    if config.get('transform'):
+        transform_names(schema, config.get('transform'))
+        transform_names(previous_schema, config.get('transform'))
+
+    changed = get_changed_types(previous_schema, schema)
+    if changed is None:
+        return print_schema_with_directives(run(schema, config, profiler, workers, low_memory))
+    if not changed:
+        return previous_output
+
+    affected = get_affected_types(previous_schema, changed).union(get_affected_types(schema, changed))
+    sub_schema = build_schema(make_sub_schema(document, schema, affected))
+    sub_config = {key: value for key, value in config.items() if key != 'validate'}
+    output = print_schema_with_directives(run(sub_schema, sub_config, profiler, workers, low_memory))
+
+    provenance = Provenance(get_db_type_names(previous_schema).union(get_db_type_names(schema)))
+    return splice_output(previous_output, output, affected, provenance)
 
 
-def run(schema: GraphQLSchema, config: dict):
+def run(schema: GraphQLSchema, config: dict, profiler: StepProfiler = None, workers: int = 1,
+        low_memory: bool = False):
 
     # validate
     if config.get('validate'):
@@ -60,94 +386,118 @@ def run(schema: GraphQLSchema, config: dict):
 
     # API generation
     if config.get('generation'):
-        if config.get('generation').get('add_query_type'):
-            schema = add_query_type(schema)
-        if config.get('generation').get('add_mutation_type'):
-            schema = add_mutation_type(schema)
+        extender = SchemaExtender(schema, profiler, workers, low_memory)
+        schema = StepScheduler(get_generation_steps(config)).run(extender, config.get('generation'))
+    elif low_memory:
+        compact_schema(schema)
+
+    return schema
+
+
+def get_generation_steps(config: dict):
+    """
+    Get the generation steps, in the order in which they run (unless a dependency requires otherwise), with the
+    generation options enabling them and the parts of the schema they read, refer to and add (see
+    utils.scheduler.Step).
+    :param config:
+    :return: list of Step
+    """
+    generation = config.get('generation') or {}
+    filters = ['query_type_filter', 'query_list_of']
+    # the types and fields selected by the options (None for all)
+    reverse_edges = get_selection(generation, 'reverse_edges')
+    edge_types = get_selection(generation, 'edge_types')
+    by_id = get_selection(generation, 'query_by_id')
+    list_of = get_selection(generation, 'query_list_of')
+    type_filter = get_selection(generation, 'query_type_filter')
+    # the filters of all types are used by the filter arguments, otherwise only by the list queries
+    type_filters = None if generation.get('query_type_filter') else list_of
+    dates = ['creation date fields', 'last update date fields']
+    return [
+        Step('query_type', make_query_type, ['add_query_type'], outputs=['Query'], if_referred=True),
+        Step('mutation_type', make_mutation_type, ['add_mutation_type'], outputs=['Mutation'], if_referred=True),
 
         # add id
-        if config.get('generation').get('field_for_id'):
-            schema = add_id_to_types(schema)
+        Step('id', make_id_to_types, ['field_for_id'], outputs=['id fields']),
 
         # check if DateTime exists, or should be added
-        if config.get('generation').get('generate_datetime'):
-            datetime_control(schema)
+        Step('datetime', datetime_control, ['generate_datetime'], update=True, outputs=['DateTime']),
 
         # add reverse edges for traversal
-        if config.get('generation').get('reverse_edges'):
-            schema = add_reverse_edges(schema)
+        Step('reverse_edges', lambda s: make_reverse_edges(s, reverse_edges), ['reverse_edges'],
+             outputs=['reverse edge fields']),
 
         # add edge types
-        if config.get('generation').get('edge_types') or config.get('generation').get('create_edge_objects'):
-            schema = add_edge_objects(schema)
-        if config.get('generation').get('fields_for_edge_types'):
-            schema = add_fields_for_edge_types(schema, config.get('generation').get('reverse_edges'))
-
-        # add creation date
-        if config.get('generation').get('field_for_creation_date'):
-            schema = add_creation_date_to_types(schema)
-
-        # add last update date
-        if config.get('generation').get('field_for_last_update_date'):
-            schema = add_last_update_date_to_types(schema)
+        Step('edge_objects', lambda s: make_edge_objects(s, edge_types), ['edge_types', 'create_edge_objects'],
+             outputs=['edge types']),
+        Step('fields_for_edge_types',
+             lambda s: make_fields_for_edge_types(s, generation.get('reverse_edges'), edge_types, reverse_edges),
+             ['fields_for_edge_types'], inputs=['edge types'], outputs=['edge type fields']),
+
+        # add creation and last update dates
+        Step('creation_date', make_creation_date_to_types, ['field_for_creation_date'], optional=['edge types'],
+             refers=['DateTime'], outputs=['creation date fields']),
+        Step('last_update_date', make_last_update_date_to_types, ['field_for_last_update_date'],
+             optional=['edge types'], refers=['DateTime'], outputs=['last update date fields']),
 
         # add queries
-        if config.get('generation').get('query_by_id'):
-            schema = add_get_queries(schema)
-        if config.get('generation').get('query_type_filter') or config.get('generation').get('query_list_of'):
-            schema = add_enum_filters(schema)
-            schema = add_scalar_filters(schema, config)
-            schema = add_type_filters(schema)
-            
-        if config.get('generation').get('fields_for_edge_types') and config.get('generation').get('query_type_filter'):
-            schema = add_filters_for_edge_types(schema)
-
-        if config.get('generation').get('query_type_filter'):
-            schema = add_object_type_filters(schema)
-
-        if config.get('generation').get('query_list_of'):
-            schema = add_list_of_types(schema)
-            schema = add_list_queries(schema)
-
-        if config.get('generation').get('query_by_key'):
-            schema = add_key_input_types(schema)
-            schema = add_key_queries(schema)
-
-        if config.get('generation').get('query_edge_by_id'):
-            schema = add_get_edge_queries(schema)
+        Step('get_queries', lambda s: make_get_queries(s, by_id), ['query_by_id'], refers=['Query'],
+             outputs=['get queries']),
+        Step('enum_filters', make_enum_filters, filters, outputs=['enum filters']),
+        Step('scalar_filters', lambda s: make_scalar_filters(s, config), filters, outputs=['scalar filters']),
+        Step('type_filters', lambda s: make_type_filters(s, type_filters), filters, optional=['id fields'] + dates,
+             refers=['enum filters', 'scalar filters'], outputs=['type filters']),
+        Step('filters_for_edge_types', make_filters_for_edge_types, ['fields_for_edge_types', 'query_type_filter'],
+             all_options=True, inputs=['edge types'], optional=dates, refers=['enum filters', 'scalar filters'],
+             outputs=['edge type filters']),
+        Step('object_type_filters', lambda s: add_object_type_filters(s, type_filter), ['query_type_filter'],
+             update=True, inputs=None, outputs=['filter arguments']),
+        Step('list_of_types', lambda s: make_list_of_types(s, list_of), ['query_list_of'], outputs=['list types']),
+        Step('list_queries', lambda s: make_list_queries(s, list_of), ['query_list_of'],
+             refers=['Query', 'list types', 'type filters'], outputs=['list queries']),
+        Step('key_input_types', make_key_input_types, ['query_by_key'], outputs=['key inputs']),
+        Step('key_queries', make_key_queries, ['query_by_key'], refers=['Query', 'key inputs'],
+             outputs=['key queries']),
+        Step('get_edge_queries', make_get_edge_queries, ['query_edge_by_id'], optional=['edge types'],
+             refers=['Query'], outputs=['edge queries']),
 
         # add input types
-        if config.get('generation').get('input_to_create_objects'):
-            schema = add_input_to_create(schema)
-        if config.get('generation').get('input_to_update_objects'):
-            schema = add_input_update(schema)
+        Step('input_to_create', make_input_to_create, ['input_to_create_objects'],
+             outputs=['create inputs', 'connect inputs']),
+        Step('input_update', make_input_update, ['input_to_update_objects'], refers=['connect inputs'],
+             outputs=['update inputs']),
 
         # add edge input types
-        if config.get('generation').get('input_to_create_edge_objects'):
-            schema = add_input_to_create_edge_objects(schema)
-        if config.get('generation').get('input_to_update_edge_objects'):
-            schema = add_input_to_update_edge_objects(schema)
+        Step('input_to_create_edge_objects', lambda s: make_input_to_create_edge_objects(s, edge_types),
+             ['input_to_create_edge_objects'], optional=['create inputs'], outputs=['edge create inputs']),
+        Step('input_to_update_edge_objects', lambda s: make_input_to_update_edge_objects(s, edge_types),
+             ['input_to_update_edge_objects'], outputs=['edge update inputs']),
 
         # add mutations
-        if config.get('generation').get('create_objects'):
-            schema = add_create_mutations(schema)
-        if config.get('generation').get('update_objects'):
-            schema = add_update_mutations(schema)
-        if config.get('generation').get('delete_objects'):
-            schema = add_delete_mutations(schema)
+        Step('create_mutations', make_create_mutations, ['create_objects'], refers=['Mutation', 'create inputs'],
+             outputs=['create mutations']),
+        Step('update_mutations', make_update_mutations, ['update_objects'], refers=['Mutation', 'update inputs'],
+             outputs=['update mutations']),
+        Step('delete_mutations', make_delete_mutations, ['delete_objects'], refers=['Mutation'],
+             outputs=['delete mutations']),
 
         # add edge mutations
-        if config.get('generation').get('create_edge_objects'):
-            schema = add_mutation_create_edge_objects(schema)
-        if config.get('generation').get('update_edge_objects'):
-            schema = add_mutation_update_edge_objects(schema)
-        if config.get('generation').get('delete_edge_objects'):
-            schema = add_mutation_delete_edge_objects(schema)
+        Step('mutation_create_edge_objects', lambda s: make_mutation_create_edge_objects(s, edge_types),
+             ['create_edge_objects'], refers=['Mutation', 'edge create inputs'], outputs=['edge create mutations']),
+        Step('mutation_update_edge_objects', lambda s: make_mutation_update_edge_objects(s, edge_types),
+             ['update_edge_objects'], refers=['Mutation', 'edge update inputs'], outputs=['edge update mutations']),
+        Step('mutation_delete_edge_objects', lambda s: make_mutation_delete_edge_objects(s, edge_types),
+             ['delete_edge_objects'], refers=['Mutation'], outputs=['edge delete mutations']),
 
         # remove field arguments for edges (should not be in the API schema)
-        schema = remove_field_arguments_for_types(schema)
+        Step('remove_field_arguments', remove_field_arguments_for_types, update=True, inputs=None),
 
-    return schema
+        # shrink the API schema: merge identical filters, and remove the generated types that are not used
+        Step('merge_identical_filters', merge_identical_filters, ['merge_identical_filters'], update=True,
+             inputs=None),
+        Step('remove_unreachable_types', remove_unreachable_types, ['remove_unreachable_types'], update=True,
+             inputs=None),
+    ]
 
 
 def validate_names(schema: GraphQLSchema, validate):
@@ -279,16 +629,47 @@ def datetime_control(schema):
         schema.type_map['DateTime'] = GraphQLScalarType('DateTime', ast_node=ScalarTypeDefinitionNode())
         if not is_scalar_type(schema.type_map['DateTime']):
             raise Exception('DateTime could not be added as scalar!')
+    return schema
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('--input', type=str, required=True,
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument('--input', type=str,
                         help='GraphQL DB schema files (separated by commas), or a path to a schema directory')
+    inputs.add_argument('--batch', type=str,
+                        help='Manifest (YAML) listing the input, config and output of each schema to generate')
     parser.add_argument('--output', type=str,
                         help='Output schema file (default stdout)')
     parser.add_argument('--config', type=str,
                         help='Path to configuration file')
+    parser.add_argument('--cache-dir', type=str,
+                        help='Directory for caching generated schemas (default no caching)')
+    parser.add_argument('--profile', type=str,
+                        help='Print the time, peak memory, extend_schema calls and added types and fields of each '
+                             'generation step to stderr, and write them to the given JSON file')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes making the definitions of independent generation steps in parallel, '
+                             'or generating the schemas of a batch in parallel (default 1)')
+    parser.add_argument('--previous-input', type=str,
+                        help='GraphQL DB schema files (or directory) that the previous output was generated from')
+    parser.add_argument('--previous-output', type=str,
+                        help='Output schema file previously generated with the same configuration, only the parts '
+                             'affected by changes since the previous input are regenerated')
+    parser.add_argument('--index-manifest', type=str,
+                        help='Write the indexes that the driver should create (for keys, fields with @index and '
+                             'configured fields) to the given JSON file')
+    parser.add_argument('--cost-manifest', type=str,
+                        help='Write the costs of the fields that the server resolves from the database, used to '
+                             'limit the cost of operations, to the given JSON file')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='Drop the parts of the schema that are no longer needed after each generation step, and '
+                             'print the peak memory to stderr')
+    parser.add_argument('--plan', action='store_true',
+                        help='Print the generation steps enabled by the configuration, in order, the independent steps '
+                             'and the skipped steps to stderr')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and regenerate the output whenever the input or the config changes')
 
     cmd(parser.parse_args())
 
@@ -1,7 +1,22 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
 from unittest import TestCase
 from graphql import build_schema
 import generator
-from modules.utils import compare
+from test.benchmarks import check_regressions, make_synthetic_schema
+from utils import compare
+from utils.cache import BuildCache, ParseCache, get_cache_key
+from utils.costs import get_cost_manifest
+from utils.extender import SchemaExtender
+from utils.indexes import get_index_manifest
+from utils.profiler import StepProfiler
+from utils.scheduler import Step, StepScheduler
+from utils.schema_index import SchemaIndex, get_schema_index
+from utils.watch import get_modification_times
+from utils.utils import *
 
 # TODO Many tests...
 
@@ -115,4 +130,398 @@ class Tests(TestCase):
             generator.run(schema_in, config)
             assert False
         except:
-            assert True
\ No newline at end of file
+            assert True
+
+    def test_schema_extender_1(self):
+        schema_in = build_schema('''
+            type Human {
+                name: String!
+                friends: [Human]
+            }
+        ''')
+        extender = SchemaExtender(schema_in)
+        extender.extend('query_type', make_query_type)
+        extender.extend('id', make_id_to_types)
+        extender.extend('reverse_edges', make_reverse_edges)
+        extender.extend('get_queries', make_get_queries)
+        schema_out = extender.flush()
+        assert extender.extend_calls == 1
+
+        expected = add_get_queries(add_reverse_edges(add_id_to_types(add_query_type(schema_in))))
+        assert print_schema_with_directives(schema_out) == print_schema_with_directives(expected)
+
+    def test_schema_extender_2(self):
+        schema_in = build_schema('''
+            scalar DateTime
+            type Human {
+                name: String!
+                friends(since: Int): [Human]
+            }
+        ''')
+        extender = SchemaExtender(schema_in)
+        extender.extend('edge_objects', make_edge_objects)
+        extender.extend('creation_date', make_creation_date_to_types, after=['edge_objects'])
+        schema_out = extender.flush()
+        assert extender.extend_calls == 2
+        assert '_creationDate' in schema_out.type_map['_FriendsEdgeFromHuman'].fields
+
+    def test_add_input_to_create_2(self):
+        schema_in = build_schema('''
+            type Human {
+                name: String!
+                friends(since: Int!): [Human!]!
+                pet: Animal
+            }
+            interface Animal { name: String }
+            type Dog implements Animal { name: String }
+        ''')
+        extender = SchemaExtender(schema_in)
+        extender.extend('input_to_create', make_input_to_create)
+        schema_out = extender.flush()
+        assert extender.extend_calls == 1
+
+        connect = schema_out.type_map['_InputToConnectFriendsOfHuman']
+        assert set(connect.fields) == {'connect', 'create', 'annotations'}
+        assert str(connect.fields['annotations'].type) == '_InputToAnnotateFriendsEdgeFromHuman!'
+        assert str(schema_out.type_map['_InputToCreateHuman'].fields['friends'].type) == \
+            '[_InputToConnectFriendsOfHuman!]!'
+        assert set(schema_out.type_map['_InputToConnectPetOfHuman'].fields) == {'connect', 'createDog'}
+
+    def test_schema_index_1(self):
+        schema_in = build_schema('''
+            directive @uniqueForTarget on FIELD_DEFINITION
+            directive @requiredForTarget on FIELD_DEFINITION
+            directive @required on FIELD_DEFINITION
+            interface Animal { name: String owner: Human @uniqueForTarget }
+            type Dog implements Animal { name: String owner: Human @requiredForTarget }
+            type Human {
+                name: String!
+                pets: [Animal]
+            }
+        ''')
+        schema_out = add_edge_objects(add_reverse_edges(add_id_to_types(add_query_type(schema_in))))
+        index = get_schema_index(schema_out)
+        assert index.schema is schema_out
+
+        expected = SchemaIndex(build_schema(print_schema(schema_out)))
+        assert index.order == list(schema_out.type_map)
+        assert index.kinds == expected.kinds
+        assert index.relationship_fields == expected.relationship_fields
+        assert index.implementations == expected.implementations
+        assert list(index.get_field_directives(schema_out.type_map['Dog'], 'owner', inherited=True)) == \
+            ['requiredForTarget', 'uniqueForTarget']
+        assert [t.name for t in index.db_types(TypeKind.OBJECT)] == ['Dog', 'Human']
+        assert [t.name for t in index.edge_types()] == \
+            ['_OwnerEdgeFromAnimal', '_OwnerEdgeFromDog', '_PetsEdgeFromHuman']
+
+    def test_build_cache_1(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            schema_file = os.path.join(tmp_dir, 'schema.graphql')
+            with open(schema_file, 'w') as f:
+                f.write('type Human { name: String! }')
+            key = get_cache_key([schema_file], 'api-schema')
+            assert key == get_cache_key([schema_file], 'api-schema')
+            assert key != get_cache_key([schema_file], 'resolvers')
+
+            cache = BuildCache(os.path.join(tmp_dir, 'cache'))
+            assert cache.get(key) is None
+            cache.put(key, 'type Human')
+            assert cache.get(key) == 'type Human'
+
+            with open(schema_file, 'w') as f:
+                f.write('type Human { name: String }')
+            assert cache.get(get_cache_key([schema_file], 'api-schema')) is None
+
+    def test_profiler_1(self):
+        schema = build_schema('type Human { name: String } type Droid { name: String }')
+        config = {'generation': {'add_query_type': True, 'field_for_id': True, 'query_by_id': True}}
+        profiler = StepProfiler()
+        generator.run(schema, config, profiler)
+        steps = {record['step']: record for record in profiler.steps}
+        assert steps['query_type']['types_added'] == 1
+        assert steps['id']['fields_added'] == 2
+        assert steps['get_queries']['fields_added'] == 2
+        assert profiler.get_totals()['extend_schema_calls'] == 1
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profiler.write_json(os.path.join(tmp_dir, 'profile.json'))
+            with open(os.path.join(tmp_dir, 'profile.json')) as f:
+                assert json.load(f)['total']['fields_added'] == 4
+
+    def test_benchmarks_1(self):
+        schema = build_schema(make_synthetic_schema(40, interface_ratio=0.1, union_ratio=0.05, key_ratio=1.0))
+        assert len([t for t in schema.type_map.values() if is_interface_type(t)]) == 4
+        assert len([t for t in schema.type_map.values() if is_union_type(t)]) == 2
+        objects = [t for t in schema.type_map.values() if is_object_type(t) and is_db_schema_defined_type(t)]
+        assert len(objects) == 34
+        assert all(t.ast_node.directives[0].name.value == 'key' for t in objects)
+
+        baseline = {'10': {'run': 1.0, 'print': 0.1}, '100': {'run': 10.0, 'print': 1.0}, '1000': {'run': 100.0, 'print': 10.0}}
+        assert check_regressions(baseline, baseline) == []
+        quadratic = {'10': {'run': 1.0, 'print': 0.1}, '100': {'run': 100.0, 'print': 1.0}, '1000': {'run': 10000.0, 'print': 10.0}}
+        assert len(check_regressions(quadratic, baseline)) == 3
+
+    def test_write_schema_with_directives_1(self):
+        schema = generator.run(build_schema('type Human { name: String } type Droid { name: String }'),
+                               {'generation': {'add_query_type': True, 'field_for_id': True, 'query_by_id': True}})
+        chunks = list(iter_schema_with_directives(schema))
+        assert [chunk for chunk in chunks if chunk.startswith('type ')][0].startswith('type Droid {')
+        out = io.StringIO()
+        write_schema_with_directives(schema, out)
+        assert out.getvalue() == ''.join(chunks) == print_schema_with_directives(schema)
+
+    def test_run_parallel_1(self):
+        schema_string = '''
+            interface Character { name: String friends: [Character] }
+            type Human implements Character { name: String friends: [Character] starships: [Starship] }
+            type Droid implements Character { name: String friends: [Character] }
+            type Starship { name: String length: Float }
+        '''
+        config = {'generation': {'add_query_type': True, 'add_mutation_type': True, 'field_for_id': True,
+                                 'reverse_edges': True, 'query_by_id': True, 'query_type_filter': True,
+                                 'query_list_of': True, 'input_to_create_objects': True,
+                                 'input_to_update_objects': True, 'create_objects': True, 'update_objects': True}}
+        expected = print_schema_with_directives(generator.run(build_schema(schema_string), config))
+        output = print_schema_with_directives(generator.run(build_schema(schema_string), config, workers=3))
+        assert output == expected
+
+    def test_run_batch_1(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, 'schema.graphql'), 'w') as f:
+                f.write('type Human { name: String }')
+            with open(os.path.join(tmp_dir, 'config.yml'), 'w') as f:
+                f.write('generation:\n    field_for_id: true\n')
+            with open(os.path.join(tmp_dir, 'manifest.yml'), 'w') as f:
+                f.write('- {input: schema.graphql, config: config.yml, output: api-schema.graphql}\n'
+                        '- {input: missing.graphql, config: config.yml, output: missing-api-schema.graphql}\n')
+            assert generator.run_batch(os.path.join(tmp_dir, 'manifest.yml')) == 1
+            with open(os.path.join(tmp_dir, 'api-schema.graphql')) as f:
+                assert 'type Human {\n  name: String\n  id: ID!\n}' in f.read()
+
+    def test_schema_fingerprint_1(self):
+        schema_string = '''
+            directive @key(fields: [String!]!) on OBJECT
+            enum Episode { NEWHOPE EMPIRE }
+            type Human @key(fields: ["name"]) { name: String friends(first: Int = 10): [Human] appearsIn: Episode }
+        '''
+        schema = build_schema(schema_string)
+        # the order of fields and enum values does not matter
+        reordered = build_schema(schema_string.replace('NEWHOPE EMPIRE', 'EMPIRE NEWHOPE')
+                                 .replace('name: String friends', 'friends').replace('Episode }', 'Episode name: String }'))
+        assert compare.get_schema_fingerprint(schema) == compare.get_schema_fingerprint(reordered)
+        assert compare.is_equals_schema(schema, reordered)
+        # enum values, default values and directives do
+        for old, new in (('EMPIRE', 'JEDI'), ('= 10', '= 20'), ('@key(fields: ["name"])', '')):
+            changed = build_schema(schema_string.replace(old, new))
+            assert compare.get_schema_fingerprint(schema) != compare.get_schema_fingerprint(changed)
+        assert compare.get_type_fingerprints(schema)['Episode'] == compare.get_type_fingerprint(reordered.type_map['Episode'])
+
+    def test_run_low_memory_1(self):
+        schema_string = make_synthetic_schema(30, seed=3)
+        config = {'generation': {'add_query_type': True, 'add_mutation_type': True, 'field_for_id': True,
+                                 'reverse_edges': True, 'query_by_id': True, 'query_type_filter': True,
+                                 'query_list_of': True, 'input_to_create_objects': True, 'create_objects': True}}
+        expected = print_schema_with_directives(generator.run(build_schema(schema_string), config))
+        schema = generator.run(build_schema(schema_string), config, low_memory=True)
+        assert print_schema_with_directives(schema) == expected
+        # the extensions adding the queries are dropped, and the types no longer refer to the types they extend
+        assert schema.type_map['Query'].extension_ast_nodes == ()
+        assert isinstance(schema.type_map['Query']._fields, dict)
+
+    def test_remove_unreachable_types_1(self):
+        schema_in = build_schema('''
+            type Human { name: String friends: [Human] }
+            type Droid { name: String friends: [Droid] }
+        ''')
+        config = {'generation': {'add_query_type': True, 'query_list_of': True, 'query_type_filter': True,
+                                 'remove_unreachable_types': True, 'merge_identical_filters': True}}
+        schema_out = generator.run(schema_in, config)
+        # Droid uses the (identical) filter of Human
+        assert str(schema_out.type_map['Query'].fields['listOfDroids'].args['filter'].type) == '_FilterForHuman'
+        assert str(schema_out.type_map['Droid'].fields['friends'].args['filter'].type) == '_FilterForHuman'
+        assert '_FilterForDroid' not in schema_out.type_map
+        # no field is of type ID, Int, Float or Boolean
+        assert '_StringFilter' in schema_out.type_map
+        for type_name in ['_IDFilter', '_IntFilter', '_FloatFilter', '_BooleanFilter']:
+            assert type_name not in schema_out.type_map
+        assert_valid_schema(build_schema(print_schema_with_directives(schema_out)))
+
+    def test_generation_selection_1(self):
+        schema_in = build_schema('''
+            type Human { name: String friends: [Human] starships: [Starship] }
+            type Starship { name: String }
+        ''')
+        config = {'generation': {'add_query_type': True, 'reverse_edges': {'except': ['Human.friends']},
+                                 'edge_types': {'only': ['Human.starships']}, 'fields_for_edge_types': True,
+                                 'query_list_of': {'only': ['Human']}, 'query_by_id': {'except': ['Starship']}}}
+        schema_out = generator.run(schema_in, config)
+        assert '_friendsFromHuman' not in schema_out.type_map['Human'].fields
+        assert '_starshipsFromHuman' in schema_out.type_map['Starship'].fields
+        assert '_StarshipsEdgeFromHuman' in schema_out.type_map
+        assert '_FriendsEdgeFromHuman' not in schema_out.type_map
+        assert set(schema_out.type_map['Query'].fields) == {'human', 'listOfHumans'}
+        # only the filter used by the list query
+        assert '_FilterForHuman' in schema_out.type_map
+        assert '_FilterForStarship' not in schema_out.type_map
+        assert_valid_schema(build_schema(print_schema_with_directives(schema_out)))
+
+    def test_index_manifest_1(self):
+        schema_in = build_schema('''
+            directive @key(fields: [String!]!) on OBJECT
+            directive @index(unique: Boolean) on FIELD_DEFINITION
+            interface Character { name: String }
+            type Human implements Character @key(fields: ["name"]) { name: String age: Int @index }
+            type Droid implements Character { name: String model: String }
+        ''')
+        config = {'indexes': {'creation_date': True, 'fields': ['Character.name', 'Droid.model']}}
+        manifest = get_index_manifest(schema_in, config)
+        indexes = {(i['collection'], tuple(i['fields'])): i['unique'] for i in manifest['indexes']}
+        # the key index stays unique, the interface field is indexed in the collections of its implementations
+        assert indexes == {('Human', ('name',)): True, ('Human', ('age',)): False, ('Droid', ('name',)): False,
+                           ('Droid', ('model',)): False}
+        # the unique index on the nullable key field is sparse, the others are not
+        assert [(i['collection'], i['fields']) for i in manifest['indexes'] if i['sparse']] == [('Human', ['name'])]
+        with self.assertRaises(Exception):
+            get_index_manifest(schema_in, {'indexes': {'fields': ['Human.height']}})
+
+    def test_cost_manifest_1(self):
+        schema_in = build_schema('''
+            interface Character { name: String friends: [Character] }
+            type Human implements Character { name: String friends: [Character] }
+            type Droid implements Character { name: String friends: [Character] }
+        ''')
+        config = {'generation': {'add_query_type': True, 'query_list_of': True, 'reverse_edges': True},
+                  'costs': {'list_size': 5, 'reverse_edge': 2}}
+        manifest = get_cost_manifest(generator.run(schema_in, config), config)
+        types = manifest['types']
+        assert types['Query']['listOfHumans'] == {'type': '_ListOfHumans', 'size': 1, 'cost': 1, 'kind': 'list query',
+                                                  'first': 10}
+        assert types['_ListOfCharacters']['totalCount']['cost'] == 2
+        # the friends are read from the collections of both implementations
+        assert types['Human']['friends'] == {'type': 'Character', 'size': 5, 'cost': 2, 'kind': 'field'}
+        assert types['Character']['_friendsFromHuman'] == {'type': 'Human', 'size': 5, 'cost': 2,
+                                                          'kind': 'reverse edge'}
+        assert 'name' not in types['Human']
+
+    def test_step_scheduler_1(self):
+        scheduler = StepScheduler([
+            Step('mutations', None, ['create'], refers=['Mutation', 'inputs']),
+            Step('inputs', None, ['create'], outputs=['inputs']),
+            Step('mutation_type', None, ['mutation_type'], outputs=['Mutation']),
+            Step('queries', None, ['query'], refers=['Query']),
+            Step('cleanup', None, update=True, inputs=None)
+        ])
+        steps, skipped = scheduler.schedule({'create': True, 'mutation_type': True})
+        # the mutations are moved after the steps adding the types they refer to
+        assert [step.name for step in steps] == ['inputs', 'mutation_type', 'mutations', 'cleanup']
+        assert [(step.name, reason) for step, reason in skipped] == [('queries', 'query not set')]
+        assert scheduler.get_levels(steps) == [['inputs', 'mutation_type'], ['mutations'], ['cleanup']]
+        assert scheduler.get_reads(steps[2], steps) == []
+
+    def test_step_scheduler_2(self):
+        # steps needing parts of the schema that no enabled step adds are skipped, and so are the root types then
+        config = {'generation': {option: True for option in ['add_query_type', 'add_mutation_type', 'field_for_id',
+                                                             'input_to_update_objects', 'update_objects']}}
+        steps, skipped = StepScheduler(generator.get_generation_steps(config)).schedule(config['generation'])
+        reasons = dict((step.name, reason) for step, reason in skipped)
+        assert [step.name for step in steps] == ['id', 'remove_field_arguments']
+        assert reasons['input_update'] == "needs 'connect inputs' (input_to_create_objects not set)"
+        assert reasons['update_mutations'] == "needs 'update inputs' (input_update skipped)"
+        assert reasons['mutation_type'] == "no step refers to 'Mutation'"
+        schema_out = generator.run(build_schema('type Test { name: String }'), config)
+        assert 'Mutation' not in schema_out.type_map
+        assert 'id' in schema_out.type_map['Test'].fields
+
+    def test_step_scheduler_3(self):
+        # enabled steps that are skipped are reported on stderr, the root types that are not needed are not
+        config = {'generation': {'field_for_creation_date': True, 'add_query_type': True, 'query_by_id': True,
+                                 'add_mutation_type': True}}
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            schema_out = generator.run(build_schema('type Test { name: String }'), config)
+        assert '_creationDate' not in schema_out.type_map['Test'].fields
+        assert stderr.getvalue() == "Warning: generation step 'creation_date' skipped, needs 'DateTime' " \
+                                    "(generate_datetime not set)\n"
+
+    def test_generation_steps_1(self):
+        # the registered order of the generation steps respects their dependencies
+        config = {'generation': {option: True for option in ['add_query_type', 'add_mutation_type', 'field_for_id',
+                                                             'edge_types', 'fields_for_edge_types', 'query_type_filter',
+                                                             'query_list_of', 'input_to_create_objects',
+                                                             'input_to_update_objects', 'create_objects']}}
+        steps = generator.get_generation_steps(config)
+        scheduled, _ = StepScheduler(steps).schedule(config['generation'])
+        assert [step.name for step in scheduled] == [step.name for step in steps if step.is_enabled(config['generation'])]
+
+    def test_diff_schemas_1(self):
+        old_schema = build_schema('''
+            enum Episode { NEWHOPE EMPIRE }
+            type Human { name: String! friends(first: Int): [Human] appearsIn: Episode }
+            type Droid { name: String }
+        ''')
+        new_schema = build_schema('''
+            enum Episode { NEWHOPE EMPIRE JEDI }
+            type Human { name: String friends(first: Int, after: ID!): [Human] appearsIn: Episode! }
+            type Starship { name: String }
+        ''')
+        changes = {(change.change, change.path): change.breaking for change in
+                   compare.diff_schemas(old_schema, new_schema)}
+        assert changes == {
+            ('removed', 'Droid'): True,
+            ('added', 'Episode.JEDI'): False,
+            ('changed', 'Human.name'): True,
+            ('added', 'Human.friends(after)'): True,
+            ('changed', 'Human.appearsIn'): False,
+            ('added', 'ID'): False,
+            ('added', 'Starship'): False
+        }
+        assert compare.diff_schemas(old_schema, old_schema) == []
+
+    def test_parse_schema_files_1(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = [os.path.join(tmp_dir, 'human.graphql'), os.path.join(tmp_dir, 'droid.graphql')]
+            for file, content in zip(files, ['type Human { name: String }', '"Robot" type Droid { name: String }']):
+                with open(file, 'w') as f:
+                    f.write(content)
+            document = generator.parse_schema_files(files, cache_dir=tmp_dir)
+            assert print_ast(document) == print_ast(parse(generator.read_schema_files(files)))
+            # the second time, the documents come from the cache
+            assert ParseCache(tmp_dir).get(ParseCache.get_key('type Human { name: String }')) is not None
+            assert print_ast(generator.parse_schema_files(files, cache_dir=tmp_dir)) == print_ast(document)
+
+    def test_get_modification_times_1(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for filename in ('a.graphql', 'b.graphql', 'notes.txt'):
+                with open(os.path.join(tmp_dir, filename), 'w') as f:
+                    f.write('type A { name: String }')
+            times = get_modification_times([tmp_dir, os.path.join(tmp_dir, 'config.yml')],
+                                           ignore=[os.path.join(tmp_dir, 'b.graphql')])
+            assert list(times) == [f'{tmp_dir}/a.graphql', os.path.join(tmp_dir, 'config.yml')]
+            assert times[os.path.join(tmp_dir, 'config.yml')] is None
+
+    def test_run_incremental_1(self):
+        previous_schema_string = '''
+            interface Character { name: String friends: [Character] }
+            type Human implements Character { name: String friends: [Character] starships: [Starship] }
+            type Droid implements Character { name: String friends: [Character] }
+            type Starship { name: String }
+            type Planet { name: String }
+        '''
+        schema_string = previous_schema_string.replace('type Starship { name: String }',
+                                                       'type Starship { name: String pilot: Droid }')
+        config = {'generation': {'add_query_type': True, 'add_mutation_type': True, 'field_for_id': True,
+                                 'reverse_edges': True, 'query_by_id': True, 'input_to_create_objects': True,
+                                 'input_to_update_objects': True, 'create_objects': True, 'update_objects': True}}
+        previous_output = print_schema_with_directives(generator.run(build_schema(previous_schema_string), config))
+        expected = generator.run(build_schema(schema_string), config)
+
+        schema_out = build_schema(generator.run_incremental(schema_string, config, previous_schema_string, previous_output))
+        # the fields of a type may be in a different order
+        assert set(schema_out.type_map) == set(expected.type_map)
+        for type_name, _type in expected.type_map.items():
+            if hasattr(_type, 'fields'):
+                fields = {name: str(field.type) for name, field in _type.fields.items()}
+                assert fields == {name: str(field.type) for name, field in schema_out.type_map[type_name].fields.items()}
+        assert '_pilotFromStarship' in schema_out.type_map['Droid'].fields
+
+        assert generator.run_incremental(previous_schema_string, config, previous_schema_string, previous_output) == \
+            previous_output
@@ -0,0 +1,171 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import yaml
+from graphql import build_schema
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import generator
+from utils.utils import print_schema_with_directives
+
+benchmark_dir = os.path.dirname(os.path.abspath(__file__))
+default_baseline = os.path.join(benchmark_dir, 'benchmark_baseline.json')
+default_config = os.path.join(benchmark_dir, '..', 'resources', 'config.yml')
+default_sizes = [10, 50, 100, 500, 1000, 5000]
+scalars = ['String', 'Int', 'Float', 'Boolean']
+
+
+def make_synthetic_schema(num_types: int, fields_per_type: int = 4, relationship_density: float = 1.5,
+                          interface_ratio: float = 0.1, union_ratio: float = 0.05, key_ratio: float = 0.2,
+                          required_for_target_ratio: float = 0.1, seed: int = 0):
+    """
+    Make a DB schema with the given number of (object, interface and union) types.
+    :param num_types: number of types
+    :param fields_per_type: number of scalar fields of each object and interface type (besides name)
+    :param relationship_density: average number of relationship fields (to object, interface or union types) of each
+    object type
+    :param interface_ratio: fraction of the types that are interfaces, objects implement one of them
+    :param union_ratio: fraction of the types that are unions of two or three object types
+    :param key_ratio: fraction of the object types with a @key
+    :param required_for_target_ratio: fraction of the relationship fields with @requiredForTarget
+    :param seed: seed of the random choices, the same arguments always give the same schema
+    :return string:
+    """
+    rng = random.Random(seed)
+    num_interfaces = round(num_types * interface_ratio)
+    num_unions = round(num_types * union_ratio)
+    num_objects = max(num_types - num_interfaces - num_unions, 1)
+    objects = [f'Type{i}' for i in range(num_objects)]
+    interfaces = [f'Interface{i}' for i in range(num_interfaces)]
+    unions = [f'Union{i}' for i in range(num_unions)]
+    targets = objects + interfaces + unions
+
+    # all object and interface types have the same scalar fields, so every object implements any interface
+    scalar_fields = ['  name: String!'] + [f'  field{j}: {scalars[j % len(scalars)]}' for j in range(fields_per_type)]
+
+    make = 'directive @key(fields: [String!]!) on OBJECT\n'
+    make += 'directive @required on FIELD_DEFINITION\n'
+    make += 'directive @requiredForTarget on FIELD_DEFINITION\n\n'
+    for name in interfaces:
+        make += f'interface {name} {{\n' + '\n'.join(scalar_fields) + '\n}\n\n'
+    for name in unions:
+        members = rng.sample(objects, min(len(objects), rng.randint(2, 3)))
+        make += f'union {name} = ' + ' | '.join(members) + '\n\n'
+    for name in objects:
+        make += f'type {name}'
+        if interfaces:
+            make += f' implements {rng.choice(interfaces)}'
+        if rng.random() < key_ratio:
+            make += ' @key(fields: ["name"])'
+        make += ' {\n' + '\n'.join(scalar_fields) + '\n'
+        num_relationships = int(relationship_density) + (rng.random() < relationship_density % 1)
+        for j in range(num_relationships):
+            target = rng.choice(targets)
+            make += f'  rel{j}: ' + (f'[{target}]' if rng.random() < 0.5 else target)
+            if rng.random() < required_for_target_ratio:
+                make += ' @requiredForTarget'
+            make += '\n'
+        make += '}\n\n'
+    return make
+
+
+def benchmark(num_types: int, config: dict, repeat: int = 1, **kwargs):
+    """
+    Time generator.run and print_schema_with_directives for a synthetic schema (the best of repeat runs).
+    :param num_types:
+    :param config:
+    :param repeat:
+    :param kwargs: arguments of make_synthetic_schema
+    :return: dict of run and print times in seconds
+    """
+    make = make_synthetic_schema(num_types, **kwargs)
+    result = {'run': math.inf, 'print': math.inf}
+    for _ in range(repeat):
+        schema = build_schema(make)
+        start = time.perf_counter()
+        schema = generator.run(schema, config)
+        result['run'] = min(result['run'], time.perf_counter() - start)
+        start = time.perf_counter()
+        print_schema_with_directives(schema)
+        result['print'] = min(result['print'], time.perf_counter() - start)
+    return result
+
+
+def check_regressions(results: dict, baseline: dict, tolerance: float = 3.0, max_exponent: float = 1.5):
+    """
+    Compare benchmark results with a baseline. To be independent of the speed of the machine, times are compared
+    relative to the time for the smallest size in both. A step is reported if its relative time for some size is more
+    than tolerance times the relative time in the baseline, or if its time grows faster than n^max_exponent between
+    two sizes of at least 100 types.
+    :param results: dict of size, dict of step, time
+    :param baseline: dict of size, dict of step, time
+    :param tolerance:
+    :param max_exponent:
+    :return: list of regressions (strings)
+    """
+    regressions = []
+    sizes = sorted(int(size) for size in results)
+    common = [size for size in sizes if str(size) in baseline]
+    for step in ('run', 'print'):
+        if common:
+            reference = results[str(common[0])][step]
+            baseline_reference = baseline[str(common[0])][step]
+            for size in common[1:]:
+                relative = results[str(size)][step] / reference
+                baseline_relative = baseline[str(size)][step] / baseline_reference
+                if relative > tolerance * baseline_relative:
+                    regressions.append(f'{step} for {size} types takes {relative:.1f} times as long as for '
+                                       f'{common[0]} types (baseline {baseline_relative:.1f})')
+        large = [size for size in sizes if size >= 100]
+        for size1, size2 in zip(large, large[1:]):
+            exponent = math.log(results[str(size2)][step] / results[str(size1)][step]) / math.log(size2 / size1)
+            if exponent > max_exponent:
+                regressions.append(f'{step} grows as n^{exponent:.2f} from {size1} to {size2} types')
+    return regressions
+
+
+def cmd(args):
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    results = {}
+    for size in sizes:
+        # repeat the small sizes, since their times are too short to measure reliably in one run
+        results[str(size)] = benchmark(size, config, repeat=5 if size <= 100 else 1)
+        print(f'{size:>6} types  run {results[str(size)]["run"]:8.3f} s  print {results[str(size)]["print"]:8.3f} s')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = check_regressions(results, baseline, args.tolerance, args.max_exponent)
+    for regression in regressions:
+        print(f'REGRESSION: {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the API generator on synthetic schemas of growing size')
+    parser.add_argument('--sizes', type=str, default=','.join(str(size) for size in default_sizes),
+                        help='Numbers of types (separated by commas)')
+    parser.add_argument('--config', type=str, default=default_config, help='Path to configuration file')
+    parser.add_argument('--baseline', type=str, default=default_baseline, help='Baseline file (JSON)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results to the baseline file')
+    parser.add_argument('--output', type=str, help='Results file (JSON, optional)')
+    parser.add_argument('--tolerance', type=float, default=3.0,
+                        help='Allowed slowdown relative to the baseline, after normalizing by the smallest size')
+    parser.add_argument('--max-exponent', type=float, default=1.5,
+                        help='Allowed growth exponent of the times between sizes of at least 100 types')
+    sys.exit(cmd(parser.parse_args()))
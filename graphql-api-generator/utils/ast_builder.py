@@ -0,0 +1,127 @@
+from graphql import *
+
+
+def name_node(name: str):
+    return NameNode(value=name)
+
+
+def type_node(_type):
+    """
+    Make the type reference for a type, e.g. [Human!]!.
+    :param _type: a GraphQL type, or a type reference in SDL, e.g. '[Human!]!'
+    :return TypeNode:
+    """
+    if isinstance(_type, str):
+        if _type.endswith('!'):
+            return NonNullTypeNode(type=type_node(_type[:-1]))
+        if _type.startswith('['):
+            return ListTypeNode(type=type_node(_type[1:-1]))
+        return NamedTypeNode(name=name_node(_type))
+    if is_non_null_type(_type):
+        return NonNullTypeNode(type=type_node(_type.of_type))
+    if is_list_type(_type):
+        return ListTypeNode(type=type_node(_type.of_type))
+    return NamedTypeNode(name=name_node(_type.name))
+
+
+def directive(name: str):
+    """
+    Make a directive without arguments, e.g. @required.
+    :param name:
+    :return DirectiveNode:
+    """
+    return DirectiveNode(name=name_node(name), arguments=[])
+
+
+def value_node(value):
+    """
+    Make the (default) value node of a string, int or bool.
+    :param value:
+    :return ValueNode:
+    """
+    if isinstance(value, bool):
+        return BooleanValueNode(value=value)
+    if isinstance(value, int):
+        return IntValueNode(value=str(value))
+    return StringValueNode(value=value)
+
+
+def field(name: str, _type, arguments=(), directives=()):
+    """
+    Make a field of an object or interface type.
+    :param name:
+    :param _type: see type_node
+    :param arguments: list of InputValueDefinitionNode (see input_value)
+    :param directives: list of DirectiveNode
+    :return FieldDefinitionNode:
+    """
+    return FieldDefinitionNode(name=name_node(name), type=type_node(_type), arguments=list(arguments),
+                               directives=list(directives))
+
+
+def input_value(name: str, _type, default_value=None):
+    """
+    Make a field of an input type, or an argument of a field.
+    :param name:
+    :param _type: see type_node
+    :param default_value: None, or a string, int or bool
+    :return InputValueDefinitionNode:
+    """
+    return InputValueDefinitionNode(name=name_node(name), type=type_node(_type), directives=[],
+                                    default_value=None if default_value is None else value_node(default_value))
+
+
+def object_type(name: str, fields=(), interfaces=()):
+    """
+    Make an object type definition.
+    :param name:
+    :param fields: list of FieldDefinitionNode
+    :param interfaces: names of the implemented interfaces
+    :return ObjectTypeDefinitionNode:
+    """
+    return ObjectTypeDefinitionNode(name=name_node(name), fields=list(fields), directives=[],
+                                    interfaces=[NamedTypeNode(name=name_node(i)) for i in interfaces])
+
+
+def interface_type(name: str, fields=(), interfaces=()):
+    """
+    Make an interface type definition.
+    :param name:
+    :param fields: list of FieldDefinitionNode
+    :param interfaces: names of the implemented interfaces
+    :return InterfaceTypeDefinitionNode:
+    """
+    return InterfaceTypeDefinitionNode(name=name_node(name), fields=list(fields), directives=[],
+                                       interfaces=[NamedTypeNode(name=name_node(i)) for i in interfaces])
+
+
+def input_type(name: str, fields=()):
+    """
+    Make an input type definition.
+    :param name:
+    :param fields: list of InputValueDefinitionNode
+    :return InputObjectTypeDefinitionNode:
+    """
+    return InputObjectTypeDefinitionNode(name=name_node(name), fields=list(fields), directives=[])
+
+
+def extend_type(name: str, fields, interface=False):
+    """
+    Make an extension adding fields to an object (or interface) type.
+    :param name:
+    :param fields: list of FieldDefinitionNode
+    :param interface: True if the extended type is an interface
+    :return ObjectTypeExtensionNode or InterfaceTypeExtensionNode:
+    """
+    node_type = InterfaceTypeExtensionNode if interface else ObjectTypeExtensionNode
+    return node_type(name=name_node(name), fields=list(fields), directives=[], interfaces=[])
+
+
+def extend_input_type(name: str, fields):
+    """
+    Make an extension adding fields to an input type.
+    :param name:
+    :param fields: list of InputValueDefinitionNode
+    :return InputObjectTypeExtensionNode:
+    """
+    return InputObjectTypeExtensionNode(name=name_node(name), fields=list(fields), directives=[])
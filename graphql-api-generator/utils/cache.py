@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+
+from graphql import DocumentNode, version as graphql_version
+
+
+def get_cache_key(files, *strings):
+    """
+    Compute a cache key from the content of the given files (in the given order) and strings.
+    :param files: paths of files, e.g., the input files, the config file and the source files of the generator
+    :param strings: any other input that affects the output
+    :return string:
+    """
+    h = hashlib.sha256()
+    for file in files:
+        with open(file, 'rb') as f:
+            content = f.read()
+        # include the length so that the boundaries between files are part of the key
+        h.update(f'{len(content)}:'.encode())
+        h.update(content)
+    for string in strings:
+        h.update(f'{len(string)}:{string}'.encode())
+    return h.hexdigest()
+
+
+def get_source_files(*paths):
+    """
+    Get the Python source files of the generator: the given files, and the .py files in the given directories.
+    Changing any of these files changes the generator "version" that is part of the cache key.
+    :param paths:
+    :return:
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(f'{path}/{filename}' for filename in os.listdir(path) if filename.endswith('.py'))
+        else:
+            files.append(path)
+    return files
+
+
+class BuildCache:
+    """
+    Content-addressed cache of generated files. Each entry is stored in a file named after its key.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def get(self, key: str):
+        """
+        Get the cached output for key.
+        :param key:
+        :return: the output, or None if there is no entry for key
+        """
+        try:
+            with open(os.path.join(self.cache_dir, key), 'r') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, output: str):
+        """
+        Store the output for key.
+        :param key:
+        :param output:
+        :return:
+        """
+        for _ in self.tee(key, [output]):
+            pass
+
+    def tee(self, key: str, chunks):
+        """
+        Store the output for key while passing it on, chunk by chunk. The entry is only stored once all chunks have
+        been consumed.
+        :param key:
+        :param chunks: iterable of strings
+        :return: generator of the chunks
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write to a temporary file first, so that concurrent builds never read partial entries
+        path = os.path.join(self.cache_dir, key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        os.replace(tmp_path, path)
+
+
+class ParseCache:
+    """
+    Cache of parsed schema files. Each document is pickled to a file named after the hash of the content of the schema
+    file (and the version of graphql-core, which defines the node classes), in the subdirectory ast of the cache
+    directory.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.join(cache_dir, 'ast')
+
+    @staticmethod
+    def get_key(content: str):
+        """
+        Compute the key of the document parsed from content.
+        :param content: the content of a schema file
+        :return string:
+        """
+        return hashlib.sha256(f'{graphql_version}:{content}'.encode()).hexdigest()
+
+    def get(self, key: str):
+        """
+        Get the cached document for key.
+        :param key:
+        :return DocumentNode: the document, or None if there is no (readable) entry for key
+        """
+        try:
+            with open(os.path.join(self.cache_dir, key), 'rb') as f:
+                document = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return document if isinstance(document, DocumentNode) else None
+
+    def put(self, key: str, document: DocumentNode):
+        """
+        Store the document for key.
+        :param key:
+        :param document:
+        :return:
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(document, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
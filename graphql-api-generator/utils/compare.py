@@ -1,104 +1,342 @@
-from graphql import build_schema, GraphQLType, is_non_null_type, is_list_type, is_scalar_type, is_enum_type, \
-    is_input_object_type, is_object_type, is_interface_type, is_introspection_type, GraphQLSchema
+import hashlib
+
+from graphql import GraphQLType, is_non_null_type, is_list_type, is_scalar_type, is_enum_type, \
+    is_input_object_type, is_object_type, is_interface_type, is_introspection_type, is_union_type, \
+    is_wrapping_type, is_required_argument, is_required_input_field, GraphQLSchema, Undefined, ast_from_value, \
+    print_ast
 
 
 def is_equals_schema(schema_a: GraphQLSchema, schema_b: GraphQLSchema):
     """
-    Check to schemas are equivalent.
-
-    TODO:
-     - Compare directive definitions
-     - Check field directives
-
+    Check to schemas are equivalent, i.e., have the same fingerprint (see get_schema_fingerprint).
     :param schema_a:
     :param schema_b:
     :return:
     """
-    # check set of named types
-    types_a = set([n for n, t in schema_a.type_map.items() if not is_introspection_type(t)])
-    types_b = set([n for n, t in schema_b.type_map.items() if not is_introspection_type(t)])
-    if types_a != types_b:
-        return False
-
-    # check all named types
-    types = types_a
-    for type_name in types:
-        if not is_equal_type(schema_a.type_map[type_name], schema_b.type_map[type_name]):
-            return False
-
-    return True
+    return get_schema_fingerprint(schema_a) == get_schema_fingerprint(schema_b)
 
 
 def is_equal_type(type_a: GraphQLType, type_b: GraphQLType):
-    """Check whether two GraphQL types are equivalent."""
-    # Check GraphQL base types
-    if is_non_null_type(type_a) != is_non_null_type(type_b):
-        return False
-    if is_list_type(type_a) != is_list_type(type_b):
-        return False
-    if is_input_object_type(type_a) != is_input_object_type(type_b):
-        return False
-    if is_object_type(type_a) != is_object_type(type_b):
-        return False
-    if is_enum_type(type_a) != is_enum_type(type_b):
-        return False
-    if is_scalar_type(type_a) != is_scalar_type(type_b):
-        return False
-    if is_interface_type(type_a) != is_interface_type(type_b):
-        return False
-
-    # If either type is non-null, the other must also be non-null.
-    if is_non_null_type(type_a) and is_non_null_type(type_b):
+    """Check whether two GraphQL types (or type references, e.g. [Human!]!) are equivalent."""
+    # If either type is non-null or a list, the other must be as well.
+    if is_wrapping_type(type_a) or is_wrapping_type(type_b):
+        if is_non_null_type(type_a) != is_non_null_type(type_b) or is_list_type(type_a) != is_list_type(type_b):
+            return False
         return is_equal_type(type_a.of_type, type_b.of_type)
 
-    # If either type is a list, the other must also be a list.
-    if is_list_type(type_a):
-        return is_equal_type(type_a.of_type, type_b.of_type)
+    return get_type_fingerprint(type_a) == get_type_fingerprint(type_b)
 
-    # Check name
-    if type_a.name != type_b.name:
-        return False
 
-    # If scalar then done
-    if is_scalar_type(type_a):
-        return True
+def get_schema_fingerprint(schema: GraphQLSchema):
+    """
+    Compute a structural hash of a schema: the fingerprints of its (non-introspection) types, the definitions of its
+    directives and its root operation types. Two schemas have the same fingerprint if they define the same types,
+    regardless of the order of the types, fields, arguments, enum values, interfaces and union members. Descriptions
+    are left out.
+    :param schema:
+    :return string: hex digest
+    """
+    h = hashlib.sha256()
+    for type_name, fingerprint in sorted(get_type_fingerprints(schema).items()):
+        h.update(f'{type_name} {fingerprint}\n'.encode())
+    for directive in sorted(schema.directives, key=lambda d: d.name):
+        args = _get_args(directive.args)
+        locations = ' | '.join(sorted(location.name for location in directive.locations))
+        h.update(f'directive @{directive.name}{args}{" repeatable" if directive.is_repeatable else ""} on '
+                 f'{locations}\n'.encode())
+    for operation, _type in (('query', schema.query_type), ('mutation', schema.mutation_type),
+                             ('subscription', schema.subscription_type)):
+        if _type is not None:
+            h.update(f'{operation}: {_type.name}\n'.encode())
+    return h.hexdigest()
 
-    # If enum then check values
-    if is_enum_type(type_a):
-        # TODO compare values
-        return
 
-    # if not interface, check interfaces
-    if not is_input_object_type(type_a) and not is_interface_type(type_a):
-        interfaces_a = set([i.name for i in type_a.interfaces])
-        interfaces_b = set([i.name for i in type_b.interfaces])
-        if interfaces_a != interfaces_b:
-            return False
+def get_type_fingerprints(schema: GraphQLSchema):
+    """
+    Compute the fingerprints of all (non-introspection) types of a schema (see get_type_fingerprint).
+    :param schema:
+    :return dict: type name, fingerprint
+    """
+    return {type_name: get_type_fingerprint(_type) for type_name, _type in schema.type_map.items()
+            if not is_introspection_type(_type)}
 
-    # Check fields
-    # 1) Field names
-    field_names_a = set([i for i in type_a.fields])
-    field_names_b = set([i for i in type_b.fields])
-    if field_names_a != field_names_b:
-        return False
-    # 2) Field types
-    field_names = field_names_a
-    for field_name in field_names:
-        if not is_equal_type(type_a.fields[field_name].type, type_b.fields[field_name].type):
-            return False
-    # 3) Field argument names and types
-    for field_name in field_names:
-        arg_names_a = set([i for i in type_a.fields[field_name].args])
-        arg_names_b = set([i for i in type_b.fields[field_name].args])
-        if arg_names_a != arg_names_b:
-            return False
-        arg_names = arg_names_a
-        for arg_name in arg_names:
-            arg_type_a = type_a.fields[field_name].args[arg_name].type
-            arg_type_b = type_b.fields[field_name].args[arg_name].type
-            if not is_equal_type(arg_type_a, arg_type_b):
-                return False
 
-    # TODO: check field directives
+def get_type_fingerprint(_type: GraphQLType):
+    """
+    Compute a structural hash of a named type: its kind, name, interfaces, union members, enum values, fields, field
+    arguments, default values and the directives applied to all of these. Other types are referred to by name, so the
+    hash of a type does not depend on the types it refers to, and is computed without recursion. Descriptions are left
+    out.
+    :param _type:
+    :return string: hex digest
+    """
+    lines = [f'{_get_kind(_type)} {_type.name}{_get_directives(_type)}']
+    if is_object_type(_type) or is_interface_type(_type):
+        lines += [f'implements {name}' for name in sorted(i.name for i in _type.interfaces)]
+    if is_union_type(_type):
+        lines += [f'member {name}' for name in sorted(t.name for t in _type.types)]
+    if is_enum_type(_type):
+        lines += [f'value {name}{_get_directives(value)}' for name, value in sorted(_type.values.items())]
+    if is_input_object_type(_type):
+        lines += [f'field {name}: {field.type}{_get_default_value(field)}{_get_directives(field)}'
+                  for name, field in sorted(_type.fields.items())]
+    elif hasattr(_type, 'fields'):
+        lines += [f'field {name}{_get_args(field.args)}: {field.type}{_get_directives(field)}'
+                  for name, field in sorted(_type.fields.items())]
+    return hashlib.sha256('\n'.join(lines).encode()).hexdigest()
+
+
+def _get_kind(_type: GraphQLType):
+    for kind, is_kind in (('scalar', is_scalar_type), ('type', is_object_type), ('interface', is_interface_type),
+                          ('union', is_union_type), ('enum', is_enum_type), ('input', is_input_object_type)):
+        if is_kind(_type):
+            return kind
+    raise TypeError(f'Not a named type: {_type}')
+
+
+def _get_args(args: dict):
+    if not args:
+        return ''
+    return '(' + ', '.join(f'{name}: {arg.type}{_get_default_value(arg)}{_get_directives(arg)}'
+                           for name, arg in sorted(args.items())) + ')'
+
+
+def _get_default_value(arg):
+    # arguments and input fields, default values are printed as in SDL
+    if arg.default_value is Undefined:
+        return ''
+    value = ast_from_value(arg.default_value, arg.type)
+    return f' = {print_ast(value) if value is not None else repr(arg.default_value)}'
+
+
+def _get_directives(element):
+    # the directives applied to a type (including its extensions), field, argument or enum value, in order
+    nodes = [element.ast_node] + list(getattr(element, 'extension_ast_nodes', None) or [])
+    directives = [directive for node in nodes if node is not None for directive in node.directives or []]
+    return ''.join(f' {print_ast(directive)}' for directive in directives)
+
+
+class Change:
+    """
+    A difference between two schemas: a type, field, argument, enum value, interface, union member, applied directives
+    or directive definition that was added, removed or changed.
+    """
+
+    def __init__(self, change: str, element: str, path: str, type_name: str = None, breaking: bool = False,
+                 detail: str = None):
+        """
+        :param change: 'added', 'removed' or 'changed'
+        :param element: kind of the changed element, e.g. 'type', 'field' or 'argument'
+        :param path: the changed element, e.g. 'Human.friends(first)' or '@key'
+        :param type_name: name of the type that the changed element belongs to (None for directive definitions and
+        root types)
+        :param breaking: True if the change may break clients (or data) of the old schema
+        :param detail: e.g. the old and new type of a changed field
+        """
+        self.change = change
+        self.element = element
+        self.path = path
+        self.type_name = type_name
+        self.breaking = breaking
+        self.detail = detail
+
+    def to_dict(self):
+        return {'change': self.change, 'element': self.element, 'path': self.path, 'type': self.type_name,
+                'breaking': self.breaking, 'detail': self.detail}
+
+    def __str__(self):
+        detail = f'  {self.detail}' if self.detail else ''
+        return f'{"BREAKING" if self.breaking else "":<9} {self.change:<8} {self.element:<12} {self.path}{detail}'
+
+    def __repr__(self):
+        return f'Change({self.change!r}, {self.element!r}, {self.path!r}, breaking={self.breaking!r})'
+
+
+def diff_schemas(old_schema: GraphQLSchema, new_schema: GraphQLSchema):
+    """
+    List the differences between two schemas. Types with the same fingerprint (see get_type_fingerprint) are skipped,
+    and the fields, arguments and enum values of the other types are matched by name, so the time is linear in the
+    size of the schemas. Descriptions are not compared.
+    :param old_schema:
+    :param new_schema:
+    :return: list of Change, ordered by type (directive definitions and root types last)
+    """
+    changes = []
+    old_fingerprints = get_type_fingerprints(old_schema)
+    new_fingerprints = get_type_fingerprints(new_schema)
+    for type_name in sorted(old_fingerprints.keys() | new_fingerprints.keys()):
+        if type_name not in new_fingerprints:
+            changes.append(Change('removed', 'type', type_name, type_name, breaking=True))
+        elif type_name not in old_fingerprints:
+            changes.append(Change('added', 'type', type_name, type_name))
+        elif old_fingerprints[type_name] != new_fingerprints[type_name]:
+            changes += _diff_type(old_schema.type_map[type_name], new_schema.type_map[type_name])
+
+    # directive definitions
+    old_directives = {directive.name: directive for directive in old_schema.directives}
+    new_directives = {directive.name: directive for directive in new_schema.directives}
+    for name in sorted(old_directives.keys() | new_directives.keys()):
+        if name not in new_directives:
+            changes.append(Change('removed', 'directive', f'@{name}', breaking=True))
+        elif name not in old_directives:
+            changes.append(Change('added', 'directive', f'@{name}'))
+        else:
+            old, new = old_directives[name], new_directives[name]
+            removed_locations = sorted(location.name for location in set(old.locations) - set(new.locations))
+            added_locations = sorted(location.name for location in set(new.locations) - set(old.locations))
+            if removed_locations or added_locations:
+                changes.append(Change('changed', 'locations', f'@{name}', breaking=bool(removed_locations),
+                                      detail=_format_added_removed(added_locations, removed_locations)))
+            if old.is_repeatable != new.is_repeatable:
+                changes.append(Change('changed', 'repeatable', f'@{name}', breaking=old.is_repeatable,
+                                      detail=f'{old.is_repeatable} -> {new.is_repeatable}'))
+            changes += _diff_args(old.args, new.args, f'@{name}', None)
+
+    # root types
+    for operation in ('query', 'mutation', 'subscription'):
+        old_type = getattr(old_schema, f'{operation}_type')
+        new_type = getattr(new_schema, f'{operation}_type')
+        old_name = old_type.name if old_type is not None else None
+        new_name = new_type.name if new_type is not None else None
+        if old_name != new_name:
+            changes.append(Change('changed', 'root type', operation, breaking=old_name is not None,
+                                  detail=f'{old_name} -> {new_name}'))
+    return changes
+
+
+def format_changes(changes):
+    """
+    Format a list of changes as a report, one change per line, followed by a summary line.
+    :param changes: list of Change
+    :return string:
+    """
+    lines = [str(change) for change in changes]
+    num_breaking = sum(change.breaking for change in changes)
+    lines.append(f'{len(changes)} changes, {num_breaking} breaking')
+    return '\n'.join(lines)
+
+
+def _diff_type(old_type: GraphQLType, new_type: GraphQLType):
+    # the differences between two named types with the same name
+    type_name = old_type.name
+    if _get_kind(old_type) != _get_kind(new_type):
+        return [Change('changed', 'type', type_name, type_name, breaking=True,
+                       detail=f'{_get_kind(old_type)} -> {_get_kind(new_type)}')]
+
+    changes = _diff_directives(old_type, new_type, type_name, type_name)
+    if is_object_type(old_type) or is_interface_type(old_type):
+        changes += _diff_names([i.name for i in old_type.interfaces], [i.name for i in new_type.interfaces],
+                               'interface', type_name)
+    if is_union_type(old_type):
+        changes += _diff_names([t.name for t in old_type.types], [t.name for t in new_type.types], 'member',
+                               type_name)
+    if is_enum_type(old_type):
+        for name in sorted(old_type.values.keys() | new_type.values.keys()):
+            path = f'{type_name}.{name}'
+            if name not in new_type.values:
+                changes.append(Change('removed', 'enum value', path, type_name, breaking=True))
+            elif name not in old_type.values:
+                changes.append(Change('added', 'enum value', path, type_name))
+            else:
+                changes += _diff_directives(old_type.values[name], new_type.values[name], path, type_name)
+    if is_input_object_type(old_type):
+        for name in sorted(old_type.fields.keys() | new_type.fields.keys()):
+            path = f'{type_name}.{name}'
+            if name not in new_type.fields:
+                changes.append(Change('removed', 'input field', path, type_name, breaking=True))
+            elif name not in old_type.fields:
+                changes.append(Change('added', 'input field', path, type_name,
+                                      breaking=is_required_input_field(new_type.fields[name])))
+            else:
+                changes += _diff_input_value(old_type.fields[name], new_type.fields[name], 'input field', path,
+                                             type_name)
+    elif hasattr(old_type, 'fields'):
+        for name in sorted(old_type.fields.keys() | new_type.fields.keys()):
+            path = f'{type_name}.{name}'
+            if name not in new_type.fields:
+                changes.append(Change('removed', 'field', path, type_name, breaking=True))
+            elif name not in old_type.fields:
+                changes.append(Change('added', 'field', path, type_name))
+            else:
+                old_field, new_field = old_type.fields[name], new_type.fields[name]
+                if str(old_field.type) != str(new_field.type):
+                    safe = _is_safe_output_type_change(old_field.type, new_field.type)
+                    changes.append(Change('changed', 'field', path, type_name, breaking=not safe,
+                                          detail=f'{old_field.type} -> {new_field.type}'))
+                changes += _diff_args(old_field.args, new_field.args, path, type_name)
+                changes += _diff_directives(old_field, new_field, path, type_name)
+    return changes
+
+
+def _diff_args(old_args: dict, new_args: dict, path: str, type_name: str = None):
+    # the differences between the arguments of a field or directive
+    changes = []
+    for name in sorted(old_args.keys() | new_args.keys()):
+        arg_path = f'{path}({name})'
+        if name not in new_args:
+            changes.append(Change('removed', 'argument', arg_path, type_name, breaking=True))
+        elif name not in old_args:
+            changes.append(Change('added', 'argument', arg_path, type_name,
+                                  breaking=is_required_argument(new_args[name])))
+        else:
+            changes += _diff_input_value(old_args[name], new_args[name], 'argument', arg_path, type_name)
+    return changes
+
+
+def _diff_input_value(old, new, element: str, path: str, type_name: str = None):
+    # the differences between two arguments or input fields with the same name
+    changes = []
+    if str(old.type) != str(new.type):
+        safe = _is_safe_input_type_change(old.type, new.type)
+        changes.append(Change('changed', element, path, type_name, breaking=not safe,
+                              detail=f'{old.type} -> {new.type}'))
+    if _get_default_value(old) != _get_default_value(new):
+        changes.append(Change('changed', 'default', path, type_name,
+                              detail=f'{_get_default_value(old)[3:] or None} -> {_get_default_value(new)[3:] or None}'))
+    return changes + _diff_directives(old, new, path, type_name)
+
+
+def _is_safe_output_type_change(old_type: GraphQLType, new_type: GraphQLType):
+    # the type of a field may only become stricter (e.g. String -> String!), clients still get what they expect
+    if is_list_type(old_type):
+        return (is_list_type(new_type) and _is_safe_output_type_change(old_type.of_type, new_type.of_type)) or \
+            (is_non_null_type(new_type) and _is_safe_output_type_change(old_type, new_type.of_type))
+    if is_non_null_type(old_type):
+        return is_non_null_type(new_type) and _is_safe_output_type_change(old_type.of_type, new_type.of_type)
+    return (not is_wrapping_type(new_type) and old_type.name == new_type.name) or \
+        (is_non_null_type(new_type) and _is_safe_output_type_change(old_type, new_type.of_type))
+
+
+def _is_safe_input_type_change(old_type: GraphQLType, new_type: GraphQLType):
+    # the type of an argument or input field may only become looser (e.g. String! -> String), the values that clients
+    # send are still valid
+    if is_list_type(old_type):
+        return is_list_type(new_type) and _is_safe_input_type_change(old_type.of_type, new_type.of_type)
+    if is_non_null_type(old_type):
+        return (is_non_null_type(new_type) and _is_safe_input_type_change(old_type.of_type, new_type.of_type)) or \
+            (not is_non_null_type(new_type) and _is_safe_input_type_change(old_type.of_type, new_type))
+    return not is_wrapping_type(new_type) and old_type.name == new_type.name
+
+
+def _diff_names(old_names, new_names, element: str, type_name: str):
+    # the differences between the interfaces of a type or the members of a union
+    changes = []
+    for name in sorted(set(old_names) | set(new_names)):
+        if name not in new_names:
+            changes.append(Change('removed', element, f'{type_name} {name}', type_name, breaking=True))
+        elif name not in old_names:
+            changes.append(Change('added', element, f'{type_name} {name}', type_name))
+    return changes
+
+
+def _diff_directives(old, new, path: str, type_name: str):
+    # applied directives are annotations (e.g. @key, @required), changing them is not considered breaking
+    old_directives, new_directives = _get_directives(old).strip(), _get_directives(new).strip()
+    if old_directives == new_directives:
+        return []
+    return [Change('changed', 'directives', path, type_name,
+                   detail=f'{old_directives or None} -> {new_directives or None}')]
+
 
-    return True
\ No newline at end of file
+def _format_added_removed(added, removed):
+    return ', '.join([f'+{name}' for name in added] + [f'-{name}' for name in removed])
@@ -0,0 +1,80 @@
+from graphql import *
+
+from utils.utils import is_enum_or_scalar
+
+
+def get_cost_manifest(schema: GraphQLSchema, config: dict):
+    """
+    Get the cost of the fields of an API schema that the server resolves from the database, which the server uses to
+    score each operation before running it. For each field, the manifest has
+     - type: the name of its (named) type, to follow the selections below the field
+     - kind: query, list query, mutation, field (of a DB type), reverse edge, edge field (_incoming or _outgoing),
+       edge endpoint (source or target of an edge type), list content or list count (totalCount or isEndOfWholeList)
+     - cost: the number of collections read to resolve it once, e.g. the implementations of an interface (each read in
+       a UNION), or 0 if it is resolved from its parent
+     - size: the number of objects it returns, for lists as assumed by the configuration
+     - first: the default of the first argument (list queries), which sets the size
+    The costs section of the configuration sets the assumed size of lists (list_size, default 10), and the cost of
+    reverse edges and edge fields (reverse_edge and edge_field, default 1) per collection.
+    :param schema: the API schema
+    :param config:
+    :return: dict with the fields by type and the list size
+    """
+    options = config.get('costs') or {}
+    list_size = options.get('list_size', 10)
+    weights = {'reverse edge': options.get('reverse_edge', 1), 'edge field': options.get('edge_field', 1)}
+
+    def width(_type):
+        # the number of collections holding objects of the type
+        if is_abstract_type(_type):
+            return max(len(schema.get_possible_types(_type)), 1)
+        return 1
+
+    types = {}
+    for type_name, _type in schema.type_map.items():
+        if type_name.startswith('__') or not (is_object_type(_type) or is_interface_type(_type)):
+            continue
+
+        fields = {}
+        for field_name, _field in _type.fields.items():
+            named_type = get_named_type(_field.type)
+            is_list = is_list_type(get_nullable_type(_field.type))
+            entry = {'type': named_type.name, 'size': list_size if is_list else 1}
+
+            if type_name == 'Query':
+                entry['cost'] = width(named_type)
+                entry['kind'] = 'query'
+                if 'first' in _field.args and is_object_type(named_type) and 'content' in named_type.fields:
+                    content_type = get_named_type(named_type.fields['content'].type)
+                    entry['cost'] = width(content_type)
+                    entry['kind'] = 'list query'
+                    entry['first'] = _field.args['first'].default_value
+            elif type_name == 'Mutation':
+                entry['cost'] = 1
+                entry['kind'] = 'mutation'
+            elif type_name.startswith('_ListOf'):
+                content_type = get_named_type(_type.fields['content'].type) if 'content' in _type.fields else None
+                if field_name == 'content':
+                    # the objects fetched by the list query, which sets the size
+                    entry.update({'cost': 0, 'size': 1, 'kind': 'list content'})
+                elif content_type is not None:
+                    entry.update({'cost': width(content_type), 'kind': 'list count'})
+                else:
+                    continue
+            elif is_enum_or_scalar(named_type):
+                continue
+            elif field_name.startswith('_incoming') or field_name.startswith('_outgoing'):
+                entry.update({'cost': weights['edge field'], 'kind': 'edge field'})
+            elif field_name.startswith('_'):
+                entry.update({'cost': weights['reverse edge'] * width(named_type), 'kind': 'reverse edge'})
+            elif type_name.startswith('_') and 'EdgeFrom' in type_name:
+                entry.update({'cost': width(named_type), 'kind': 'edge endpoint'})
+            else:
+                entry.update({'cost': width(named_type), 'kind': 'field'})
+            fields[field_name] = entry
+
+        if fields:
+            types[type_name] = fields
+
+    return {'list_size': list_size, 'types': types}
+
@@ -0,0 +1,159 @@
+import multiprocessing
+from contextlib import nullcontext
+
+from graphql import DocumentNode, GraphQLSchema, extend_schema
+
+from utils.schema_index import get_schema_index, extend_schema_index
+from utils.memory import compact_schema
+from utils.profiler import count_definitions, count_types_and_fields
+
+# the schema and the pending steps of the extender that is making definitions in parallel, inherited by the (forked)
+# worker processes, so that neither the schema nor the steps (which may be lambdas) have to be pickled
+_parallel_state = None
+
+
+def _make_pending(i: int):
+    schema, makes = _parallel_state
+    return makes[i](schema)
+
+
+class SchemaExtender:
+    """
+    Collects the definitions made by the generation steps and applies them to the schema in as few extend_schema
+    calls as the dependencies between the steps allow.
+
+    Each step declares the (earlier) steps whose output it reads. As long as a step does not read the output of a
+    pending step, its definitions are made from the current schema and queued. Otherwise all pending definitions are
+    applied first. Since the queued definitions are applied in order in a single document, fields and types are added
+    in the same order as when every step extends the schema on its own.
+
+    If a profiler is given, each step is profiled, and so is each extend_schema call applying the pending definitions.
+
+    With more than one worker, the pending steps only read the schema they are applied to, so their definitions are
+    made in parallel, by a pool of forked processes, when they are applied. The definitions are merged in the order of
+    the steps, so the result is the same as with one worker. Parallel execution requires the fork start method, on
+    other platforms the steps are run one by one.
+
+    In low-memory mode, the schema is compacted (see utils.memory.compact_schema) after each step that modifies it
+    and after each extend_schema call, so the AST nodes accumulated by extend_schema, and the schemas it replaced, do
+    not add up.
+    """
+
+    def __init__(self, schema: GraphQLSchema, profiler=None, workers: int = 1, low_memory: bool = False):
+        self.schema = schema
+        self.low_memory = low_memory
+        self.pending = []
+        self.pending_steps = set()
+        self.extend_calls = 0
+        self.profiler = profiler
+        self.workers = workers if 'fork' in multiprocessing.get_all_start_methods() else 1
+
+    def _profile(self, step: str):
+        if self.profiler is None:
+            return nullcontext({})
+        return self.profiler.profile(step)
+
+    def extend(self, step: str, make, after=()):
+        """
+        Queue the definitions returned by make(schema).
+        :param step: name of the step
+        :param make: function returning the list of definitions (see utils.ast_builder) of the step
+        :param after: names of steps whose output is read by make
+        :return:
+        """
+        if self.pending_steps.intersection(after):
+            self.flush()
+        if self.workers > 1:
+            # the definitions are made when the pending steps are applied (see flush)
+            self.pending.append((step, make))
+            self.pending_steps.add(step)
+            return
+        with self._profile(step) as record:
+            make_step = make(self.schema)
+            if self.profiler is not None:
+                record['types_added'], record['fields_added'] = count_definitions(DocumentNode(definitions=make_step))
+        self.pending.append((step, make_step))
+        self.pending_steps.add(step)
+
+    def update(self, step: str, f, after=None):
+        """
+        Run a step that modifies the schema directly, either in place or by returning a new schema.
+        :param step: name of the step
+        :param f: function taking and returning the schema
+        :param after: names of steps whose output is read by f (None if f depends on all pending steps)
+        :return:
+        """
+        if after is None or self.pending_steps.intersection(after):
+            self.flush()
+        with self._profile(step) as record:
+            if self.profiler is not None:
+                num_types, num_fields = count_types_and_fields(self.schema)
+            self.schema = f(self.schema)
+            if self.low_memory:
+                compact_schema(self.schema)
+            # the step may have modified the schema in place, so its index is rebuilt
+            get_schema_index(self.schema).refresh(self.schema)
+            if self.profiler is not None:
+                num_types_after, num_fields_after = count_types_and_fields(self.schema)
+                record['types_added'] = num_types_after - num_types
+                record['fields_added'] = num_fields_after - num_fields
+
+    def flush(self):
+        """
+        Apply all pending definitions to the schema.
+        :return: the extended schema
+        """
+        if self.workers > 1:
+            self._make_parallel()
+        steps = [step for step, make in self.pending if make]
+        fragments = [make for _, make in self.pending if make]
+        self.pending = []
+        self.pending_steps = set()
+        if not fragments:
+            return self.schema
+
+        extend_calls = self.extend_calls
+        with self._profile(f'extend_schema ({", ".join(steps)})') as record:
+            try:
+                document = DocumentNode(definitions=[definition for make in fragments for definition in make])
+                extended_schema = extend_schema(self.schema, document)
+                extend_schema_index(self.schema, extended_schema, document)
+                self.schema = extended_schema
+                self.extend_calls += 1
+            except TypeError as e:
+                # find the step whose definitions are not valid for the schema (with those of the earlier steps)
+                schema = self.schema
+                for step, make in zip(steps, fragments):
+                    try:
+                        schema = extend_schema(schema, DocumentNode(definitions=make))
+                    except TypeError as step_error:
+                        raise Exception(f"Invalid definitions made by the step '{step}': {step_error}") from e
+                raise
+            if self.low_memory:
+                compact_schema(self.schema)
+            record['extend_schema_calls'] = self.extend_calls - extend_calls
+        return self.schema
+
+    def _make_parallel(self):
+        # replace the pending steps by their definitions, made by a pool of worker processes
+        global _parallel_state
+        if not self.pending:
+            return
+        steps = [step for step, _ in self.pending]
+        makes = [make for _, make in self.pending]
+        with self._profile(f'make ({", ".join(steps)})') as record:
+            # index the schema before forking, so that the workers share the index
+            get_schema_index(self.schema)
+            if len(makes) == 1:
+                results = [makes[0](self.schema)]
+            else:
+                _parallel_state = (self.schema, makes)
+                try:
+                    with multiprocessing.get_context('fork').Pool(min(self.workers, len(makes))) as pool:
+                        results = pool.map(_make_pending, range(len(makes)), chunksize=1)
+                finally:
+                    _parallel_state = None
+            if self.profiler is not None:
+                definitions = [definition for make in results for definition in make]
+                record['types_added'], record['fields_added'] = count_definitions(DocumentNode(definitions=definitions))
+        self.pending = list(zip(steps, results))
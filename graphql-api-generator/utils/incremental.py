@@ -0,0 +1,295 @@
+from graphql import *
+
+from utils.utils import decapitalize, is_db_schema_defined_type
+
+# prefixes of the names of the types generated for a (single) source type, longest first
+generated_type_prefixes = ['_InputToConnect', '_InputToAnnotate', '_InputToCreate', '_InputToUpdate', '_FilterFor',
+                           '_KeyFor', '_ListOf', '_']
+
+
+def get_db_type_names(schema: GraphQLSchema):
+    """
+    Get the names of the object, interface and union types defined in the DB schema.
+    :param schema:
+    :return:
+    """
+    return {name for name, _type in schema.type_map.items() if is_db_schema_defined_type(_type)}
+
+
+def _get_suffix_source(name: str, separator: str, sources: set):
+    # the longest suffix of name, following separator, that is a source type
+    i = name.find(separator)
+    while i != -1:
+        if name[i + len(separator):] in sources:
+            return name[i + len(separator):]
+        i = name.find(separator, i + 1)
+    return None
+
+
+class Provenance:
+    """
+    Finds the source type that a type or field in the API schema was generated for, based on the naming conventions of
+    the generator. For example, _InputToCreateX, _FilterForX, _ListOfXs, _InputToConnectFOfX, _FEdgeFromX, the queries
+    x, listOfXs and xByKey, and the mutations createX and updateX are generated for X.
+    """
+
+    def __init__(self, sources: set):
+        """
+        :param sources: names of the types in the DB schema
+        """
+        self.sources = sources
+        self.root_fields = {}
+        for source in sources:
+            for field_name in (decapitalize(source), f'listOf{source}s', f'{decapitalize(source)}ByKey',
+                               f'create{source}', f'update{source}', f'delete{source}'):
+                self.root_fields[field_name] = source
+
+    def get_type_source(self, type_name: str):
+        """
+        Get the source type of a type.
+        :param type_name:
+        :return: name of the source type, or None if the type does not belong to a single source type (e.g. Query)
+        """
+        if type_name in self.sources:
+            return type_name
+        for prefix in generated_type_prefixes:
+            if type_name.startswith(prefix):
+                rest = type_name[len(prefix):]
+                if prefix == '_ListOf':
+                    rest = rest[:-1]
+                if rest in self.sources:
+                    return rest
+                return _get_suffix_source(rest, 'EdgeFrom', self.sources) or _get_suffix_source(rest, 'Of', self.sources)
+        return None
+
+    def get_field_source(self, type_name: str, field_name: str):
+        """
+        Get the source type of a field. Fields of Query and Mutation, and generated fields of DB types (reverse edges,
+        _outgoing and _incoming edges) belong to the type they were generated for, other fields belong to the source
+        type of the type they are defined in.
+        :param type_name:
+        :param field_name:
+        :return: name of the source type, or None if the field does not belong to a single source type
+        """
+        if type_name in ('Query', 'Mutation'):
+            return self.root_fields.get(field_name) or _get_suffix_source(field_name, 'EdgeFrom', self.sources)
+        if type_name in self.sources and field_name.startswith('_'):
+            return _get_suffix_source(field_name, 'From', self.sources) or type_name
+        return self.get_type_source(type_name)
+
+    def get_sources(self, schema: GraphQLSchema):
+        """
+        Get the source types of all generated types and fields of an API schema.
+        :param schema:
+        :return: dict of type name or type name.field name, source type name
+        """
+        sources = {}
+        for type_name, _type in schema.type_map.items():
+            if type_name.startswith('__'):
+                continue
+            sources[type_name] = self.get_type_source(type_name)
+            for field_name in getattr(_type, 'fields', {}):
+                sources[f'{type_name}.{field_name}'] = self.get_field_source(type_name, field_name)
+        return sources
+
+
+def _get_type_signature(_type: GraphQLNamedType):
+    # everything about a type in the DB schema that may affect the generated API schema
+    def directives(node):
+        return [print_ast(directive) for directive in node.directives] if node and node.directives else []
+
+    signature = [type(_type).__name__, directives(_type.ast_node)]
+    if is_union_type(_type):
+        signature.append([t.name for t in _type.types])
+    elif is_enum_type(_type):
+        signature.append(list(_type.values))
+    elif not is_scalar_type(_type):
+        signature.append([i.name for i in getattr(_type, 'interfaces', [])])
+        for field_name, field in _type.fields.items():
+            args = [(arg_name, str(arg.type), repr(arg.default_value)) for arg_name, arg in getattr(field, 'args', {}).items()]
+            signature.append((field_name, str(field.type), args, directives(field.ast_node)))
+    return signature
+
+
+def get_changed_types(previous_schema: GraphQLSchema, schema: GraphQLSchema):
+    """
+    Get the names of the DB types that were added, removed or modified.
+    :param previous_schema:
+    :param schema:
+    :return: the names, or None if something else than the DB types changed (e.g. enums, scalars or directives)
+    """
+    previous_sources = get_db_type_names(previous_schema)
+    sources = get_db_type_names(schema)
+
+    # any change outside of the DB types requires a full regeneration
+    others = [name for name in schema.type_map if name not in sources and not name.startswith('__')]
+    previous_others = [name for name in previous_schema.type_map if name not in previous_sources and not name.startswith('__')]
+    if sorted(others) != sorted(previous_others):
+        return None
+    for name in others:
+        if _get_type_signature(schema.type_map[name]) != _get_type_signature(previous_schema.type_map[name]):
+            return None
+    directives = sorted(str(d.ast_node and print_ast(d.ast_node)) for d in schema.directives)
+    if directives != sorted(str(d.ast_node and print_ast(d.ast_node)) for d in previous_schema.directives):
+        return None
+
+    changed = previous_sources.symmetric_difference(sources)
+    for name in previous_sources.intersection(sources):
+        if _get_type_signature(schema.type_map[name]) != _get_type_signature(previous_schema.type_map[name]):
+            changed.add(name)
+    return changed
+
+
+def get_affected_types(schema: GraphQLSchema, changed: set):
+    """
+    Get the DB types whose generated types and fields may be affected by changing the given types: the changed types,
+    the types with a field of a changed type (or of an interface or union with a changed possible type), the types
+    implementing a changed interface, and the interfaces and unions that a changed type belongs to.
+    :param schema:
+    :param changed:
+    :return:
+    """
+    affected = set(changed)
+    for _type in schema.type_map.values():
+        if not is_db_schema_defined_type(_type):
+            continue
+        if is_union_type(_type):
+            if any(t.name in changed for t in _type.types):
+                affected.add(_type.name)
+            continue
+        interfaces = [i.name for i in getattr(_type, 'interfaces', [])]
+        if _type.name in changed:
+            affected.update(interfaces)
+        if any(name in changed for name in interfaces):
+            affected.add(_type.name)
+        for field in _type.fields.values():
+            field_type = get_named_type(field.type)
+            if field_type.name in changed:
+                affected.add(_type.name)
+            elif (is_interface_type(field_type) or is_union_type(field_type)) and \
+                    any(t.name in changed for t in schema.get_possible_types(field_type)):
+                affected.add(_type.name)
+    return affected
+
+
+def make_sub_schema(document: DocumentNode, schema: GraphQLSchema, affected: set):
+    """
+    Make the DB schema that the affected types can be generated from: all definitions of the affected types and their
+    interfaces, and placeholders (types without fields) for the other types they refer to. All other definitions
+    (scalars, enums, directives) are kept as they are.
+    :param document: the (untransformed) DB schema
+    :param schema: the DB schema (after transforming names)
+    :param affected: names of the affected types (after transforming names)
+    :return string:
+    """
+    original_names = {_type.name: _type.ast_node.name.value for _type in schema.type_map.values()
+                      if _type.ast_node is not None}
+    names = {original_name: name for name, original_name in original_names.items()}
+
+    # types included in full: the affected types and their interfaces
+    full = {name for name in affected if name in schema.type_map}
+    queue = list(full)
+    while queue:
+        for interface in getattr(schema.type_map[queue.pop()], 'interfaces', []):
+            if interface.name not in full:
+                full.add(interface.name)
+                queue.append(interface.name)
+
+    # placeholders for the types referred to by fields, and the possible types of all included interfaces and unions
+    placeholders = set()
+    for name in full:
+        for field in schema.type_map[name].fields.values() if not is_union_type(schema.type_map[name]) else []:
+            field_type = get_named_type(field.type)
+            if is_db_schema_defined_type(field_type) and field_type.name not in full:
+                placeholders.add(field_type.name)
+    for name in list(full) + list(placeholders):
+        _type = schema.type_map[name]
+        if is_interface_type(_type) or is_union_type(_type):
+            placeholders.update(t.name for t in schema.get_possible_types(_type) if t.name not in full)
+    included = full.union(placeholders)
+
+    definitions = []
+    for definition in document.definitions:
+        if isinstance(definition, (ObjectTypeDefinitionNode, InterfaceTypeDefinitionNode, UnionTypeDefinitionNode,
+                                   ObjectTypeExtensionNode, InterfaceTypeExtensionNode, UnionTypeExtensionNode)):
+            if names[definition.name.value] not in full:
+                continue
+        definitions.append(definition)
+    make = print_ast(DocumentNode(definitions=definitions))
+
+    for name in sorted(placeholders):
+        _type = schema.type_map[name]
+        if is_union_type(_type):
+            make += f'\nunion {original_names[name]} = ' + ' | '.join(original_names[t.name] for t in _type.types)
+        elif is_interface_type(_type):
+            make += f'\ninterface {original_names[name]}'
+        else:
+            make += f'\ntype {original_names[name]}'
+            interfaces = [original_names[i.name] for i in _type.interfaces if i.name in included]
+            if interfaces:
+                make += ' implements ' + ' & '.join(interfaces)
+    return make
+
+
+def _parse_output(output: str):
+    # split the printed API schema into the directive definitions and a block (header and field lines) per type
+    header = ''
+    blocks = {}
+    for block in output.split('\n\n'):
+        if block.strip() == '':
+            continue
+        if block.startswith('directive '):
+            header += block + '\n\n'
+            continue
+        lines = block.split('\n')
+        name = lines[0].split(' ')[1]
+        if lines[0].endswith('{'):
+            blocks[name] = (lines[0], lines[1:-1], lines[-1])
+        else:
+            blocks[name] = (lines[0], [], None)
+    return header, blocks
+
+
+def _get_field_name(line: str):
+    return line.strip().split(':')[0].split('(')[0]
+
+
+def splice_output(previous_output: str, output: str, affected: set, provenance: Provenance):
+    """
+    Replace the types and fields generated for the affected source types in the previous API schema with the ones
+    in output, which was generated from (at least) the affected types.
+    :param previous_output: the previous API schema, as printed by print_schema_with_directives
+    :param output: the API schema generated for the affected types, as printed by print_schema_with_directives
+    :param affected: names of the affected types (including removed types)
+    :param provenance: provenance based on the types in the previous and the current DB schema
+    :return string:
+    """
+    header, previous_blocks = _parse_output(previous_output)
+    _, blocks = _parse_output(output)
+
+    def is_affected(type_name, line):
+        return provenance.get_field_source(type_name, _get_field_name(line)) in affected
+
+    spliced = ''
+    for name in sorted(set(previous_blocks).union(blocks)):
+        source = provenance.get_type_source(name)
+        if source in affected:
+            # the type itself was generated for an affected type, keep the fields that belong to other types
+            if name not in blocks:
+                continue
+            head, lines, tail = blocks[name]
+            lines = [line for line in lines if is_affected(name, line)]
+            if name in previous_blocks:
+                lines += [line for line in previous_blocks[name][1] if not is_affected(name, line)]
+        elif name in previous_blocks:
+            head, lines, tail = previous_blocks[name]
+            lines = [line for line in lines if tail is None or not is_affected(name, line)]
+            if name in blocks and tail is not None:
+                lines += [line for line in blocks[name][1] if is_affected(name, line)]
+        else:
+            continue
+        spliced += head
+        if tail is not None:
+            spliced += '\n' + ''.join(line + '\n' for line in lines) + tail
+        spliced += '\n\n'
+    return header + spliced
@@ -0,0 +1,71 @@
+from graphql import *
+
+from utils.schema_index import get_schema_index
+from utils.utils import _get_keys_for_type, is_enum_or_scalar
+
+
+def get_index_manifest(schema: GraphQLSchema, config: dict):
+    """
+    Get the indexes that the driver should create for an API schema: a persistent index on the key fields of each type
+    with @key (unique, as the keys are, and sparse if a key field is nullable, so that the documents without it do not
+    conflict on null), on each field with @index, and on the fields and meta fields listed in the
+    indexes section of the configuration. Fields of an interface are indexed in the collections of its
+    implementations, and fields of an edge type (e.g. `_FriendsEdgeFromHuman.since`) in its edge collection.
+    :param schema: the API schema
+    :param config:
+    :return: dict with the list of indexes, each with the collection, type, fields, name, unique and sparse
+    """
+    options = config.get('indexes') or {}
+    index = get_schema_index(schema)
+    indexes = {}
+
+    def add(_type, fields, unique=False):
+        types = index.get_possible_types(_type) if is_interface_type(_type) else [_type]
+        for t in types:
+            # edge collections are named after the edge type, without the leading underscore
+            collection = t.name[1:] if t.name.startswith('_') else t.name
+            key = (collection, tuple(fields))
+            is_unique = unique or (key in indexes and indexes[key]['unique'])
+            nullable = any(f in t.fields and not is_non_null_type(t.fields[f].type) for f in fields)
+            indexes[key] = {
+                'collection': collection,
+                'type': 'persistent',
+                'fields': list(fields),
+                'name': 'woosh_' + '_'.join(fields),
+                'unique': is_unique,
+                'sparse': is_unique and nullable
+            }
+
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        # key fields
+        if options.get('keys', True):
+            for fields in _get_keys_for_type(_type, index):
+                add(_type, fields, unique=True)
+
+        # fields hinted by @index
+        for field_name in _type.fields:
+            directives = index.get_field_directives(_type, field_name)
+            if 'index' in directives:
+                unique = any(arg.name.value == 'unique' and value_from_ast_untyped(arg.value)
+                             for arg in directives['index'].arguments)
+                add(_type, [field_name], unique)
+
+        # meta fields
+        for option, field_name in (('creation_date', '_creationDate'), ('last_update_date', '_lastUpdateDate')):
+            if options.get(option) and field_name in _type.fields:
+                add(_type, [field_name])
+
+    # configured fields
+    for entry in options.get('fields') or []:
+        type_name, _, field_name = entry.partition('.')
+        _type = schema.type_map.get(type_name)
+        if _type is None or not hasattr(_type, 'fields') or field_name not in _type.fields:
+            raise Exception(f'Unrecognized index field: {entry}')
+        if field_name == 'id':
+            raise Exception(f'Index field is the document ID, which has the primary index: {entry}')
+        field_type = _type.fields[field_name].type
+        if is_list_type(get_nullable_type(field_type)) or not is_enum_or_scalar(get_named_type(field_type)):
+            raise Exception(f'Index field is not filterable: {entry}')
+        add(_type, [field_name])
+
+    return {'indexes': list(indexes.values())}
@@ -0,0 +1,85 @@
+import gc
+import sys
+
+from graphql import GraphQLSchema, is_enum_type, is_introspection_type
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# the parts of the AST nodes that are read after the schema is built: the name and directives by the generation steps
+# and the printer, the type and default value of fields and arguments by graphql-core
+_kept_keys = ('name', 'directives', 'type', 'default_value', 'value')
+
+
+def compact_schema(schema: GraphQLSchema):
+    """
+    Reduce the memory held by a schema by dropping what is no longer needed:
+     - the thunks of the fields, interfaces and union members of each type, which extend_schema makes from the types of
+       the schema it extends, so that every schema refers to all schemas before it, are replaced by their values
+     - the extension nodes accumulated by each extend_schema call (except for their directives)
+     - the locations, descriptions and fields of the AST node of each type, field, argument and enum value
+    The names and directives in the AST nodes, which the generation steps and the printer read, are kept. Also runs
+    the garbage collector, which frees the (cyclic) types of the schemas that are no longer referred to.
+    :param schema:
+    :return: the schema, compacted in place
+    """
+    schema.ast_node = None
+    schema.extension_ast_nodes = ()
+    for _type in schema.type_map.values():
+        if is_introspection_type(_type):
+            continue
+        for thunk, resolved in (('_fields', 'fields'), ('_interfaces', 'interfaces'), ('_types', 'types')):
+            if hasattr(_type, thunk):
+                setattr(_type, thunk, getattr(_type, resolved))
+        # fields are only added by definitions and extensions, so the fields of a type without new AST nodes have
+        # been compacted before
+        if all(_is_slim(node) for node in (_type.ast_node, *_type.extension_ast_nodes)):
+            continue
+        _type.ast_node = _slim(_type.ast_node)
+        _type.extension_ast_nodes = tuple(_slim(node) for node in _type.extension_ast_nodes if node.directives)
+        if is_enum_type(_type):
+            for value in _type.values.values():
+                value.ast_node = _slim(value.ast_node)
+        elif hasattr(_type, 'fields'):
+            for field in _type.fields.values():
+                field.ast_node = _slim(field.ast_node)
+                for arg in getattr(field, 'args', {}).values():
+                    arg.ast_node = _slim(arg.ast_node)
+    gc.collect()
+    return schema
+
+
+def _is_slim(node):
+    # whether there is nothing to drop from the node, e.g., because it was compacted before
+    return node is None or all(not getattr(node, key, None) for key in node.keys if key not in _kept_keys)
+
+
+def _slim(node):
+    # a copy of the node with only the kept keys, lists of other nodes are left empty
+    if _is_slim(node):
+        return node
+    kwargs = {}
+    for key in node.keys:
+        if key == 'loc':
+            continue
+        value = getattr(node, key, None)
+        if key in _kept_keys:
+            kwargs[key] = value
+        elif isinstance(value, (list, tuple)):
+            kwargs[key] = ()
+    return node.__class__(**kwargs)
+
+
+def get_peak_memory():
+    """
+    Get the peak resident set size of this process.
+    :return: the peak memory in MiB, or None if it is not available on this platform
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
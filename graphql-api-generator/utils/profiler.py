@@ -0,0 +1,92 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from graphql import DocumentNode, GraphQLSchema, TypeDefinitionNode
+
+
+def count_types_and_fields(schema: GraphQLSchema):
+    """
+    Count the named types and the fields of all types in schema.
+    :param schema:
+    :return: tuple of number of types, number of fields
+    """
+    num_fields = sum(len(getattr(_type, 'fields', None) or {}) for _type in schema.type_map.values())
+    return len(schema.type_map), num_fields
+
+
+def count_definitions(document: DocumentNode):
+    """
+    Count the types defined, and the fields defined or added by extensions, in document.
+    :param document:
+    :return: tuple of number of types, number of fields
+    """
+    num_types = sum(1 for definition in document.definitions if isinstance(definition, TypeDefinitionNode))
+    num_fields = sum(len(getattr(definition, 'fields', None) or ()) for definition in document.definitions)
+    return num_types, num_fields
+
+
+class StepProfiler:
+    """
+    Records the wall time, the peak memory (traced by tracemalloc), the number of extend_schema calls, and the number
+    of types and fields added for each step of the generation.
+    """
+
+    columns = ['step', 'time_ms', 'peak_memory_kib', 'extend_schema_calls', 'types_added', 'fields_added']
+
+    def __init__(self):
+        self.steps = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def profile(self, step: str):
+        """
+        Profile the step executed in the with block. The types and fields added, and the extend_schema calls, are
+        set on the yielded record by the caller.
+        :param step: name of the step
+        :return:
+        """
+        record = {'step': step, 'time_ms': 0.0, 'peak_memory_kib': 0.0, 'extend_schema_calls': 0, 'types_added': 0,
+                  'fields_added': 0}
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        yield record
+        record['time_ms'] = (time.perf_counter() - start) * 1000
+        record['peak_memory_kib'] = tracemalloc.get_traced_memory()[1] / 1024
+        self.steps.append(record)
+
+    def get_totals(self):
+        totals = {column: sum(record[column] for record in self.steps) for column in self.columns[1:]}
+        totals['peak_memory_kib'] = max([record['peak_memory_kib'] for record in self.steps], default=0.0)
+        return totals
+
+    def format_table(self):
+        """
+        Format the recorded steps as a table.
+        :return string:
+        """
+        rows = [[record['step'], f'{record["time_ms"]:.1f}', f'{record["peak_memory_kib"]:.0f}',
+                 str(record['extend_schema_calls']), str(record['types_added']), str(record['fields_added'])]
+                for record in self.steps]
+        totals = self.get_totals()
+        rows.append(['total', f'{totals["time_ms"]:.1f}', f'{totals["peak_memory_kib"]:.0f}',
+                     str(totals['extend_schema_calls']), str(totals['types_added']), str(totals['fields_added'])])
+        widths = [max(len(row[i]) for row in rows + [self.columns]) for i in range(len(self.columns))]
+
+        def format_row(row):
+            return '  '.join([row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])])
+
+        lines = [format_row(self.columns), '  '.join('-' * width for width in widths)]
+        lines += [format_row(row) for row in rows]
+        return '\n'.join(lines)
+
+    def write_json(self, path: str):
+        """
+        Write the recorded steps, and the totals, to a JSON file.
+        :param path:
+        :return:
+        """
+        with open(path, 'w') as f:
+            json.dump({'steps': self.steps, 'total': self.get_totals()}, f, indent=2)
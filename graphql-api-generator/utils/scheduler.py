@@ -0,0 +1,223 @@
+import sys
+
+from graphql import GraphQLSchema
+
+
+class Step:
+    """
+    A generation step, registered with the configuration options that enable it and the parts of the schema (named
+    by strings, e.g. 'edge types') that it reads, refers to and adds.
+    """
+
+    def __init__(self, name: str, f, options=(), all_options: bool = False, update: bool = False, inputs=(),
+                 refers=(), outputs=(), optional=(), if_referred: bool = False):
+        """
+        :param name:
+        :param f: function taking the schema and returning its definitions (see utils.ast_builder), or, for an update
+        step, returning the modified schema
+        :param options: generation options enabling the step (any of them, or all of them if all_options is True),
+        the step is always run if there are none
+        :param all_options:
+        :param update: True if the step modifies the schema directly (see SchemaExtender.update)
+        :param inputs: the parts of the schema read by f, which must have been added to the schema before f is called,
+        or None if f reads (and may modify) the whole schema, i.e., the step depends on all earlier steps and all
+        later steps depend on it
+        :param refers: the parts of the schema that the definitions of the step only refer to by name, which may be
+        added to the schema together with them
+        :param outputs: the parts of the schema added by the step
+        :param optional: the parts of the schema read by f if they exist (e.g. fields that are also filtered if they
+        have been added), which must have been added before f is called, but which the step does not need
+        :param if_referred: only run the step if another enabled step needs its outputs (e.g. the root types, which
+        are not valid without fields)
+        """
+        self.name = name
+        self.f = f
+        self.options = list(options)
+        self.all_options = all_options
+        self.update = update
+        self.inputs = None if inputs is None else list(inputs)
+        self.refers = list(refers)
+        self.outputs = list(outputs)
+        self.optional = list(optional)
+        self.if_referred = if_referred
+
+    def get_needs(self):
+        """
+        Get the parts of the schema that the step cannot run without.
+        :return: list of parts
+        """
+        return (self.inputs or []) + self.refers
+
+    def is_enabled(self, generation: dict):
+        if not self.options:
+            return True
+        enabled = [bool(generation.get(option)) for option in self.options]
+        return all(enabled) if self.all_options else any(enabled)
+
+
+class StepScheduler:
+    """
+    Runs the generation steps enabled by the configuration in an order that respects their dependencies. A step
+    depends on the (enabled) steps adding the parts of the schema that it reads or refers to. Among the steps whose
+    dependencies have run, the step registered first runs first, so the steps run in the order of registration
+    unless that order violates a dependency. A step that reads or refers to a part of the schema that neither an
+    enabled step nor the input schema (for parts named after a type, e.g. 'DateTime') provides is skipped, and so is
+    a step adding parts that only make sense if referred to, if no remaining step refers to them.
+
+    The parts of the schema that a step reads also determine which pending definitions the SchemaExtender must apply
+    before the step is run.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+
+    def schedule(self, generation: dict, schema: GraphQLSchema = None):
+        """
+        Select and order the steps enabled by the configuration.
+        :param generation: the generation options of the configuration
+        :param schema: the input schema, which may provide the parts named after a type (e.g. 'DateTime')
+        :return: tuple of the list of steps to run (in order), and the list of skipped steps with the reason
+        """
+        reasons = {}
+        for step in self.steps:
+            if not step.is_enabled(generation):
+                options = f' {"and" if step.all_options else "or"} '.join(step.options)
+                reasons[step.name] = f'{options} not set'
+
+        # skip the steps needing parts of the schema that are not provided, until the remaining steps have all they need
+        enabled = [step for step in self.steps if step.name not in reasons]
+        while True:
+            provided = {part for step in enabled for part in step.outputs}
+            if schema is not None:
+                provided.update(schema.type_map)
+            needed = {part for step in enabled for part in step.get_needs() if part not in step.outputs}
+            unmet = [(step, part) for step in enabled for part in step.get_needs() if part not in provided]
+            unused = [step for step in enabled if step.if_referred and not needed.intersection(step.outputs)]
+            if not unmet and not unused:
+                break
+            for step, part in unmet:
+                if step.name not in reasons:
+                    reasons[step.name] = self._describe_unmet(part, generation, reasons)
+            for step in unused:
+                reasons.setdefault(step.name, 'no step refers to ' + ', '.join(f"'{part}'" for part in step.outputs))
+            enabled = [step for step in enabled if step.name not in reasons]
+
+        skipped = [(step, reasons[step.name]) for step in self.steps if step.name in reasons]
+        return self._order(enabled, self.get_dependencies(enabled)), skipped
+
+    def _describe_unmet(self, part: str, generation: dict, reasons: dict):
+        # the reason for skipping a step needing a part of the schema, from why the step adding it does not run
+        producers = [step for step in self.steps if part in step.outputs]
+        if not producers:
+            return f"needs '{part}'"
+        if not producers[0].is_enabled(generation):
+            return f"needs '{part}' ({reasons[producers[0].name]})"
+        return f"needs '{part}' ({producers[0].name} skipped)"
+
+    def get_dependencies(self, steps):
+        """
+        Get the dependencies between steps.
+        :param steps: the enabled steps, in order of registration
+        :return: dict of step name, set of the names of the steps it depends on
+        """
+        producers = {}
+        for step in steps:
+            for output in step.outputs:
+                producers.setdefault(output, []).append(step.name)
+
+        dependencies = {}
+        barrier = None
+        for i, step in enumerate(steps):
+            if step.inputs is None:
+                needs = {earlier.name for earlier in steps[:i]}
+                barrier = step.name
+            else:
+                needs = {name for part in step.inputs + step.optional + step.refers
+                         for name in producers.get(part, []) if name != step.name}
+                if barrier is not None:
+                    needs.add(barrier)
+            dependencies[step.name] = needs
+        return dependencies
+
+    @staticmethod
+    def get_reads(step: Step, steps):
+        """
+        Get the steps that must be applied to the schema before the given step is run.
+        :param step:
+        :param steps: the enabled steps
+        :return: list of step names, or None if the step reads the whole schema
+        """
+        if step.inputs is None:
+            return None
+        reads = step.inputs + step.optional
+        return [other.name for other in steps if other is not step and set(other.outputs).intersection(reads)]
+
+    def get_levels(self, steps):
+        """
+        Group the steps into levels, such that the steps of a level only depend on the steps of earlier levels. The
+        steps of a level are independent of each other, and could run concurrently.
+        :param steps: the enabled steps, in order of registration
+        :return: list of lists of step names
+        """
+        dependencies = self.get_dependencies(steps)
+        level = {}
+        for step in self._order(steps, dependencies):
+            level[step.name] = max((level[name] + 1 for name in dependencies[step.name]), default=0)
+        levels = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for step in steps:
+            levels[level[step.name]].append(step.name)
+        return levels
+
+    @staticmethod
+    def _order(steps, dependencies):
+        # the steps in an order where every step comes after its dependencies, otherwise in the given order
+        order = []
+        done = set()
+        remaining = list(steps)
+        while remaining:
+            ready = [step for step in remaining if dependencies[step.name].issubset(done)]
+            if not ready:
+                raise Exception('Cyclic dependencies between the generation steps: ' +
+                                ', '.join(step.name for step in remaining))
+            order.append(ready[0])
+            done.add(ready[0].name)
+            remaining.remove(ready[0])
+        return order
+
+    def format_plan(self, generation: dict, schema: GraphQLSchema = None):
+        """
+        Describe the steps that will run, which of them are independent, and which are skipped.
+        :param generation: the generation options of the configuration
+        :param schema: the input schema
+        :return string:
+        """
+        steps, skipped = self.schedule(generation, schema)
+        lines = ['Generation steps:']
+        lines += [f'  {i + 1:>2}. {step.name}' for i, step in enumerate(steps)]
+        lines.append('Independent steps (by level):')
+        lines += [f'  {i + 1:>2}. {", ".join(names)}' for i, names in enumerate(self.get_levels(steps))]
+        lines.append('Skipped steps:')
+        lines += [f'      {step.name} ({reason})' for step, reason in skipped]
+        if not skipped:
+            lines.append('      (none)')
+        return '\n'.join(lines)
+
+    def run(self, extender, generation: dict):
+        """
+        Run the steps enabled by the configuration. The steps that are enabled but skipped, since a part of the
+        schema they need is not provided, are reported on stderr.
+        :param extender: the SchemaExtender of the schema
+        :param generation: the generation options of the configuration
+        :return: the extended schema
+        """
+        steps, skipped = self.schedule(generation, extender.schema)
+        for step, reason in skipped:
+            if step.is_enabled(generation) and not step.if_referred:
+                print(f"Warning: generation step '{step.name}' skipped, {reason}", file=sys.stderr)
+        for step in steps:
+            after = self.get_reads(step, steps)
+            if step.update:
+                extender.update(step.name, step.f, after=after)
+            else:
+                extender.extend(step.name, step.f, after=[other.name for other in steps] if after is None else after)
+        return extender.flush()
@@ -0,0 +1,235 @@
+from weakref import WeakKeyDictionary, ref
+
+from graphql import *
+
+# the index of each schema, the index for a schema is built the first time it is needed
+_indexes = WeakKeyDictionary()
+
+
+def get_schema_index(schema: GraphQLSchema):
+    """
+    Get the index of schema, building it if the schema has not been indexed yet.
+    Note that schemas modified in place have to be re-indexed (see SchemaIndex.refresh).
+    :param schema:
+    :return SchemaIndex:
+    """
+    index = _indexes.get(schema)
+    if index is None:
+        index = SchemaIndex(schema)
+    return index
+
+
+def extend_schema_index(schema: GraphQLSchema, extended_schema: GraphQLSchema, document: DocumentNode):
+    """
+    Move the index of schema (if any) to the schema obtained by extending schema with document.
+    :param schema:
+    :param extended_schema:
+    :param document:
+    :return:
+    """
+    index = _indexes.pop(schema, None)
+    if index is not None:
+        index.extend(extended_schema, document)
+
+
+def _get_kind(_type: GraphQLNamedType):
+    if is_object_type(_type):
+        return TypeKind.OBJECT
+    if is_interface_type(_type):
+        return TypeKind.INTERFACE
+    if is_union_type(_type):
+        return TypeKind.UNION
+    if is_enum_type(_type):
+        return TypeKind.ENUM
+    if is_scalar_type(_type):
+        return TypeKind.SCALAR
+    return TypeKind.INPUT_OBJECT
+
+
+def _get_directives(ast_node):
+    if ast_node is None or not ast_node.directives:
+        return {}
+    return {directive.name.value: directive for directive in ast_node.directives}
+
+
+class SchemaIndex:
+    """
+    Precomputed facts about the types of a schema that are used by (almost) every generation step: the kind of each
+    type, the relationship fields (fields of object, interface or union type) of each type, the implementations of each
+    interface, and the directives of each type and field.
+
+    The index refers to types and fields by name and resolves them against the current schema, so it stays valid when
+    the schema is extended. When the schema is extended with a document, only the definitions in the document are
+    indexed (see extend). Types are listed in the same order as in schema.type_map.
+    """
+
+    def __init__(self, schema: GraphQLSchema):
+        self._schema = None
+        self.kinds = {}
+        self.relationship_fields = {}
+        self.implementations = {}
+        self.type_directives = {}
+        self.field_directives = {}
+        self.order = []
+        self.refresh(schema)
+
+    @property
+    def schema(self):
+        return self._schema()
+
+    def refresh(self, schema: GraphQLSchema):
+        """
+        Index all types of schema.
+        :param schema:
+        :return:
+        """
+        self.kinds = {}
+        self.relationship_fields = {}
+        self.implementations = {}
+        self.type_directives = {}
+        self.field_directives = {}
+        for _type in schema.type_map.values():
+            self._add_type(_type)
+        self._set_schema(schema)
+
+    def extend(self, schema: GraphQLSchema, document: DocumentNode):
+        """
+        Update the index to the schema obtained by extending the indexed schema with document.
+        :param schema: the extended schema
+        :param document: the document the schema was extended with
+        :return:
+        """
+        defined = set()
+        for definition in document.definitions:
+            if isinstance(definition, TypeDefinitionNode):
+                defined.add(definition.name.value)
+                self._add_type(schema.type_map[definition.name.value])
+        for definition in document.definitions:
+            if not isinstance(definition, TypeExtensionNode) or definition.name.value in defined:
+                continue
+            _type = schema.type_map[definition.name.value]
+            for field_node in getattr(definition, 'fields', None) or ():
+                self._add_field(_type, field_node.name.value, _type.fields[field_node.name.value])
+            if not is_object_type(_type):
+                continue
+            for interface in definition.interfaces or ():
+                self.implementations.setdefault(interface.name.value, []).append(_type.name)
+        self._set_schema(schema)
+
+    def _set_schema(self, schema: GraphQLSchema):
+        # keep the order of the type map, since it determines the order in which fields are added to the schema
+        self.order = list(schema.type_map.keys())
+        for name in self.order:
+            # standard scalars are only added to the type map once they are referenced
+            if name not in self.kinds:
+                self._add_type(schema.type_map[name])
+        position = {name: i for i, name in enumerate(self.order)}
+        for implementations in self.implementations.values():
+            implementations.sort(key=lambda name: position[name])
+        self._schema = ref(schema)
+        _indexes[schema] = self
+
+    def _add_type(self, _type: GraphQLNamedType):
+        kind = _get_kind(_type)
+        self.kinds[_type.name] = kind
+        self.type_directives[_type.name] = _get_directives(_type.ast_node)
+        if kind in (TypeKind.OBJECT, TypeKind.INTERFACE):
+            self.relationship_fields[_type.name] = {}
+            for field_name, field in _type.fields.items():
+                self._add_field(_type, field_name, field)
+        if kind == TypeKind.OBJECT:
+            for interface in _type.interfaces:
+                self.implementations.setdefault(interface.name, []).append(_type.name)
+
+    def _add_field(self, _type: GraphQLNamedType, field_name: str, field):
+        self.field_directives[(_type.name, field_name)] = _get_directives(field.ast_node)
+        if field_name in self.relationship_fields.get(_type.name, ()):
+            return
+        named_type = get_named_type(field.type)
+        if is_object_type(named_type) or is_interface_type(named_type) or is_union_type(named_type):
+            self.relationship_fields[_type.name][field_name] = None
+
+    def types(self, *kinds: TypeKind):
+        """
+        Get the (non-introspection) types of the given kinds.
+        :param kinds:
+        :return:
+        """
+        type_map = self.schema.type_map
+        for name in self.order:
+            if self.kinds[name] in kinds and not name.startswith('__'):
+                yield type_map[name]
+
+    def db_types(self, *kinds: TypeKind):
+        """
+        Get the types defined in the DB schema (see is_db_schema_defined_type), optionally only those of the given
+        kinds.
+        :param kinds: any of TypeKind.OBJECT, TypeKind.INTERFACE and TypeKind.UNION (default all)
+        :return:
+        """
+        kinds = kinds or (TypeKind.OBJECT, TypeKind.INTERFACE, TypeKind.UNION)
+        for _type in self.types(*kinds):
+            if not _type.name.startswith('_') and _type.name != 'Query' and _type.name != 'Mutation':
+                yield _type
+
+    def schema_types(self, *kinds: TypeKind):
+        """
+        Get the schema-defined types (see is_schema_defined_type), optionally only those of the given kinds.
+        :param kinds: any of TypeKind.OBJECT, TypeKind.INTERFACE and TypeKind.UNION (default all)
+        :return:
+        """
+        kinds = kinds or (TypeKind.OBJECT, TypeKind.INTERFACE, TypeKind.UNION)
+        for _type in self.types(*kinds):
+            if _type.name != 'Query' and _type.name != 'Mutation':
+                yield _type
+
+    def edge_types(self):
+        """
+        Get the generated edge types.
+        :return:
+        """
+        for _type in self.types(TypeKind.OBJECT, TypeKind.INTERFACE):
+            if _type.name.startswith('_') and 'EdgeFrom' in _type.name:
+                yield _type
+
+    def get_relationship_fields(self, _type: GraphQLNamedType):
+        """
+        Get the fields of _type whose (named) type is an object, interface or union type.
+        :param _type:
+        :return: list of field name, field tuples
+        """
+        return [(field_name, _type.fields[field_name]) for field_name in self.relationship_fields.get(_type.name, ())]
+
+    def get_possible_types(self, _type: GraphQLNamedType):
+        """
+        Get the implementations of an interface, or the types of a union.
+        :param _type:
+        :return:
+        """
+        if is_union_type(_type):
+            return _type.types
+        type_map = self.schema.type_map
+        return [type_map[name] for name in self.implementations.get(_type.name, ())]
+
+    def get_type_directives(self, _type: GraphQLNamedType):
+        """
+        Get the directives of _type.
+        :param _type:
+        :return: dict of directive name, directive node
+        """
+        return self.type_directives.get(_type.name, {})
+
+    def get_field_directives(self, _type: GraphQLNamedType, field_name: str, inherited=False):
+        """
+        Get the directives of a field.
+        :param _type:
+        :param field_name:
+        :param inherited: include the directives of the field in the interfaces of _type
+        :return: dict of directive name, directive node
+        """
+        directives = self.field_directives.get((_type.name, field_name), {})
+        if inherited:
+            for interface in getattr(_type, 'interfaces', ()):
+                if (interface.name, field_name) in self.field_directives:
+                    directives = {**directives, **self.field_directives[(interface.name, field_name)]}
+        return directives
@@ -1,4 +1,6 @@
 from graphql import *
+from utils import ast_builder as ast
+from utils.schema_index import get_schema_index, extend_schema_index
 
 
 def pascal_case(string: str):
@@ -81,79 +83,125 @@ def is_enum_or_scalar(_type: GraphQLType):
     return False
 
 
+def get_selection(generation: dict, option: str):
+    """
+    Get the types and fields selected by a generation option. The option is either a boolean, which selects all types
+    and fields, or a dict with a list of types and fields (`Type` or `Type.field`) to generate for (`only`) or not to
+    generate for (`except`).
+    :param generation: the generation options of the configuration
+    :param option:
+    :return: function taking a type name and an optional field name, returning whether it is selected, or None if all
+    types and fields are selected
+    """
+    value = (generation or {}).get(option)
+    if not isinstance(value, dict):
+        return None
+    unknown = set(value.keys()) - {'only', 'except'}
+    if unknown or len(value) != 1:
+        raise Exception(f'Unrecognized option: {option} must be a boolean, or have either "only" or "except"')
+
+    if 'only' in value:
+        only = set(value['only'] or [])
+        types = {entry.split('.')[0] for entry in only}
+        return lambda type_name, field_name=None: \
+            type_name in types if field_name is None else type_name in only or f'{type_name}.{field_name}' in only
+
+    excluded = set(value['except'] or [])
+    return lambda type_name, field_name=None: \
+        type_name not in excluded and (field_name is None or f'{type_name}.{field_name}' not in excluded)
+
+
+def is_selected(selected, type_name: str, field_name: str = None):
+    """
+    Returns true if a type (or a field of it) is selected, see get_selection.
+    :param selected: function returned by get_selection, or None to select all types and fields
+    :param type_name:
+    :param field_name:
+    :return:
+    """
+    return selected is None or selected(type_name, field_name)
+
+
+def make_query_type(schema: GraphQLSchema):
+    return [ast.object_type('Query')]
+
+
 def add_query_type(schema: GraphQLSchema):
-    return add_to_schema(schema, 'type Query')
+    return add_to_schema(schema, make_query_type(schema))
+
+
+def make_mutation_type(schema: GraphQLSchema):
+    return [ast.object_type('Mutation')]
 
 
 def add_mutation_type(schema: GraphQLSchema):
-    return add_to_schema(schema, 'type Mutation')
+    return add_to_schema(schema, make_mutation_type(schema))
 
 
-def add_to_schema(schema: GraphQLSchema, make: str):
-    if make == '':
+def add_to_schema(schema: GraphQLSchema, make: list):
+    """
+    Extend the schema with the given definitions.
+    :param schema:
+    :param make: list of type definitions and extensions (see utils.ast_builder)
+    :return: the extended schema (raises TypeError if the definitions are not valid for the schema)
+    """
+    if not make:
         return schema
-    try:
-        schema = extend_schema(schema, parse(make))
-    except TypeError as e:
-        print(make)
-        print(e)
-    except SyntaxError as e:
-        print(make)
-        print(e)
-
-    return schema
+    document = DocumentNode(definitions=make)
+    extended_schema = extend_schema(schema, document)
+    extend_schema_index(schema, extended_schema, document)
+    return extended_schema
 
 
-def add_id_to_types(schema: GraphQLSchema):
+def make_id_to_types(schema: GraphQLSchema):
     """
     Extend all object types in the schema with an ID field.
     :param schema:
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
-            continue
-        if is_interface_type(_type):
-            make += f'extend interface {_type.name} {{ id: ID! }} '
-        else:
-            make += f'extend type {_type.name} {{ id: ID! }} '
-    return add_to_schema(schema, make)
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        make.append(ast.extend_type(_type.name, [ast.field('id', 'ID!')], is_interface_type(_type)))
+    return make
 
 
-def add_creation_date_to_types(schema: GraphQLSchema):
+def add_id_to_types(schema: GraphQLSchema):
+    return add_to_schema(schema, make_id_to_types(schema))
+
+
+def make_creation_date_to_types(schema: GraphQLSchema):
     """
     Extend all object types in the schema with an creationDate field.
     :param schema:
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_schema_defined_type(_type) or is_union_type(_type):
-            continue
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.schema_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        make.append(ast.extend_type(_type.name, [ast.field('_creationDate', 'DateTime!')], is_interface_type(_type)))
+    return make
 
-        if is_interface_type(_type):
-            make += f'extend interface {_type.name} {{ _creationDate: DateTime! }} '
-        else:
-            make += f'extend type {_type.name} {{ _creationDate: DateTime! }} '
-    return add_to_schema(schema, make)
 
+def add_creation_date_to_types(schema: GraphQLSchema):
+    return add_to_schema(schema, make_creation_date_to_types(schema))
 
-def add_last_update_date_to_types(schema: GraphQLSchema):
+
+def make_last_update_date_to_types(schema: GraphQLSchema):
     """
     Extend all object types in the schema with an lastUpdateDate field.
     :param schema:
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_schema_defined_type(_type) or is_union_type(_type):
-            continue
-        if is_interface_type(_type):
-            make += f'extend interface {_type.name} {{ _lastUpdateDate: DateTime }} '
-        else:
-            make += f'extend type {_type.name} {{ _lastUpdateDate: DateTime }} '
-    return add_to_schema(schema, make)
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.schema_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        make.append(ast.extend_type(_type.name, [ast.field('_lastUpdateDate', 'DateTime')], is_interface_type(_type)))
+    return make
+
+
+def add_last_update_date_to_types(schema: GraphQLSchema):
+    return add_to_schema(schema, make_last_update_date_to_types(schema))
 
 
 def copy_wrapper_structure(_type: GraphQLType, original: GraphQLType):
@@ -184,467 +232,447 @@ def copy_wrapper_structure(_type: GraphQLType, original: GraphQLType):
     return wrapped_type
 
 
-def add_reverse_edges(schema: GraphQLSchema):
+def wrap_type_name(type_name: str, original: GraphQLType):
+    """
+    Copy the wrapper structure of original to the (input) type with the given name, which may not be defined yet.
+    :param type_name:
+    :param original:
+    :return string:
+    """
+    return str(copy_wrapper_structure(GraphQLInputObjectType(type_name, {}), original))
+
+
+def make_reverse_edges(schema: GraphQLSchema, selected=None):
     """
     Add reverse edges to all fields with object types.
     :param schema:
+    :param selected: the fields to add reverse edges for (see get_selection), or None for all fields
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
-            continue
-
-        for field_name, field_type in _type.fields.items():
-            if is_enum_or_scalar(get_named_type(field_type.type)):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        for field_name, field_type in index.get_relationship_fields(_type):
+            if not is_selected(selected, _type.name, field_name):
                 continue
-
             # Reverse edge
             edge_from = get_named_type(field_type.type)
             edge_name = f'_{field_name}From{_type.name}'
 
-            directives = {}
-            directive_to_add = ''
-
-            if hasattr(field_type, 'ast_node') and field_type.ast_node is not None:
-                directives = {directive.name.value: directive for directive in field_type.ast_node.directives}
-                
-            if 'requiredForTarget' in directives:
-                directive_to_add = '@required'
-
-            if hasattr(_type, 'interfaces'):
-                for interface in _type.interfaces:
-                    if field_name in interface.fields.keys():
-                        directives = {**directives, **{directive.name.value: directive for directive in interface.fields[field_name].ast_node.directives}}
+            directives_to_add = []
+            if 'requiredForTarget' in index.get_field_directives(_type, field_name):
+                directives_to_add = [ast.directive('required')]
 
-            if 'uniqueForTarget' in directives:
+            if 'uniqueForTarget' in index.get_field_directives(_type, field_name, inherited=True):
                 edge_to = _type
             else:
                 edge_to = GraphQLList(_type)
 
             if is_interface_type(edge_from):
-                make += 'extend interface {0} {{ {1}: {2} {3} }}\n'.format(edge_from, edge_name, edge_to, directive_to_add)
-                for implementing_type in schema.get_possible_types(edge_from):
-                    make += 'extend type {0} {{ {1}: {2} }}\n'.format(implementing_type, edge_name, edge_to)
+                make.append(ast.extend_type(edge_from.name, [ast.field(edge_name, edge_to, directives=directives_to_add)],
+                                        interface=True))
+                for implementing_type in index.get_possible_types(edge_from):
+                    make.append(ast.extend_type(implementing_type.name, [ast.field(edge_name, edge_to)]))
             elif is_union_type(edge_from):
                 for sub_type in edge_from.types:
-                    make += 'extend type {0} {{ {1}: {2} }}\n'.format(sub_type, edge_name, edge_to)
+                    make.append(ast.extend_type(sub_type.name, [ast.field(edge_name, edge_to)]))
             else:
-                make += 'extend type {0} {{ {1}: {2} {3} }}\n'.format(edge_from, edge_name, edge_to, directive_to_add)
-    schema = add_to_schema(schema, make)
+                make.append(ast.extend_type(edge_from.name, [ast.field(edge_name, edge_to, directives=directives_to_add)]))
+    return make
 
-    return schema
 
+def add_reverse_edges(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_reverse_edges(schema, selected))
 
-def add_input_to_create(schema: GraphQLSchema):
+
+def make_input_to_create(schema: GraphQLSchema):
     """
     Add create and connect types for creating objects.
     :param schema:
     :return:
     """
+    index = get_schema_index(schema)
     # add create types (placeholders)
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        make += f'input _InputToCreate{_type.name} '
-    schema = add_to_schema(schema, make)
-
-    # add fields to create types
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        make += f'\nextend input _InputToCreate{_type.name} {{\n'
-        num_fields = 0
-        for field_name, field in _type.fields.items():
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT):
+        make.append(ast.input_type(f'_InputToCreate{_type.name}'))
+
+    # add connect types, and fields to create types
+    make_connect_types = []
+    make_fields = []
+    defined = set(schema.type_map.keys())
+    for _type in index.db_types(TypeKind.OBJECT):
+        fields = []
+        for field_name, _field in _type.fields.items():
             if field_name == 'id' or field_name[0] == '_':
                 continue
-            num_fields += 1
-            inner_field_type = get_named_type(field.type)
+            inner_field_type = get_named_type(_field.type)
 
             if is_enum_or_scalar(inner_field_type):
-                make += f'   {field_name}: {field.type} \n'
+                fields.append(ast.input_value(field_name, _field.type))
             else:
-                schema = extend_connect(schema, _type, inner_field_type, field_name)
+                make_connect_types += make_connect(schema, _type, inner_field_type, field_name, defined)
                 connect_name = f'_InputToConnect{capitalize(field_name)}Of{_type.name}'
-                connect = copy_wrapper_structure(schema.type_map[connect_name], field.type)
-                make += f'   {field_name}: {connect} \n'
-        if num_fields == 0:
-            make += f'   _dummy: String \n'
-        make += '}\n'
-    schema = add_to_schema(schema, make)
-    return schema
+                fields.append(ast.input_value(field_name, wrap_type_name(connect_name, _field.type)))
+        if len(fields) == 0:
+            fields.append(ast.input_value('_dummy', 'String'))
+        make_fields.append(ast.extend_input_type(f'_InputToCreate{_type.name}', fields))
+    # the connect types are defined before the create types are extended, all in the same document
+    return make + make_connect_types + make_fields
 
 
-def _get_keys_for_type(type_: GraphQLType):
+def add_input_to_create(schema: GraphQLSchema):
+    return add_to_schema(schema, make_input_to_create(schema))
+
+
+def _get_keys_for_type(type_: GraphQLType, index):
     keys = []
-    if hasattr(type_, 'ast_node') and type_.ast_node is not None:
-        directives = {directive.name.value: directive for directive in type_.ast_node.directives}
-        if 'key' in directives:
-            arguments = {arg.name.value: arg for arg in directives['key'].arguments}
-            if 'fields' in arguments:
-                keys.append([val.value for val in arguments['fields'].value.values])
+    directives = index.get_type_directives(type_)
+    if 'key' in directives:
+        arguments = {arg.name.value: arg for arg in directives['key'].arguments}
+        if 'fields' in arguments:
+            keys.append([val.value for val in arguments['fields'].value.values])
     return keys
 
 
-def add_key_input_types(schema: GraphQLSchema):
+def make_key_input_types(schema: GraphQLSchema):
     """
     Add create and connect types for creating objects.
     :param schema:
     :return:
     """
+    index = get_schema_index(schema)
     # add create types (placeholders)
-    make_types = ''
-    extend_fields = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type):
-            continue
-        keys = _get_keys_for_type(_type)
+    make_types = []
+    extend_fields = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.UNION):
+        keys = _get_keys_for_type(_type, index)
         # TODO: Modify this when we need to handle multiple keys.
         if len(keys) > 0:
             for key in keys[:1]:
-                make_types += f'input _KeyFor{_type.name} '
-                extend_fields += f'\nextend input _KeyFor{_type.name} {{ '
+                make_types.append(ast.input_type(f'_KeyFor{_type.name}'))
                 for key_field in key:
                     if key_field not in _type.fields:
                         raise Exception(f'Field "{key_field}" in @key directive for {_type} is not a field of {_type}!')
-                for field_name, field in _type.fields.items():
+                fields = []
+                for field_name, _field in _type.fields.items():
                     # TODO: Modify this if we need to verify that the key fields are in the object
                     if field_name not in key:
                         continue
-                    extend_fields += f'{field_name}: {field.type} '
-                extend_fields += '} '
-    schema = add_to_schema(schema, make_types)
-    schema = add_to_schema(schema, extend_fields)
-    return schema
+                    fields.append(ast.input_value(field_name, _field.type))
+                extend_fields.append(ast.extend_input_type(f'_KeyFor{_type.name}', fields))
+    # the placeholder types are defined before they are extended in the same document
+    return make_types + extend_fields
 
 
-def add_key_queries(schema: GraphQLSchema):
+def add_key_input_types(schema: GraphQLSchema):
+    return add_to_schema(schema, make_key_input_types(schema))
+
+
+def make_key_queries(schema: GraphQLSchema):
     """
     Add query to get object based on ID.
     :param schema:
     :return:
     """
+    index = get_schema_index(schema)
     # Create queries for object types
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type):
-            continue
-        keys = _get_keys_for_type(_type)
+    make = []
+    for _type in index.db_types():
+        keys = _get_keys_for_type(_type, index)
         # TODO: Handle multiple keys here, somehow.
         if len(keys) > 0:
             # for key in keys[:1]:
             query_name = f'{decapitalize(_type.name)}ByKey'
             key_type = f'_KeyFor{_type.name}'
-            make += f'extend type Query {{ {query_name}(key:{key_type}!): {_type.name} }} '
-    schema = add_to_schema(schema, make)
-    return schema
+            make.append(ast.extend_type('Query', [ast.field(query_name, _type.name, [ast.input_value('key', f'{key_type}!')])]))
+    return make
+
+
+def add_key_queries(schema: GraphQLSchema):
+    return add_to_schema(schema, make_key_queries(schema))
 
 
-def extend_connect(schema: GraphQLSchema, _type: GraphQLType, field_type: GraphQLType, field_name: str):
+def make_connect(schema: GraphQLSchema, _type: GraphQLType, field_type: GraphQLType, field_name: str, defined: set):
     """
-    Add connect type.
+    Make connect type (and annotation type, if needed).
     :param schema:
     :param _type:
     :param field_type:
     :param field_name:
+    :param defined: names of the types defined so far, updated with the types made here
     :return:
     """
     connect_name = f'_InputToConnect{capitalize(field_name)}Of{_type.name}'
-    make = f'input {connect_name} {{ '
-    make += 'connect: ID '
+    fields = [ast.input_value('connect', 'ID')]
 
     # if interface
     if is_interface_type(field_type):
         # add fields for all implementing types
-        for implementing_type in schema.get_possible_types(field_type):
+        for implementing_type in get_schema_index(schema).get_possible_types(field_type):
             create_field = f'create{implementing_type.name}'
             create_implementing_type = f'_InputToCreate{implementing_type.name}'
-            make += f'{create_field} : {create_implementing_type} '
+            fields.append(ast.input_value(create_field, create_implementing_type))
     elif is_union_type(field_type):
         # add fields for types in the union
         for _sub_type in field_type.types:
             create_field = f'create{_sub_type.name}'
             create_sub_type = f'_InputToCreate{_sub_type.name}'
-            make += f'{create_field} : {create_sub_type} '
+            fields.append(ast.input_value(create_field, create_sub_type))
     else:
         create_name = f'_InputToCreate{field_type.name}'
-        make += f'create: {create_name} '
+        fields.append(ast.input_value('create', create_name))
         
     # Get annotations
     edge_from = f'{capitalize(field_name)}EdgeFrom{_type.name}'
     annotate_input = f'_InputToAnnotate{edge_from}'
     annotations, is_non_null_string = get_field_annotations(_type.fields[field_name])
 
+    make_annotations = []
     if len(annotations) > 0:
-        # Make sure the annotation type actually exists first, and prevent us from defining it multiple times
-        if annotate_input not in schema.type_map:
-            schema = add_to_schema(schema, f'input {annotate_input}{{{annotations}}}')
+        # Make sure the annotation type is defined before the connect type, and prevent us from defining it
+        # multiple times
+        if annotate_input not in defined:
+            make_annotations.append(ast.input_type(annotate_input, [ast.input_value(*a) for a in annotations]))
+            defined.add(annotate_input)
 
-        make += f'annotations: {annotate_input}{is_non_null_string}'
+        fields.append(ast.input_value('annotations', f'{annotate_input}{is_non_null_string}'))
 
-    make += '}'
-    schema = add_to_schema(schema, make)
-    return schema
+    defined.add(connect_name)
+    return make_annotations + [ast.input_type(connect_name, fields)]
 
 
-def add_input_update(schema: GraphQLSchema):
+def make_input_update(schema: GraphQLSchema):
     """
     Add update types for updating objects.
     :param schema:
     :return:
     """
+    index = get_schema_index(schema)
     # Create update inputs
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT):
         update_name = f'_InputToUpdate{_type.name}'
-        make += f'input {update_name} '
-    schema = add_to_schema(schema, make)
+        make.append(ast.input_type(update_name))
 
     # Add fields to update type
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
+    for _type in index.db_types(TypeKind.OBJECT):
         num_fields = 0
         update_name = f'_InputToUpdate{_type.name}'
-        for field_name, field in _type.fields.items():
+        for field_name, _field in _type.fields.items():
             if field_name == 'id' or field_name[0] == '_':
                 continue
             
-            f_type = get_nullable_type(field.type)
+            f_type = get_nullable_type(_field.type)
             inner_field_type = get_named_type(f_type)
 
             if is_enum_or_scalar(inner_field_type):
                 num_fields += 1
-                make += f'extend input {update_name} {{ {field_name}: {f_type} }} \n'
+                make.append(ast.extend_input_type(update_name, [ast.input_value(field_name, f_type)]))
             else:
                 num_fields += 1
                 connect_name = f'_InputToConnect{capitalize(field_name)}Of{_type.name}'
-                connect = copy_wrapper_structure(schema.type_map[connect_name], f_type)
-                make += f'extend input {update_name} {{ {field_name}: {connect} }} \n'
+                connect = wrap_type_name(connect_name, f_type)
+                make.append(ast.extend_input_type(update_name, [ast.input_value(field_name, connect)]))
 
         if num_fields == 0:
-            make += f'extend input {update_name} {{ _dummy: String }} \n'
-    schema = add_to_schema(schema, make)
-    return schema
+            make.append(ast.extend_input_type(update_name, [ast.input_value('_dummy', 'String')]))
+    return make
+
+
+def add_input_update(schema: GraphQLSchema):
+    return add_to_schema(schema, make_input_update(schema))
 
 
-def add_get_queries(schema: GraphQLSchema):
+def make_get_queries(schema: GraphQLSchema, selected=None):
     """
     Add query to get object based on ID.
     :param schema:
+    :param selected: the types to add queries for (see get_selection), or None for all types
     :return:
     """
+    index = get_schema_index(schema)
     # Create queries for object types
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type):
+    make = []
+    for _type in index.db_types():
+        if not is_selected(selected, _type.name):
             continue
-        make += f'extend type Query {{ {decapitalize(_type.name)}(id:ID!): {_type.name} }} '
-    schema = add_to_schema(schema, make)
-    return schema
+        make.append(ast.extend_type('Query', [ast.field(decapitalize(_type.name), _type.name, [ast.input_value('id', 'ID!')])]))
+    return make
 
 
-def add_get_edge_queries(schema: GraphQLSchema):
+def add_get_queries(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_get_queries(schema, selected))
+
+
+def make_get_edge_queries(schema: GraphQLSchema):
     """
     Add query to get edge based on ID.
     :param schema:
     :return:
     """
-    # Create queries for object types
-    make = ''
-    for _type in schema.type_map.values():
-        if is_db_schema_defined_type(_type) or is_input_type(_type):
-            continue
-        if not _type.name.startswith('_') or not 'EdgeFrom' in _type.name:
-            continue
-        make += f'extend type Query {{ {decapitalize(_type.name)}(id:ID!): {_type.name} }} '
-    schema = add_to_schema(schema, make)
-    return schema
+    index = get_schema_index(schema)
+    # Create queries for edge types
+    make = []
+    for _type in index.edge_types():
+        make.append(ast.extend_type('Query', [ast.field(decapitalize(_type.name), _type.name, [ast.input_value('id', 'ID!')])]))
+    return make
 
 
-def add_list_of_types(schema: GraphQLSchema):
+def add_get_edge_queries(schema: GraphQLSchema):
+    return add_to_schema(schema, make_get_edge_queries(schema))
+
+
+def make_list_of_types(schema: GraphQLSchema, selected=None):
     """
     Add list type to represent lists of all types and support paging.
     :param schema:
+    :param selected: the types to add list types for (see get_selection), or None for all types
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        if not is_selected(selected, _type.name):
             continue
+        make.append(ast.object_type(f'_ListOf{_type.name}s', [
+            ast.field('totalCount', 'Int!'),
+            ast.field('isEndOfWholeList', 'Boolean!'),
+            ast.field('content', f'[{_type.name}]!')
+        ]))
+    return make
 
-        make += f'type _ListOf{_type.name}s {{ ' \
-            f'   totalCount: Int! ' \
-            f'   isEndOfWholeList: Boolean! ' \
-            f'   content: [{_type.name}]!' \
-            f'}} '
-    schema = add_to_schema(schema, make)
-    return schema
 
+def add_list_of_types(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_list_of_types(schema, selected))
 
-def add_list_queries(schema: GraphQLSchema):
+
+def make_list_queries(schema: GraphQLSchema, selected=None):
     """
     Add queries to get list of types.
     :param schema:
+    :param selected: the types to add queries for (see get_selection), or None for all types
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_list_type(_type) or is_union_type(_type):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        if not is_selected(selected, _type.name):
             continue
-        make += f'extend type Query {{ ' \
-            f'   listOf{_type.name}s(first:Int=10, after:ID="", filter:_FilterFor{_type.name}): _ListOf{_type.name}s ' \
-            f'}}'
-    schema = add_to_schema(schema, make)
-    return schema
+        arguments = [ast.input_value('first', 'Int', 10), ast.input_value('after', 'ID', ''),
+                     ast.input_value('filter', f'_FilterFor{_type.name}')]
+        make.append(ast.extend_type('Query', [ast.field(f'listOf{_type.name}s', f'_ListOf{_type.name}s', arguments)]))
+    return make
 
 
-def add_scalar_filters(schema: GraphQLSchema, config: dict):
+def add_list_queries(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_list_queries(schema, selected))
+
+
+def _make_filter(name: str, scalar: str, operators):
+    # a (Hasura-style) filter input with a field of the scalar type for each operator, and a list for _in and _nin
+    return ast.input_type(name, [ast.input_value(op, f'[{scalar}]' if op in ('_in', '_nin') else scalar) for op in operators])
+
+
+def make_scalar_filters(schema: GraphQLSchema, config: dict):
     """
     Add filter inputs for GrahpQL types (Hasura-style).
     :param schema:
     :return:
     """
-    make = ''
+    make = []
     manually_handled_scalars = ['Int', 'Float', 'String', 'Boolean', 'ID']
 
     # Numeric
     scalars = ['Int', 'Float']
     for scalar in scalars:
-        make += f'input _{scalar}Filter {{' \
-               f'   _eq: {scalar} ' \
-               f'   _neq: {scalar} ' \
-               f'   _gt: {scalar} ' \
-               f'   _egt: {scalar} ' \
-               f'   _lt: {scalar} ' \
-               f'   _elt: {scalar} ' \
-               f'   _in: [{scalar}] ' \
-               f'   _nin: [{scalar}] ' \
-               f'}} '
+        make.append(_make_filter(f'_{scalar}Filter', scalar, ['_eq', '_neq', '_gt', '_egt', '_lt', '_elt', '_in', '_nin']))
 
     # String
-    make += 'input _StringFilter {' \
-            '   _eq: String ' \
-            '   _neq: String ' \
-            '   _gt: String ' \
-            '   _egt: String ' \
-            '   _lt: String ' \
-            '   _elt: String ' \
-            '   _in: [String] ' \
-            '   _nin: [String] ' \
-            '   _like: String ' \
-            '   _ilike: String ' \
-            '   _nlike: String ' \
-            '   _nilike: String ' \
-            '} '
+    string_operators = ['_eq', '_neq', '_gt', '_egt', '_lt', '_elt', '_in', '_nin', '_like', '_ilike', '_nlike', '_nilike']
+    make.append(_make_filter('_StringFilter', 'String', string_operators))
 
     # ID (behaves like a string)
-    make += 'input _IDFilter {' \
-            '   _eq: String ' \
-            '   _neq: String ' \
-            '   _gt: String ' \
-            '   _egt: String ' \
-            '   _lt: String ' \
-            '   _elt: String ' \
-            '   _in: [String] ' \
-            '   _nin: [String] ' \
-            '   _like: String ' \
-            '   _ilike: String ' \
-            '   _nlike: String ' \
-            '   _nilike: String ' \
-            '} '
+    make.append(_make_filter('_IDFilter', 'String', string_operators))
 
     # Boolean
-    make += 'input _BooleanFilter {' \
-            '   _eq: Boolean ' \
-            '   _neq: Boolean ' \
-            '} '
+    make.append(_make_filter('_BooleanFilter', 'Boolean', ['_eq', '_neq']))
 
     # If DateTime is defined as a scalar then create filter (behaves like an integer)
     date_time = schema.type_map.get("DateTime")
     if is_scalar_type(date_time):
         manually_handled_scalars.append('DateTime')
-        make += 'input _DateTimeFilter {' \
-                '   _eq: DateTime ' \
-                '   _neq: DateTime ' \
-                '   _in: [DateTime] ' \
-                '   _nin: [DateTime] ' \
-                '   _gt: DateTime ' \
-                '   _egt: DateTime ' \
-                '   _lt: DateTime ' \
-                '   _elt: DateTime ' \
-                '} '
+        make.append(_make_filter('_DateTimeFilter', 'DateTime', ['_eq', '_neq', '_in', '_nin', '_gt', '_egt', '_lt', '_elt']))
 
     # Schema-defined scalars
-    for scalar_name, scalar in schema.type_map.items():
-        if not is_scalar_type(scalar) or scalar_name in manually_handled_scalars:
+    for scalar in get_schema_index(schema).types(TypeKind.SCALAR):
+        scalar_name = scalar.name
+        if scalar_name in manually_handled_scalars:
             continue
 
-        make += f'input _{scalar_name}Filter {{' \
-               f'   _eq: {scalar_name} ' \
-               f'   _neq: {scalar_name} ' \
-               f'   _in: [{scalar_name}] ' \
-               f'   _nin: [{scalar_name}] ' \
-               f'}} '
+        make.append(_make_filter(f'_{scalar_name}Filter', scalar_name, ['_eq', '_neq', '_in', '_nin']))
 
-    schema = add_to_schema(schema, make)
+    return make
 
-    return schema
+
+def add_scalar_filters(schema: GraphQLSchema, config: dict):
+    return add_to_schema(schema, make_scalar_filters(schema, config))
 
 
-def add_type_filters(schema: GraphQLSchema):
+def make_type_filters(schema: GraphQLSchema, selected=None):
     """
     Add filter types (Hasura-style filters).
     :param schema: schema
+    :param selected: the types to add filters for (see get_selection), or None for all types
     :return: Updated schema
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        if not is_selected(selected, _type.name):
             continue
+        filter_name = f'_FilterFor{_type.name}'
+        fields = [ast.input_value('_and', f'[{filter_name}]'), ast.input_value('_or', f'[{filter_name}]'),
+                  ast.input_value('_not', filter_name)]
 
-        make += f'input _FilterFor{_type.name} {{ ' \
-            f'   _and: [_FilterFor{_type.name}] ' \
-            f'   _or: [_FilterFor{_type.name}] ' \
-            f'   _not: _FilterFor{_type.name} '
-
-        for field_name, field in _type.fields.items():
+        for field_name, _field in _type.fields.items():
             if field_name[0] == '_' and not is_meta_field(field_name):
                 continue
 
             # remove outer required
-            f_type = field.type
+            f_type = _field.type
             if is_non_null_type(f_type):
-                f_type = field.type.of_type
+                f_type = _field.type.of_type
 
             # filters are not supported for lists
-            if is_list_type(field.type):
+            if is_list_type(_field.type):
                 continue
 
             named_type = get_named_type(f_type)
             if is_enum_or_scalar(f_type):
-                make += f'{field_name}: _{named_type.name}Filter '
-        make += '} '
-    schema = add_to_schema(schema, make)
-    return schema
+                fields.append(ast.input_value(field_name, f'_{named_type.name}Filter'))
+        make.append(ast.input_type(filter_name, fields))
+    return make
+
 
+def add_type_filters(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_type_filters(schema, selected))
 
-def add_object_type_filters(schema: GraphQLSchema):
+
+def add_object_type_filters(schema: GraphQLSchema, selected=None):
     """
     Add filters as arguments to list field of object types.
     :param schema:
+    :param selected: the fields to add filter arguments to (see get_selection), or None for all fields
     :return:
     """
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
-            continue
-
+    index = get_schema_index(schema)
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
         for field_name, field in _type.fields.items():
+            # the fields of an implementation need the arguments of the interface fields
+            owners = [_type.name] + [i.name for i in getattr(_type, 'interfaces', ()) if field_name in i.fields]
+            if not any(is_selected(selected, name, field_name) for name in owners):
+                continue
 
             if not is_list_type(get_nullable_type(field.type)):
                 continue
@@ -658,16 +686,19 @@ def add_object_type_filters(schema: GraphQLSchema):
             else:
                 filter_name = f'_FilterFor{capitalize(named_type.name)}'
 
-            _filter = schema.type_map[filter_name]
+            # the filter is not generated if its type is not selected
+            _filter = schema.type_map.get(filter_name)
+            if _filter is None:
+                continue
             field.args['filter'] = GraphQLArgument(_filter)
     return schema
 
 
 def get_field_annotations(field: GraphQLField):
     """
-    Get the annotations of a given field and return them as string
+    Get the annotations (arguments, except filter) of a given field
     :param field:
-    :return string:
+    :return: list of (name, type) tuples, and '!' if any annotation is required (else '')
     """
     annotation_fields = []
     is_non_null_string = ''
@@ -676,256 +707,258 @@ def get_field_annotations(field: GraphQLField):
             continue
         if not is_enum_or_scalar(get_named_type(arg_type.type)):
             raise Exception("Input object fields are not supported.")
-        annotation_fields.append(f'{arg}: {arg_type.type}')
+        annotation_fields.append((arg, arg_type.type))
         if is_non_null_type(arg_type.type):
             is_non_null_string = '!'
-    return " ".join(annotation_fields), is_non_null_string
+    return annotation_fields, is_non_null_string
 
 
-def add_edge_objects(schema: GraphQLSchema):
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
-            continue
-        for field_name, field in _type.fields.items():
-            inner_field_type = get_named_type(field.type)
-            if field_name.startswith('_') or is_enum_or_scalar(inner_field_type):
+def make_edge_objects(schema: GraphQLSchema, selected=None):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        for field_name, _field in index.get_relationship_fields(_type):
+            inner_field_type = get_named_type(_field.type)
+            if field_name.startswith('_') or not is_selected(selected, _type.name, field_name):
                 continue
             edge_from = f'{capitalize(field_name)}EdgeFrom{_type.name}'
-            annotations, _ = get_field_annotations(field)
-            type_type_str = 'type'
-            implements_str = ''
+            annotations, _ = get_field_annotations(_field)
+            fields = [ast.field('id', 'ID!'), ast.field('source', f'{_type.name}!'), ast.field('target', f'{inner_field_type.name}!')]
+            fields += [ast.field(*a) for a in annotations]
             if is_interface_type(_type):
-                type_type_str = 'interface'
-            elif hasattr(_type, 'interfaces') and _type.interfaces:
-                valid_interfaces = []
+                make.append(ast.interface_type(f'_{edge_from}', fields))
+                continue
+            valid_interfaces = []
+            if hasattr(_type, 'interfaces') and _type.interfaces:
                 for interface in _type.interfaces:
-                    if field_name in interface.fields.keys():
+                    if field_name in interface.fields.keys() and is_selected(selected, interface.name, field_name):
                         valid_interfaces.append(interface.name)
-                if valid_interfaces:
-                    implements_str = f'implements '
-                    implements_str += ' & '.join([f'_{capitalize(field_name)}EdgeFrom{interface}' for interface in valid_interfaces])
-            make += f'{type_type_str} _{edge_from} {implements_str}{{id:ID! source: {_type.name}! target: {inner_field_type}! {annotations}}}\n'
+            implements = [f'_{capitalize(field_name)}EdgeFrom{interface}' for interface in valid_interfaces]
+            make.append(ast.object_type(f'_{edge_from}', fields, implements))
 
+    return make
 
-    schema = add_to_schema(schema, make)
-    return schema
 
+def add_edge_objects(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_edge_objects(schema, selected))
 
-def add_fields_for_edge_types(schema: GraphQLSchema, reverse):
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
-            continue
-        for field_name, field in _type.fields.items():
-            inner_field_type = get_named_type(field.type)
-            if field_name.startswith('_') or is_enum_or_scalar(inner_field_type):
+
+def make_fields_for_edge_types(schema: GraphQLSchema, reverse, selected=None, reverse_selected=None):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
+        for field_name, _field in index.get_relationship_fields(_type):
+            inner_field_type = get_named_type(_field.type)
+            if field_name.startswith('_') or not is_selected(selected, _type.name, field_name):
                 continue
 
             edge_from = f'{capitalize(field_name)}EdgeFrom{_type.name}'
             edge_type = schema.get_type('_'+edge_from)
-            full_type = copy_wrapper_structure(edge_type, field.type)
-            type_type_str = 'type'
+            full_type = copy_wrapper_structure(edge_type, _field.type)
+            outgoing = f'_outgoing{capitalize(field_name)}EdgesFrom{_type.name}'
             if is_interface_type(_type):
-                type_type_str = 'interface'
-                implementing_types = schema.get_possible_types(_type)
+                implementing_types = index.get_possible_types(_type)
                 for imp_type in implementing_types:
-                    make += f'extend type {imp_type.name} {{ _outgoing{capitalize(field_name)}EdgesFrom{_type.name}: {full_type} }}\n'
+                    make.append(ast.extend_type(imp_type.name, [ast.field(outgoing, full_type)]))
             
-            make += f'extend {type_type_str} {_type.name} {{ _outgoing{capitalize(field_name)}EdgesFrom{_type.name}: {full_type} }}\n'
-
-            if reverse:
-                directives = {}
-                if hasattr(field, 'ast_node') and field.ast_node is not None:
-                    directives = {directive.name.value: directive for directive in field.ast_node.directives}
-                    
-                if hasattr(_type, 'interfaces'):
-                    for interface in _type.interfaces:
-                        if field_name in interface.fields.keys():
-                            directives = {**directives, **{directive.name.value: directive for directive in interface.fields[field_name].ast_node.directives}}
-
-                if 'uniqueForTarget' in directives:
+            make.append(ast.extend_type(_type.name, [ast.field(outgoing, full_type)], is_interface_type(_type)))
+
+            if reverse and is_selected(reverse_selected, _type.name, field_name):
+                if 'uniqueForTarget' in index.get_field_directives(_type, field_name, inherited=True):
                     edge_to = edge_type
                 else:
                     edge_to = GraphQLList(edge_type)
 
-                inner_connected_types = schema.get_possible_types(inner_field_type) if is_interface_type(inner_field_type) else [inner_field_type]
+                inner_connected_types = index.get_possible_types(inner_field_type) if is_interface_type(inner_field_type) else [inner_field_type]
                 for inner_t in inner_connected_types:
-                    type_type_str = 'type'
                     if is_union_type(inner_t):
                         for sub_type in inner_t.types:
-                            make += f'extend type {sub_type.name} {{ _incoming{edge_from}: {edge_to} }}\n'
+                            make.append(ast.extend_type(sub_type.name, [ast.field(f'_incoming{edge_from}', edge_to)]))
                     else:
-                        if is_interface_type(inner_t):
-                            type_type_str = 'interface'
-                        make += f'extend {type_type_str} {inner_t.name} {{ _incoming{edge_from}: {edge_to} }}\n'
+                        make.append(ast.extend_type(inner_t.name, [ast.field(f'_incoming{edge_from}', edge_to)],
+                                                is_interface_type(inner_t)))
 
-    schema = add_to_schema(schema, make)
-    return schema
+    return make
 
 
-def add_filters_for_edge_types(schema: GraphQLSchema):
+def add_fields_for_edge_types(schema: GraphQLSchema, reverse, selected=None, reverse_selected=None):
+    return add_to_schema(schema, make_fields_for_edge_types(schema, reverse, selected, reverse_selected))
+
+
+def make_filters_for_edge_types(schema: GraphQLSchema):
     """
     Add filters for edges (Hasura-style filters).
     :param schema: schema
     :return: Updated schema
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not _type.name.startswith('_') or not 'EdgeFrom' in _type.name:
-            continue
-        
-        type_short_name = _type.name[1:]
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.edge_types():
+        filter_name = f'_FilterFor{_type.name[1:]}'
+        fields = [ast.input_value('_and', f'[{filter_name}]'), ast.input_value('_or', f'[{filter_name}]'),
+                  ast.input_value('_not', filter_name)]
 
-        make += f'input _FilterFor{type_short_name} {{ ' \
-            f'   _and: [_FilterFor{type_short_name}] ' \
-            f'   _or: [_FilterFor{type_short_name}] ' \
-            f'   _not: _FilterFor{type_short_name} '
-
-        for field_name, field in _type.fields.items():
+        for field_name, _field in _type.fields.items():
             if field_name[0] == '_' and not is_meta_field(field_name):
                 continue
 
             # remove outer required
-            f_type = field.type
+            f_type = _field.type
             if is_non_null_type(f_type):
-                f_type = field.type.of_type
+                f_type = _field.type.of_type
 
             # filters are not supported for lists
-            if is_list_type(field.type):
+            if is_list_type(_field.type):
                 continue
 
             named_type = get_named_type(f_type)
             if is_enum_or_scalar(f_type):
-                make += f'{field_name}: _{named_type.name}Filter '
+                fields.append(ast.input_value(field_name, f'_{named_type.name}Filter'))
 
-        make += '} '
+        make.append(ast.input_type(filter_name, fields))
 
-    schema = add_to_schema(schema, make)
-    return schema
+    return make
 
 
-def add_input_to_create_edge_objects(schema: GraphQLSchema):
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        connected_types = schema.get_possible_types(_type) if is_interface_type(_type) else [_type]
-        for field_name, field in _type.fields.items():
-            inner_field_type = get_named_type(field.type)
-            if field_name.startswith('_') or is_enum_or_scalar(inner_field_type):
+def add_filters_for_edge_types(schema: GraphQLSchema):
+    return add_to_schema(schema, make_filters_for_edge_types(schema))
+
+
+def make_input_to_create_edge_objects(schema: GraphQLSchema, selected=None):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT):
+        connected_types = index.get_possible_types(_type) if is_interface_type(_type) else [_type]
+        for field_name, _field in index.get_relationship_fields(_type):
+            if field_name.startswith('_'):
                 continue
             for t in connected_types:
+                if not is_selected(selected, t.name, field_name):
+                    continue
                 edge_from = f'{capitalize(field_name)}EdgeFrom{t.name}'
                 edge_input = f'_InputToCreate{edge_from}'
                 annotate_input = f'_InputToAnnotate{edge_from}'
-                annotations, is_non_null_string = get_field_annotations(field)
+                annotations, is_non_null_string = get_field_annotations(_field)
+                fields = [ast.input_value('sourceID', 'ID!'), ast.input_value('targetID', 'ID!')]
 
                 if len(annotations) > 0:
                     # Make sure the annotation type actually exists first, and prevent us from defining it multiple times
                     if annotate_input not in schema.type_map:
-                        make += f'input {annotate_input}{{{annotations}}}\n'
+                        make.append(ast.input_type(annotate_input, [ast.input_value(*a) for a in annotations]))
 
-                    make += f'input {edge_input} {{sourceID: ID! targetID: ID! annotations: {annotate_input}{is_non_null_string} }}\n'
-                    
-                else:
-                    make += f'input {edge_input} {{sourceID: ID! targetID: ID!}}\n'
+                    fields.append(ast.input_value('annotations', f'{annotate_input}{is_non_null_string}'))
 
-    schema = add_to_schema(schema, make)
-    return schema
+                make.append(ast.input_type(edge_input, fields))
 
+    return make
 
-def add_input_to_update_edge_objects(schema: GraphQLSchema):
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        connected_types = schema.get_possible_types(_type) if is_interface_type(_type) else [_type]
-        for field_name, field in _type.fields.items():
-            inner_field_type = get_named_type(field.type)
-            if field_name.startswith('_') or is_enum_or_scalar(inner_field_type):
+
+def add_input_to_create_edge_objects(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_input_to_create_edge_objects(schema, selected))
+
+
+def make_input_to_update_edge_objects(schema: GraphQLSchema, selected=None):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT):
+        connected_types = index.get_possible_types(_type) if is_interface_type(_type) else [_type]
+        for field_name, _field in index.get_relationship_fields(_type):
+            if field_name.startswith('_'):
                 continue
             for t in connected_types:
-                annotations, _ = get_field_annotations(field)
+                if not is_selected(selected, t.name, field_name):
+                    continue
+                annotations, _ = get_field_annotations(_field)
                 
                 if len(annotations) > 0:
                     edge_from = f'{capitalize(field_name)}EdgeFrom{t.name}'
                     edge_input = f'_InputToUpdate{edge_from}'
-                    make += f'input {edge_input} {{{annotations}}}\n'
+                    make.append(ast.input_type(edge_input, [ast.input_value(*a) for a in annotations]))
 
-    schema = add_to_schema(schema, make)
-    return schema
+    return make
 
 
-def add_mutation_create_edge_objects(schema: GraphQLSchema):
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        connected_types = schema.get_possible_types(_type) if is_interface_type(_type) else [_type]
-        for field_name, field in _type.fields.items():
-            inner_field_type = get_named_type(field.type)
-            if field_name.startswith('_') or is_enum_or_scalar(inner_field_type):
+def add_input_to_update_edge_objects(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_input_to_update_edge_objects(schema, selected))
+
+
+def make_mutation_create_edge_objects(schema: GraphQLSchema, selected=None):
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT):
+        connected_types = index.get_possible_types(_type) if is_interface_type(_type) else [_type]
+        for field_name, _field in index.get_relationship_fields(_type):
+            if field_name.startswith('_'):
                 continue
             for t in connected_types:
+                if not is_selected(selected, t.name, field_name):
+                    continue
                 edge_from = f'{capitalize(field_name)}EdgeFrom{t.name}'
                 edge_create = f'create{edge_from}'
                 edge_input = f'_InputToCreate{edge_from}'
-                make += f'extend type Mutation{{{edge_create}(data: {edge_input}):_{edge_from}}}\n'
+                make.append(ast.extend_type('Mutation', [ast.field(edge_create, f'_{edge_from}', [ast.input_value('data', edge_input)])]))
 
-    schema = add_to_schema(schema, make)
-    return schema
+    return make
 
 
-def add_mutation_update_edge_objects(schema: GraphQLSchema):
-    make = ''
+def add_mutation_create_edge_objects(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_mutation_create_edge_objects(schema, selected))
 
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        connected_types = schema.get_possible_types(_type) if is_interface_type(_type) else [_type]
-        for field_name, field in _type.fields.items():
-            inner_field_type = get_named_type(field.type)
-            if field_name.startswith('_') or is_enum_or_scalar(inner_field_type):
+
+def make_mutation_update_edge_objects(schema: GraphQLSchema, selected=None):
+    index = get_schema_index(schema)
+    make = []
+
+    for _type in index.db_types(TypeKind.OBJECT):
+        connected_types = index.get_possible_types(_type) if is_interface_type(_type) else [_type]
+        for field_name, _field in index.get_relationship_fields(_type):
+            if field_name.startswith('_'):
                 continue
             for t in connected_types:
-                annotations, _ = get_field_annotations(field)
+                if not is_selected(selected, t.name, field_name):
+                    continue
+                annotations, _ = get_field_annotations(_field)
                 if len(annotations) > 0:
                     edge_from = f'{capitalize(field_name)}EdgeFrom{t.name}'
                     update = f'update{edge_from}'
+                    arguments = [ast.input_value('id', 'ID!'), ast.input_value('data', f'_InputToUpdate{edge_from}!')]
+                    make.append(ast.extend_type('Mutation', [ast.field(update, f'_{edge_from}', arguments)]))
 
-                    make += f'extend type Mutation {{{update}(id: ID!, data: _InputToUpdate{edge_from}!): _{edge_from} }} '
+    return make
 
-    schema = add_to_schema(schema, make)
-    return schema
 
+def add_mutation_update_edge_objects(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_mutation_update_edge_objects(schema, selected))
 
-def add_mutation_delete_edge_objects(schema: GraphQLSchema):
-    make = ''
 
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        connected_types = schema.get_possible_types(_type) if is_interface_type(_type) else [_type]
-        for field_name, field in _type.fields.items():
-            inner_field_type = get_named_type(field.type)
-            if field_name.startswith('_') or is_enum_or_scalar(inner_field_type):
+def make_mutation_delete_edge_objects(schema: GraphQLSchema, selected=None):
+    index = get_schema_index(schema)
+    make = []
+
+    for _type in index.db_types(TypeKind.OBJECT):
+        connected_types = index.get_possible_types(_type) if is_interface_type(_type) else [_type]
+        for field_name, _field in index.get_relationship_fields(_type):
+            if field_name.startswith('_'):
                 continue
             for t in connected_types:
+                if not is_selected(selected, t.name, field_name):
+                    continue
                 edge_from = f'{capitalize(field_name)}EdgeFrom{t.name}'
                 
                 delete = f'delete{edge_from}'
-                make += f'extend type Mutation {{ {delete}(id: ID!): _{edge_from} }} '
+                make.append(ast.extend_type('Mutation', [ast.field(delete, f'_{edge_from}', [ast.input_value('id', 'ID!')])]))
+
+    return make
 
-    schema = add_to_schema(schema, make)
-    return schema
+
+def add_mutation_delete_edge_objects(schema: GraphQLSchema, selected=None):
+    return add_to_schema(schema, make_mutation_delete_edge_objects(schema, selected))
 
 
 def remove_field_arguments_for_types(schema: GraphQLSchema):
+    index = get_schema_index(schema)
     keep_args = ['filter']
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
-            continue
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
         for field_name, field in _type.fields.items():
             args = {}
             for arg in field.args:
@@ -935,77 +968,172 @@ def remove_field_arguments_for_types(schema: GraphQLSchema):
     return schema
 
 
-def add_enum_filters(schema: GraphQLSchema):
+def remove_unreachable_types(schema: GraphQLSchema):
     """
-    Add filter inputs for enums (Hasura-style).
+    Remove the generated types (the types whose names start with '_') that are not reachable from Query, Mutation or
+    the other types that are not generated, e.g., the filters of scalars that no field has, or inputs that no mutation
+    takes.
     :param schema:
     :return:
     """
-    make = ''
-    for enum_name, enum in schema.type_map.items():
-        if not is_enum_type(enum) or is_introspection_type(enum):
+    # the types that are not generated, and the argument types of the directives, are kept
+    queue = [_type for type_name, _type in schema.type_map.items() if not type_name.startswith('_')]
+    queue += [get_named_type(arg.type) for _dir in schema.directives for arg in _dir.args.values()]
+    reachable = set()
+    while queue:
+        _type = queue.pop()
+        if _type.name in reachable:
             continue
+        reachable.add(_type.name)
+        queue += _get_referenced_types(_type)
 
-        make += f'input _{enum_name}Filter {{' \
-            f'   _eq: {enum_name} ' \
-            f'   _neq: {enum_name} ' \
-            f'   _in: [{enum_name}] ' \
-            f'   _nin: [{enum_name}] ' \
-            f'}} '
-    schema = add_to_schema(schema, make)
+    for type_name in list(schema.type_map.keys()):
+        if type_name.startswith('_') and not type_name.startswith('__') and type_name not in reachable:
+            schema.type_map.pop(type_name)
     return schema
 
 
-def add_create_mutations(schema: GraphQLSchema):
+def _get_referenced_types(_type: GraphQLNamedType):
+    # the named types of the fields, arguments, interfaces and union members of a type
+    referenced = []
+    if is_union_type(_type):
+        referenced += _type.types
+    if is_object_type(_type) or is_interface_type(_type):
+        referenced += _type.interfaces
+    if hasattr(_type, 'fields'):
+        for field in _type.fields.values():
+            referenced.append(get_named_type(field.type))
+            referenced += [get_named_type(arg.type) for arg in getattr(field, 'args', {}).values()]
+    return referenced
+
+
+def merge_identical_filters(schema: GraphQLSchema):
+    """
+    Merge the filter inputs that have the same fields, e.g., the filters of two types with the same fields, or
+    _StringFilter and _IDFilter. The first of the identical filters in the schema is kept, and arguments and input
+    fields of the other filters are changed to it. A filter referring to itself (e.g., in _and) is identical to another
+    filter referring to itself in the same way. Merging is repeated until no filters are identical, since merging
+    filters can make the filters using them identical.
+    :param schema:
+    :return:
+    """
+    while True:
+        kept = {}
+        merged = {}
+        for type_name, _type in schema.type_map.items():
+            if not is_input_object_type(_type) or not (type_name.startswith('_FilterFor') or
+                                                       (type_name.startswith('_') and type_name.endswith('Filter'))):
+                continue
+            signature = tuple(sorted((field_name, _get_type_signature(field.type, type_name), repr(field.default_value))
+                                     for field_name, field in _type.fields.items()))
+            if signature in kept:
+                merged[type_name] = schema.type_map[kept[signature]]
+            else:
+                kept[signature] = type_name
+        if not merged:
+            return schema
+
+        for _type in schema.type_map.values():
+            if is_input_object_type(_type):
+                for field in _type.fields.values():
+                    field.type = _replace_named_type(field.type, merged)
+            elif is_object_type(_type) or is_interface_type(_type):
+                for field in _type.fields.values():
+                    for arg in field.args.values():
+                        arg.type = _replace_named_type(arg.type, merged)
+        for type_name in merged:
+            schema.type_map.pop(type_name)
+
+
+def _get_type_signature(_type: GraphQLType, self_name: str):
+    # the type as a string, where the type with the given name is replaced by $
+    if is_non_null_type(_type):
+        return _get_type_signature(_type.of_type, self_name) + '!'
+    if is_list_type(_type):
+        return '[' + _get_type_signature(_type.of_type, self_name) + ']'
+    return '$' if _type.name == self_name else _type.name
+
+
+def _replace_named_type(_type: GraphQLType, replacements: dict):
+    # the type with its named type replaced if it is in replacements (by name), keeping the wrapper structure
+    named_type = get_named_type(_type)
+    if named_type.name not in replacements:
+        return _type
+    return copy_wrapper_structure(replacements[named_type.name], _type)
+
+
+def make_enum_filters(schema: GraphQLSchema):
+    """
+    Add filter inputs for enums (Hasura-style).
+    :param schema:
+    :return:
+    """
+    index = get_schema_index(schema)
+    make = []
+    for enum in index.types(TypeKind.ENUM):
+        make.append(_make_filter(f'_{enum.name}Filter', enum.name, ['_eq', '_neq', '_in', '_nin']))
+    return make
+
+
+def add_enum_filters(schema: GraphQLSchema):
+    return add_to_schema(schema, make_enum_filters(schema))
+
+
+def make_create_mutations(schema: GraphQLSchema):
     """
     Add mutations for creating object types.
     :param schema:
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT):
         create = f'create{_type.name}'
-        input_type = f'_InputToCreate{_type.name}'
-        make += f'extend type Mutation {{ {create}(data: {input_type}!): {_type.name} }} '
-    schema = add_to_schema(schema, make)
+        input_type_name = f'_InputToCreate{_type.name}'
+        make.append(ast.extend_type('Mutation', [ast.field(create, _type.name, [ast.input_value('data', f'{input_type_name}!')])]))
+    return make
 
-    return schema
 
+def add_create_mutations(schema: GraphQLSchema):
+    return add_to_schema(schema, make_create_mutations(schema))
 
-def add_update_mutations(schema: GraphQLSchema):
+
+def make_update_mutations(schema: GraphQLSchema):
     """
     Add mutations for updating object types.
     :param schema:
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_interface_type(_type) or is_union_type(_type):
-            continue
-        update = f'update{capitalize(_type.name)} '
-        input_type = f'_InputToUpdate{_type.name}'
-        make += f'extend type Mutation {{ {update}(id: ID!, data: {input_type}!): {_type.name} }} '
-    schema = add_to_schema(schema, make)
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT):
+        update = f'update{capitalize(_type.name)}'
+        input_type_name = f'_InputToUpdate{_type.name}'
+        arguments = [ast.input_value('id', 'ID!'), ast.input_value('data', f'{input_type_name}!')]
+        make.append(ast.extend_type('Mutation', [ast.field(update, _type.name, arguments)]))
+    return make
 
-    return schema
 
+def add_update_mutations(schema: GraphQLSchema):
+    return add_to_schema(schema, make_update_mutations(schema))
 
-def add_delete_mutations(schema: GraphQLSchema):
+
+def make_delete_mutations(schema: GraphQLSchema):
     """
     Add mutations for deleting object types.
     :param schema:
     :return:
     """
-    make = ''
-    for _type in schema.type_map.values():
-        if not is_db_schema_defined_type(_type) or is_union_type(_type):
-            continue
+    index = get_schema_index(schema)
+    make = []
+    for _type in index.db_types(TypeKind.OBJECT, TypeKind.INTERFACE):
         delete = f'delete{_type.name}'
-        make += f'extend type Mutation {{ {delete}(id: ID!): {_type.name} }} '
-    schema = add_to_schema(schema, make)
-    return schema
+        make.append(ast.extend_type('Mutation', [ast.field(delete, _type.name, [ast.input_value('id', 'ID!')])]))
+    return make
+
+
+def add_delete_mutations(schema: GraphQLSchema):
+    return add_to_schema(schema, make_delete_mutations(schema))
 
 
 def ast_type_to_string(_type: GraphQLType):
@@ -1100,52 +1228,60 @@ def get_directive_arguments(directive):
     return output
 
 
-def get_field_directives(field_name, _type, schema):
+def get_field_directives(field_name, _type, schema, table: dict = None):
     """
     Get the directives of given field, and return them as string
     :param field:
     :param field_name:
     :param _type:
     :param schema:
+    :param table: optional dict in which the directive strings are memoized, by (type name, field name)
     :return string:
     """
+    target, ignored = _get_directive_target(_type, schema)
+    return _get_field_directives_of_target(field_name, target, ignored, {} if table is None else table)
 
-    if field_name == '_dummy':
-        return ''
-
-    output = ''
-
-    # Used to make sure we don't add the same directive multiple times to the same field
-    directives_set = set()
 
+def _get_directive_target(_type, schema):
+    # the type whose field directives are output for the fields of _type, and the directive to leave out
     if is_input_type(_type):
         # Get the target type instead (unless it is a filter or delete input, then we dont care)
         # We also ignore @required directives for inputs
-        if _type.name[:14] == '_InputToUpdate':
-            directives_set.add('required')
-            _type = schema.get_type(_type.name[14:])
-
-        elif _type.name[:14] == '_InputToCreate':
-            _type = schema.get_type(_type.name[14:])
-            directives_set.add('required')
+        if _type.name[:14] == '_InputToUpdate' or _type.name[:14] == '_InputToCreate':
+            return schema.get_type(_type.name[14:]), 'required'
+        return None, None
+    return _type, None
 
-        else: 
-            return ''
 
+def _get_field_directives_of_target(field_name, target, ignored, table: dict):
     # We got type without fields, just return empty
-    if not hasattr(_type, 'fields'):
+    if field_name == '_dummy' or not hasattr(target, 'fields'):
         return ''
 
+    # The inputs reuse the directives of the fields of their target type
+    entries = _get_field_directive_entries(field_name, target, table)
+    return ''.join(directive_str for name, directive_str in entries if name != ignored)
+
+
+def _get_field_directive_entries(field_name, _type, table: dict):
+    # the directives of a field of an object or interface type, as a list of (name, string) tuples,
+    # where the name is what the directive is deduplicated by
+    key = (_type.name, field_name)
+    if key in table:
+        return table[key]
+
     # Get the field from the correct type
     field = _type.fields[field_name]
 
+    # Used to make sure we don't add the same directive multiple times to the same field
+    directives_set = set()
+    entries = []
+
     # Get all directives directly on field
     for directive in field.ast_node.directives:
         if not directive.name.value in directives_set:
-            output+= ' @' + directive.name.value  
+            entries.append((directive.name.value, ' @' + directive.name.value + get_directive_arguments(directive)))
             directives_set.add(directive.name.value)
-            output += get_directive_arguments(directive)
-                            
 
     if hasattr(_type, 'interfaces'):
         # Get all inherited directives
@@ -1154,21 +1290,21 @@ def get_field_directives(field_name, _type, schema):
                 for directive in interface.fields[field_name].ast_node.directives:
                     directive_str = directive_from_interface(directive, interface.name)
                     if not directive_str in directives_set:
-                        output+= ' @' + directive_str
+                        entries.append((directive_str, ' @' + directive_str))
                         directives_set.add(directive_str)
 
-    return output
+    table[key] = entries
+    return entries
 
 
-def get_type_directives(_type, schema):
+def get_type_directives(_type, schema, table: dict = None):
     """
     Get the directives of given type, or target type if create- or update-input
     :param type:
+    :param table: optional dict in which the directive strings are memoized, by (type name, None)
     :return string:
     """
 
-    output = ''
-
     if is_input_type(_type):
         # Get the target type instead (unless it is a filter or delete input, then we dont care)
         if _type.name[:14] == '_InputToUpdate':
@@ -1179,12 +1315,21 @@ def get_type_directives(_type, schema):
         else: 
             return ''
 
+    if _type is None:
+        return ''
+    if table is not None and (_type.name, None) in table:
+        return table[(_type.name, None)]
+
+    output = ''
+
     if hasattr(_type, 'ast_node') and _type.ast_node is not None:
         # Get directives on type
         for directive in _type.ast_node.directives:
             output+= ' @' + directive.name.value
             output += get_directive_arguments(directive)
 
+    if table is not None:
+        table[(_type.name, None)] = output
     return output
 
 
@@ -1220,6 +1365,27 @@ def print_schema_with_directives(schema):
     :param schema:
     :return string:
     """
+    return ''.join(iter_schema_with_directives(schema))
+
+
+def write_schema_with_directives(schema, out):
+    """
+    Writes the given schema to a file, one type definition at a time (see iter_schema_with_directives).
+    :param schema:
+    :param out: file object
+    :return:
+    """
+    for chunk in iter_schema_with_directives(schema):
+        out.write(chunk)
+
+
+def iter_schema_with_directives(schema):
+    """
+    Outputs the given schema in the format of print_schema_with_directives, as a sequence of chunks: the directive
+    definitions, followed by one chunk per type. The whole output is never held in memory at once.
+    :param schema:
+    :return: generator of strings
+    """
     manual_directives = {
         'directive': 'directive @export(as: String!) on FIELD',
         'required': 'directive @required on FIELD_DEFINITION',
@@ -1231,24 +1397,28 @@ def print_schema_with_directives(schema):
         '_requiredForTarget_AccordingToInterface': 'directive @_requiredForTarget_AccordingToInterface(interface: String!) on FIELD_DEFINITION | INPUT_FIELD_DEFINITION',
         '_uniqueForTarget_AccordingToInterface': 'directive @_uniqueForTarget_AccordingToInterface(interface: String!) on FIELD_DEFINITION | INPUT_FIELD_DEFINITION'
     }
-    output = ''
+    output = []
     # Add directives
     for _dir in schema.directives:
         # Skip non-user defined directives
         if _dir.ast_node is None or _dir.name in manual_directives.keys():
             continue
 
-        output += f'directive @{_dir.name}'
+        output.append(f'directive @{_dir.name}')
         if _dir.ast_node.arguments:
             args = ', '.join([f'{arg.name.value}: {ast_type_to_string(arg.type)}' for arg in _dir.ast_node.arguments])
-            output += f'({args})'
+            output.append(f'({args})')
+
+        output.append(' on ' + ' | '.join([loc.name for loc in _dir.locations]))
+        output.append('\n\n')
 
-        output += ' on ' + ' | '.join([loc.name for loc in _dir.locations])
-        output += '\n\n'
-        
     # Manually handled directives
     for _dir in manual_directives.values():
-        output += _dir + '\n\n'
+        output.append(_dir + '\n\n')
+    yield ''.join(output)
+
+    # The directive strings of each type and field, shared by the types and the inputs to create and update them
+    directive_table = {}
 
     # For each type, and output the types sorted by name
     for _type in sorted(schema.type_map.values(), key=lambda x: x.name):
@@ -1256,60 +1426,62 @@ def print_schema_with_directives(schema):
         if _type.name.startswith('__'):
             continue
 
+        output = []
         if is_interface_type(_type):
-            output += 'interface ' + _type.name
+            output.append('interface ' + _type.name)
         elif is_enum_type(_type):
-            output += 'enum ' + _type.name
+            output.append('enum ' + _type.name)
         elif is_scalar_type(_type):
             # Skip non-user defined directives
             if _type.ast_node is not None:
-                output += 'scalar ' + _type.name
+                output.append('scalar ' + _type.name)
         elif is_input_type(_type):
-            output += 'input ' + _type.name
+            output.append('input ' + _type.name)
         elif is_union_type(_type):
-            output += 'union ' + _type.name
+            output.append('union ' + _type.name)
         else:
-            output += 'type ' + _type.name
+            output.append('type ' + _type.name)
             if hasattr(_type, 'interfaces') and _type.interfaces:
-                output += ' implements '
-                output += ' & '.join([interface.name for interface in _type.interfaces])
-                
+                output.append(' implements ')
+                output.append(' & '.join([interface.name for interface in _type.interfaces]))
+
         if is_enum_type(_type):
             # For enums we can get the values directly and add them
-            output += ' {\n'
-            for value in _type.values: 
-                output += '  ' + value + '\n'
-            output += '}'
+            output.append(' {\n')
+            for value in _type.values:
+                output.append('  ' + value + '\n')
+            output.append('}')
 
         elif is_union_type(_type):
             # For enums we can get the invloved types directly and add them
-            output += ' = '
-            output += ' | '.join([inner_type.name for inner_type in _type.types])
+            output.append(' = ')
+            output.append(' | '.join([inner_type.name for inner_type in _type.types]))
 
         elif not is_enum_or_scalar(_type):
             # This should be a type, or an interface
             # Get directives on type
-            output += get_type_directives(_type, schema)
-            output += ' {\n'
+            output.append(get_type_directives(_type, schema, directive_table))
+            output.append(' {\n')
 
             # Get fields
-            for field_name, field in _type.fields.items(): 
-                output += '  ' + field_name
-                
+            target, ignored = _get_directive_target(_type, schema)
+            for field_name, field in _type.fields.items():
+                output.append('  ' + field_name)
+
                 # Get arguments for field
                 if hasattr(field, 'args') and field.args:
                     args = ', '.join([f'{get_argument_as_string(arg_name, arg)}' for arg_name, arg in field.args.items()])
-                    output += f'({args})'
+                    output.append(f'({args})')
 
-                output += ': ' + str(field.type)
+                output.append(': ' + str(field.type))
 
                 # Add directives
-                output += get_field_directives(field_name, _type, schema)
-                output += '\n'
-           
-            output += '}'
-        
+                output.append(_get_field_directives_of_target(field_name, target, ignored, directive_table))
+                output.append('\n')
+
+            output.append('}')
+
         if _type.ast_node is not None:
-            output += '\n\n'
+            output.append('\n\n')
 
-    return output
+        yield ''.join(output)
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+
+def get_modification_times(paths, ignore=()):
+    """
+    Get the modification times (and sizes) of the given files, and of the .graphql files in the given directories.
+    :param paths: files (separated by commas) and directories, missing files are included as None
+    :param ignore: files to leave out, e.g. output files in a watched directory
+    :return dict: path, (modification time, size) or None
+    """
+    ignore = {os.path.abspath(file) for file in ignore if file}
+    times = {}
+    for path in paths:
+        if not path:
+            continue
+        if os.path.isdir(path):
+            files = [f'{path}/{filename}' for filename in sorted(os.listdir(path)) if filename.endswith('.graphql')]
+        else:
+            files = path.split(',')
+        for file in files:
+            if os.path.abspath(file) in ignore:
+                continue
+            try:
+                stat = os.stat(file)
+                times[file] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                times[file] = None
+    return times
+
+
+def watch(paths, on_change, interval: float = 0.5, ignore=()):
+    """
+    Call on_change now, and again whenever any of the watched files is added, removed or modified, until interrupted.
+    Errors raised by on_change are reported to stderr without stopping the watch.
+    :param paths: files and directories to watch (see get_modification_times)
+    :param on_change: function without arguments
+    :param interval: seconds between checks for changes
+    :param ignore: files not to watch, e.g. the files written by on_change
+    :return:
+    """
+    last = None
+    try:
+        while True:
+            times = get_modification_times(paths, ignore)
+            if times != last:
+                last = times
+                start = time.perf_counter()
+                try:
+                    on_change()
+                    print(f'[watch] regenerated in {(time.perf_counter() - start) * 1000:.0f} ms', file=sys.stderr)
+                except Exception as e:
+                    print(f'[watch] {type(e).__name__}: {e}', file=sys.stderr)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
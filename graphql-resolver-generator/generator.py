@@ -1,13 +1,23 @@
 import argparse
+import os
 import yaml
 
 import yaml
 from graphql import build_schema, is_object_type, get_named_type, is_interface_type, assert_valid_schema, is_input_type, is_union_type
+import mako
+from graphql import version as graphql_version
 from mako.template import Template
 
 import sys
-sys.path.insert(1, '../graphql-api-generator')
+generator_dir = os.path.dirname(os.path.abspath(__file__))
+api_generator_dir = os.path.join(generator_dir, '..', 'graphql-api-generator')
+sys.path.insert(1, api_generator_dir)
 from utils.utils import is_enum_or_scalar
+from utils.cache import BuildCache, get_cache_key, get_source_files
+from utils.watch import watch
+
+# the template of the resolvers, next to the generator
+template_file = os.path.join(generator_dir, 'resources', 'resolver.template')
 
 
 def is_schema_defined_object_type(_type):
@@ -26,7 +36,20 @@ def pascalCase(s):
     return s[0].upper() + s[1:]
 
 
-def generate(input_file, output_dir, config: dict):
+def generate(input_file, output_dir, config: dict, config_file=None, cache_dir=None):
+    # check the cache, the key covers the input file, the config, the template, the generator itself and the versions of
+    # graphql-core and Mako
+    cache = None
+    if cache_dir:
+        cache = BuildCache(cache_dir)
+        files = [input_file] + ([config_file] if config_file else []) + [template_file]
+        files += get_source_files(os.path.abspath(__file__), os.path.join(api_generator_dir, 'utils'))
+        key = get_cache_key(files, 'resolvers', graphql_version, mako.__version__)
+        output = cache.get(key)
+        if output is not None:
+            write_output(output, output_dir)
+            return
+
     # load schema
     with open(input_file, 'r') as f:
         schema_string = f.read()
@@ -34,6 +57,11 @@ def generate(input_file, output_dir, config: dict):
 
     data = {'types': [], 'types_by_key': [], 'interfaces': [], 'unions': [], 'typeDelete': [], 'edge_types_to_delete': [], 'edge_types_to_update': [], 'edge_objects': []}
 
+    # the generation options may leave out queries, mutations and edge types for some types (or fields), resolvers are
+    # only added for the ones in the schema
+    data['queries'] = set(schema.type_map['Query'].fields) if 'Query' in schema.type_map else set()
+    data['mutations'] = set(schema.type_map['Mutation'].fields) if 'Mutation' in schema.type_map else set()
+
     # get list of types
     for type_name, _type in schema.type_map.items():
         if is_union_type(_type):
@@ -67,6 +95,8 @@ def generate(input_file, output_dir, config: dict):
                     t['DateTime'].append(field_name)
                 if field_name[0] == '_':
                     continue
+                if f'_{pascalCase(field_name)}EdgeFrom{type_name}' not in schema.type_map:
+                    continue
                 if is_schema_defined_object_type(inner_field_type) or is_interface_type(inner_field_type) or is_union_type(inner_field_type):
                     t['edgeFieldEndpoints'].append((pascalCase(field_name), inner_field_type))
 
@@ -94,15 +124,44 @@ def generate(input_file, output_dir, config: dict):
     data['edge_objects'].sort()
 
     # apply template
-    template = Template(filename=f'resources/resolver.template')
+    template = get_template(template_file)
+    output = template.render(data=data)
+    if output_dir is not None:
+        assert_valid_schema(schema)
+    if cache is not None:
+        cache.put(key, output)
+    write_output(output, output_dir)
+
+
+def get_template(filename):
+    """
+    Get the compiled Mako template in a file. Templates are compiled once per process, and again only if the file
+    is modified, which matters in watch mode.
+    :param filename:
+    :return Template:
+    """
+    modified = os.stat(filename).st_mtime_ns
+    if filename not in _templates or _templates[filename][0] != modified:
+        _templates[filename] = (modified, Template(filename=filename))
+    return _templates[filename][1]
+
+
+# the compiled templates, by file name, with their modification times
+_templates = {}
+
+
+def write_output(output, output_dir):
+    """
+    Write the resolvers to resolvers.js in output_dir, or to stdout if no output directory is given.
+    :param output:
+    :param output_dir:
+    :return:
+    """
     if output_dir is None:
-        print(template.render(data=data))
+        print(output)
     else:
         with open(f'{output_dir}/resolvers.js', 'w') as f:
-            updated_schema_string = template.render(data=data)
-            api_schema = build_schema(schema_string)
-            assert_valid_schema(api_schema)
-            f.write(updated_schema_string)
+            f.write(output)
 
 
 def is_there_field_annotations(_type):
@@ -142,7 +201,30 @@ def cmd(args):
         with open(args.config) as f:
             config = yaml.safe_load(f)
 
-    generate(args.input, args.output, config)
+    if args.watch:
+        run_watch(args.input, args.output, args.config)
+        return
+
+    generate(args.input, args.output, config, args.config, args.cache_dir)
+
+
+def run_watch(input_file, output_dir, config_file=None):
+    """
+    Generate the resolvers, and regenerate them whenever the API schema, the config or the template changes, until
+    interrupted. The compiled template is kept in memory (see get_template).
+    :param input_file:
+    :param output_dir:
+    :param config_file:
+    :return:
+    """
+    def regenerate():
+        config = {}
+        if config_file:
+            with open(config_file) as f:
+                config = yaml.safe_load(f)
+        generate(input_file, output_dir, config, config_file)
+
+    watch([input_file, config_file, template_file], regenerate)
 
 
 if __name__ == '__main__':
@@ -153,4 +235,9 @@ if __name__ == '__main__':
                         help='Output directory for resolver.js file')
     parser.add_argument('--config', type=str,
                         help='Path to configuration file')
+    parser.add_argument('--cache-dir', type=str,
+                        help='Directory for caching generated resolvers (default no caching)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and regenerate the resolvers whenever the input, the config or the '
+                             'template changes')
     cmd(parser.parse_args())
@@ -1,17 +1,30 @@
 const { makeServer } = require('./server');
-const { readFileSync } = require('fs');
+const { existsSync, readFileSync } = require('fs');
 require('dotenv').config();
 
 const baseSchema = readFileSync(process.env.API_SCHEMA || './resources/api-schema.graphql', 'utf8');
 const customSchema = readFileSync(process.env.CUSTOM_API_SCHEMA || './resources/custom-api-schema.graphql', 'utf8');
 const resolvers = require(process.env.RESOLVERS || './resources/resolvers.js', 'utf8');
 const customResolvers = require(process.env.CUSTOM_RESOLVERS || './resources/custom-resolvers.js', 'utf8');
+const indexManifestFile = process.env.INDEX_MANIFEST || './resources/index-manifest.json';
+const indexManifest = existsSync(indexManifestFile) ? JSON.parse(readFileSync(indexManifestFile, 'utf8')) : null;
+const costManifestFile = process.env.COST_MANIFEST || './resources/cost-manifest.json';
+const costManifest = existsSync(costManifestFile) ? JSON.parse(readFileSync(costManifestFile, 'utf8')) : null;
+const maxQueryCost = process.env.MAX_QUERY_COST ? Number(process.env.MAX_QUERY_COST) : undefined;
+if (maxQueryCost !== undefined && !(Number.isFinite(maxQueryCost) && maxQueryCost > 0)) {
+    // NaN would silently disable the limit
+    console.error(`Invalid MAX_QUERY_COST '${process.env.MAX_QUERY_COST}', expected a positive number`);
+    process.exit(1);
+}
 
 let options = {
     baseSchema,
     customSchema,
     resolvers,
     customResolvers,
+    indexManifest,
+    costManifest,
+    'maxQueryCost': maxQueryCost,
     'driver': process.env.DRIVER || 'arangodb',
     'dbName': process.env.DB_NAME || 'dev-db',
     'dbUrl': process.env.DB_URL || 'http://localhost:8529',
@@ -0,0 +1,100 @@
+/**
+ * Scoring of operations against the cost manifest generated by the API generator (--cost-manifest). The cost of an
+ * operation is the number of collection reads it may cause: each field in the manifest costs its cost (e.g. the number
+ * of implementations of an interface) times the number of times it is resolved, which is the product of the sizes of
+ * the fields above it. The size of the content of a list query is its first argument (or the default), the size of
+ * other list fields is assumed by the manifest.
+ */
+
+/**
+ * Get the cost of an operation.
+ *
+ * @param manifest
+ * @param document
+ * @param operation
+ * @param variables
+ * @returns {number}
+ */
+function getOperationCost(manifest, document, operation, variables = {}) {
+    let fragments = {};
+    for (let definition of document.definitions) {
+        if (definition.kind === 'FragmentDefinition') {
+            fragments[definition.name.value] = definition;
+        }
+    }
+    let rootType = operation.operation === 'mutation' ? 'Mutation' : 'Query';
+    return getSelectionSetCost(manifest, operation.selectionSet, rootType, 1, fragments, variables);
+}
+
+/**
+ * Get the cost of a selection set on a type, resolved a given number of times.
+ *
+ * @param manifest
+ * @param selectionSet
+ * @param typeName
+ * @param multiplier
+ * @param fragments
+ * @param variables
+ * @param contentSize the size of the content, if the type is the result of a list query
+ * @returns {number}
+ */
+function getSelectionSetCost(manifest, selectionSet, typeName, multiplier, fragments, variables, contentSize = 1) {
+    let cost = 0;
+    if (!selectionSet) {
+        return cost;
+    }
+    for (let selection of selectionSet.selections) {
+        if (selection.kind === 'FragmentSpread') {
+            let fragment = fragments[selection.name.value];
+            cost += getSelectionSetCost(manifest, fragment.selectionSet, fragment.typeCondition.name.value,
+                multiplier, fragments, variables, contentSize);
+        } else if (selection.kind === 'InlineFragment') {
+            let fragmentType = selection.typeCondition ? selection.typeCondition.name.value : typeName;
+            cost += getSelectionSetCost(manifest, selection.selectionSet, fragmentType, multiplier, fragments,
+                variables, contentSize);
+        } else {
+            let field = (manifest.types[typeName] || {})[selection.name.value];
+            if (!field) {
+                continue; // scalars, enums and fields that are not resolved from the database
+            }
+            cost += multiplier * field.cost;
+            if (field.first !== undefined) {
+                // list query, the first argument sets the size of the content
+                let first = getArgumentValue(selection, 'first', variables);
+                let size = first === undefined || first === null ? field.first : first;
+                cost += getSelectionSetCost(manifest, selection.selectionSet, field.type, multiplier, fragments,
+                    variables, size);
+            } else {
+                let size = field.kind === 'list content' ? contentSize : field.size;
+                cost += getSelectionSetCost(manifest, selection.selectionSet, field.type, multiplier * size,
+                    fragments, variables);
+            }
+        }
+    }
+    return cost;
+}
+
+/**
+ * Get the value of an (integer) argument of a field.
+ *
+ * @param fieldNode
+ * @param name
+ * @param variables
+ * @returns {number|undefined}
+ */
+function getArgumentValue(fieldNode, name, variables) {
+    for (let argument of fieldNode.arguments || []) {
+        if (argument.name.value !== name) {
+            continue;
+        }
+        if (argument.value.kind === 'Variable') {
+            return variables[argument.value.name.value];
+        }
+        if (argument.value.kind === 'IntValue') {
+            return parseInt(argument.value.value, 10);
+        }
+    }
+    return undefined;
+}
+
+module.exports = { getOperationCost };
@@ -44,6 +44,15 @@ module.exports = {
     getEdgeEndpoint: async function (parent, args, info) {
         return await getEdgeEndpoint(parent, args, info)
     },
+    load: async function (id, returnType, context, schema) {
+        return await load(id, returnType, context, schema);
+    },
+    loadEdge: async function (parent, args, context, info) {
+        return await loadEdge(parent, args, context, info);
+    },
+    loadEdgeEndpoint: async function (parent, args, context, info) {
+        return await loadEdgeEndpoint(parent, args, context, info);
+    },
     getList: async function (args, info) {
         return await getList(args, info);
     },
@@ -99,6 +108,9 @@ async function init(args) {
     await createAndUseDatabase(db, dbName);
     await createTypeCollections(db, schema);
     await createEdgeCollections(db, schema);
+    if (args.indexManifest) {
+        await createIndexes(db, args.indexManifest);
+    }
 }
 
 /**
@@ -181,6 +193,37 @@ async function createEdgeCollections(db, schema) {
     }
 }
 
+/**
+ * Create the indexes listed in an index manifest (generated by the API generator with --index-manifest). Creating an
+ * index that already exists with the same definition has no effect, so this is safe to run on every start.
+ *
+ * @param db
+ * @param manifest
+ * @returns {Promise<void>}
+ */
+async function createIndexes(db, manifest) {
+    for (let index of manifest.indexes || []) {
+        let collection = db.collection(index.collection);
+        let details = {
+            'type': index.type,
+            'fields': index.fields,
+            'name': index.name,
+            'unique': index.unique,
+            'sparse': index.sparse
+        };
+        await collection.createIndex(details).then(
+            (res) => {
+                if (res.isNewlyCreated) {
+                    console.info(`Index '${index.name}' on '${index.collection}' created`);
+                }
+            },
+            err => {
+                console.warn(`Index '${index.name}' on '${index.collection}' not created:`, err.response.body['errorMessage']);
+            }
+        );
+    }
+}
+
 /**
  * Return the key name corresponding to a given type.
  *
@@ -827,44 +870,19 @@ function deleteObject(isRoot, ctxt, varOrID, typeToDelete, info, resVar = null)
 /* Queries */
 
 /**
- * Get type or interface by ID.
+ * Get type or interface by ID. The collection of the object is the prefix of its ID, so the object is looked up by its
+ * primary key if the collection is one of the possible types, rather than scanning the collections of all of them.
  * @param id
  * @param returnType
  * @param schema
  * @returns {Promise<*>}
  */
 async function get(id, returnType, schema) {
-    let type = returnType;
-    let query = [aql`FOR i IN`];
-    if (graphql.isInterfaceType(type) || graphql.isUnionType(type)) {
-        let possible_types = schema.getPossibleTypes(type);
-        if (possible_types.length > 1) {
-            query.push(aql`UNION(`);
-        }
-        for (let i in possible_types) {
-            if (i != 0) {
-                query.push(aql`,`);
-            }
-            let typeName = possible_types[i].name;
-            if (typeName.startsWith('_'))
-                typeName = typeName.substr(1)
-            let collection = db.collection(typeName);
-            query.push(aql`(FOR x IN ${collection} FILTER(x._id == ${id}) RETURN x)`);
-        }
-        if (possible_types.length > 1) {
-            query.push(aql`)`);
-        }
-    } else {
-        let typeName = type.name;
-        if (typeName.startsWith('_'))
-            typeName = typeName.substr(1)
-        let collection = db.collection(typeName);
-        query.push(aql`${collection} FILTER(i._id == ${id})`);
+    if (!isIdOfType(id, getCollectionNames(returnType, schema))) {
+        return null;
     }
-
-    query.push(aql` RETURN i`);
     try {
-        let q = aql.join(query);
+        let q = aql`RETURN DOCUMENT(${id})`;
         console.debug(q);
         const cursor = await db.query(q);
         return await cursor.next();
@@ -874,6 +892,33 @@ async function get(id, returnType, schema) {
     }
 }
 
+/**
+ * Get the names of the collections holding the objects of a type, interface or union (possible types of edge types
+ * are stored without the leading underscore).
+ *
+ * @param type
+ * @param schema
+ * @returns {string[]}
+ */
+function getCollectionNames(type, schema) {
+    let types = graphql.isInterfaceType(type) || graphql.isUnionType(type) ? schema.getPossibleTypes(type) : [type];
+    return types.map(t => t.name.startsWith('_') ? t.name.substr(1) : t.name);
+}
+
+/**
+ * Check if an ID is the ID of a document in one of the given collections.
+ *
+ * @param id
+ * @param collections
+ * @returns {boolean}
+ */
+function isIdOfType(id, collections) {
+    if (typeof id !== 'string' || !id.includes('/')) {
+        return false;
+    }
+    return collections.includes(id.substr(0, id.indexOf('/')));
+}
+
 /**
  * Get the source/target of a given edge field connected to parent.
  *
@@ -883,52 +928,9 @@ async function get(id, returnType, schema) {
  * @returns {Promise<*>}
  */
 async function getEdgeEndpoint(parent, args, info) {
-    let parent_type = graphql.getNamedType(info.parentType);
     let return_type = graphql.getNamedType(info.returnType);
-
-    let field_name = info.fieldName;
-    if (info.fieldName.startsWith('_')) { // reverse edge
-        let pattern_string = `^_(.+?)From${return_type.name}$`; // get the non-reversed edge name
-        let re = new RegExp(pattern_string);
-        field_name = re.exec(info.fieldName)[1];
-    }
-
-    // Create query
-    let query = [aql`FOR x IN`];
-    if (info.fieldName.startsWith('_')) {
-        // If the type that is the origin of the edge is an interface, then we need to check all the edge collections
-        // corresponding to its implementing types. Note: This is only necessary when traversing some edges that are
-        // defined in in the API schema for interfaces. The parent type will never be an interface type at this stage.
-        if (graphql.isInterfaceType(return_type)) {
-            let possible_types = info.schema.getPossibleTypes(return_type);
-            if (possible_types.length > 1) query.push(aql`UNION(`);
-            for (let i in possible_types) {
-                if (i != 0) query.push(aql`,`);
-                let collection = db.collection(getEdgeCollectionName(possible_types[i].name, field_name));
-                query.push(aql`(FOR i IN 1..1 INBOUND ${parent._id} ${collection} RETURN i)`);
-            }
-            if (possible_types.length > 1) query.push(aql`)`);
-
-        } else {
-            let collection = db.collection(getEdgeCollectionName(return_type.name, field_name));
-            query.push(aql`1..1 INBOUND ${parent._id} ${collection}`);
-        }
-    } else {
-        let collection = db.edgeCollection(getEdgeCollectionName(parent_type.name, field_name));
-        query.push(aql`1..1 OUTBOUND ${parent._id} ${collection}`);
-    }
-
-    // add filters
-    let query_filters = [];
-    if (args.filter && !isEmptyObject(args.filter)) {
-        let filters = getFilters(args.filter, return_type);
-        for (let i in filters) {
-            i == 0 ? query_filters.push(aql`FILTER`) : query_filters.push(aql`AND`);
-            query_filters = query_filters.concat(filters[i]);
-        }
-    }
-    query = query.concat(query_filters);
-    query.push(aql`RETURN x`);
+    let traversal = getEndpointTraversal(graphql.getNamedType(info.parentType), info.fieldName, return_type, info.schema);
+    let query = getTraversalQuery(traversal, parent._id, getQueryFilters(args.filter, return_type, 'x'));
 
     const cursor = await db.query(aql.join(query));
     if (graphql.isListType(graphql.getNullableType(info.returnType))) {
@@ -948,52 +950,280 @@ async function getEdgeEndpoint(parent, args, info) {
  */
 async function getEdge(parent, args, info) {
     let return_type = graphql.getNamedType(info.returnType);
+    let traversal = getEdgeTraversal(info.fieldName, return_type, info.schema);
+    let query = getTraversalQuery(traversal, parent._id, getQueryFilters(args.filter, return_type, 'e'), true);
 
-    // Create query
-    let query = [];
+    const cursor = await db.query(aql.join(query));
+    if (graphql.isListType(graphql.getNullableType(info.returnType))) {
+        return await cursor.all();
+    } else {
+        return await cursor.next();
+    }
+}
 
-    // Saddly can't be lazy and just use 'ANY' for the directioning, as loops of length 1 would then give us duplicated resaults
-    let direction_string = aql`INBOUND`;
-    if (info.fieldName.startsWith("_outgoing"))
-        direction_string = aql`OUTBOUND`;
+/**
+ * Get the direction and the edge collections to traverse for an edge field (or a reverse edge) of a type.
+ *
+ * @param parentType
+ * @param fieldName
+ * @param returnType
+ * @param schema
+ * @returns {{direction: string, collections: string[]}}
+ */
+function getEndpointTraversal(parentType, fieldName, returnType, schema) {
+    if (!fieldName.startsWith('_')) {
+        return { direction: 'OUTBOUND', collections: [getEdgeCollectionName(parentType.name, fieldName)] };
+    }
 
+    // reverse edge, get the non-reversed edge name
+    let re = new RegExp(`^_(.+?)From${returnType.name}$`);
+    let field_name = re.exec(fieldName)[1];
     // If the type that is the origin of the edge is an interface, then we need to check all the edge collections
     // corresponding to its implementing types. Note: This is only necessary when traversing some edges that are
     // defined in in the API schema for interfaces. The parent type will never be an interface type at this stage.
-    if (graphql.isInterfaceType(return_type)) {
-        query.push(aql`FOR e IN`)
-        let possible_types = info.schema.getPossibleTypes(return_type);
-        if (possible_types.length > 1) query.push(aql`UNION(`);
-        for (let i in possible_types) {
-            if (i != 0) query.push(aql`,`);
-            let collection = db.collection(possible_types[i].name.substr(1));
-            query.push(aql`(FOR v, inner_e IN 1..1 ${direction_string} ${parent._id} ${collection} RETURN inner_e)`);
-        }
-        if (possible_types.length > 1) query.push(aql`)`);
+    let types = graphql.isInterfaceType(returnType) ? schema.getPossibleTypes(returnType) : [returnType];
+    return { direction: 'INBOUND', collections: types.map(t => getEdgeCollectionName(t.name, field_name)) };
+}
 
-    } else {
-        let collection = db.edgeCollection(return_type.name.substr(1));
-        query.push(aql`FOR v, e IN 1..1 ${direction_string} ${parent._id} ${collection}`);
-    }
+/**
+ * Get the direction and the edge collections to traverse for an _incoming or _outgoing field.
+ *
+ * @param fieldName
+ * @param returnType the edge type (or an interface implemented by edge types)
+ * @param schema
+ * @returns {{direction: string, collections: string[]}}
+ */
+function getEdgeTraversal(fieldName, returnType, schema) {
+    // Saddly can't be lazy and just use 'ANY' for the directioning, as loops of length 1 would then give us duplicated resaults
+    let direction = fieldName.startsWith('_outgoing') ? 'OUTBOUND' : 'INBOUND';
+    let types = graphql.isInterfaceType(returnType) ? schema.getPossibleTypes(returnType) : [returnType];
+    return { direction: direction, collections: types.map(t => t.name.substr(1)) };
+}
 
-    // add filters
+/**
+ * Get the filters of a query on an alias, as a list of AQL fragments.
+ *
+ * @param filterArg
+ * @param type_to_filter
+ * @param alias
+ * @returns {[]}
+ */
+function getQueryFilters(filterArg, type_to_filter, alias) {
     let query_filters = [];
-    if (args.filter != undefined && !isEmptyObject(args.filter)) {
-        let filters = getFilters(args.filter, return_type, 'e');
+    if (filterArg != undefined && !isEmptyObject(filterArg)) {
+        let filters = getFilters(filterArg, type_to_filter, alias);
         for (let i in filters) {
             i == 0 ? query_filters.push(aql`FILTER`) : query_filters.push(aql`AND`);
             query_filters = query_filters.concat(filters[i]);
         }
     }
+    return query_filters;
+}
 
+/**
+ * Get a query for the vertices (as x), or the edges (as e), one step away from a start vertex.
+ *
+ * @param traversal the direction and the edge collections
+ * @param start the ID of the start vertex, or an AQL literal naming a variable holding it
+ * @param query_filters
+ * @param edges return the edges rather than the vertices
+ * @returns {[]}
+ */
+function getTraversalQuery(traversal, start, query_filters, edges = false) {
+    let direction = traversal.direction === 'OUTBOUND' ? aql`OUTBOUND` : aql`INBOUND`;
+    let query = [];
+    if (traversal.collections.length == 1) {
+        let collection = db.collection(traversal.collections[0]);
+        query.push(edges
+            ? aql`FOR v, e IN 1..1 ${direction} ${start} ${collection}`
+            : aql`FOR x IN 1..1 ${direction} ${start} ${collection}`);
+    } else {
+        query.push(edges ? aql`FOR e IN UNION(` : aql`FOR x IN UNION(`);
+        for (let i in traversal.collections) {
+            if (i != 0) query.push(aql`,`);
+            let collection = db.collection(traversal.collections[i]);
+            query.push(edges
+                ? aql`(FOR v, inner_e IN 1..1 ${direction} ${start} ${collection} RETURN inner_e)`
+                : aql`(FOR i IN 1..1 ${direction} ${start} ${collection} RETURN i)`);
+        }
+        query.push(aql`)`);
+    }
     query = query.concat(query_filters);
-    query.push(aql`RETURN e`);
+    query.push(edges ? aql`RETURN e` : aql`RETURN x`);
+    return query;
+}
+
+/* Batched queries */
+
+/**
+ * Get the source/target of a given edge field connected to parent, like getEdgeEndpoint, but batched with the same
+ * field of the sibling objects resolved in the same request: all of them are traversed by a single query.
+ *
+ * @param parent
+ * @param args
+ * @param context
+ * @param info
+ * @returns {Promise<*>}
+ */
+async function loadEdgeEndpoint(parent, args, context, info) {
+    if (!context) {
+        return await getEdgeEndpoint(parent, args, info);
+    }
+    let return_type = graphql.getNamedType(info.returnType);
+    let traversal = getEndpointTraversal(graphql.getNamedType(info.parentType), info.fieldName, return_type, info.schema);
+    let key = `x ${traversal.direction} ${traversal.collections.join(',')} ${JSON.stringify(args.filter || {})}`;
+    let loader = getLoader(context, key, ids =>
+        getTraversalBatch(ids, traversal, getQueryFilters(args.filter, return_type, 'x')));
+
+    let result = await loader.load(parent._id);
+    return graphql.isListType(graphql.getNullableType(info.returnType)) ? result : result[0];
+}
+
+/**
+ * Get edges between a parent and target for a given field, like getEdge, but batched with the same field of the
+ * sibling objects resolved in the same request.
+ *
+ * @param parent
+ * @param args
+ * @param context
+ * @param info
+ * @returns {Promise<*>}
+ */
+async function loadEdge(parent, args, context, info) {
+    if (!context) {
+        return await getEdge(parent, args, info);
+    }
+    let return_type = graphql.getNamedType(info.returnType);
+    let traversal = getEdgeTraversal(info.fieldName, return_type, info.schema);
+    let key = `e ${traversal.direction} ${traversal.collections.join(',')} ${JSON.stringify(args.filter || {})}`;
+    let loader = getLoader(context, key, ids =>
+        getTraversalBatch(ids, traversal, getQueryFilters(args.filter, return_type, 'e'), true));
+
+    let result = await loader.load(parent._id);
+    return graphql.isListType(graphql.getNullableType(info.returnType)) ? result : result[0];
+}
+
+/**
+ * Get type or interface by ID, like get, but batched with the other objects of the type fetched in the same request
+ * (e.g. the sources of a list of edges).
+ *
+ * @param id
+ * @param returnType
+ * @param context
+ * @param schema
+ * @returns {Promise<*>}
+ */
+async function load(id, returnType, context, schema) {
+    if (!context) {
+        return await get(id, returnType, schema);
+    }
+    let loader = getLoader(context, `get ${returnType.name}`, ids => getBatch(ids, returnType, schema));
+    return await loader.load(id);
+}
+
+/**
+ * Traverse one step from each of a list of start vertices in a single query.
+ *
+ * @param ids the IDs of the start vertices
+ * @param traversal
+ * @param query_filters
+ * @param edges return the edges rather than the vertices
+ * @returns {Promise<[]>} the list of vertices (or edges) for each start vertex
+ */
+async function getTraversalBatch(ids, traversal, query_filters, edges = false) {
+    let start = aql.literal('start');
+    let query = [aql`FOR start IN ${ids} RETURN (`];
+    query = query.concat(getTraversalQuery(traversal, start, query_filters, edges));
+    query.push(aql`)`);
 
     const cursor = await db.query(aql.join(query));
-    if (graphql.isListType(graphql.getNullableType(info.returnType))) {
-        return await cursor.all();
-    } else {
-        return await cursor.next();
+    return await cursor.all();
+}
+
+/**
+ * Get a list of objects of a type or interface by ID in a single query, looked up by primary key like in get.
+ *
+ * @param ids
+ * @param returnType
+ * @param schema
+ * @returns {Promise<[]>} the object (or null) for each ID
+ */
+async function getBatch(ids, returnType, schema) {
+    let collections = getCollectionNames(returnType, schema);
+    let valid = ids.filter(id => isIdOfType(id, collections));
+    let documents = new Map();
+    if (valid.length > 0) {
+        try {
+            const cursor = await db.query(aql`FOR id IN ${valid} RETURN DOCUMENT(id)`);
+            (await cursor.all()).forEach((document, i) => documents.set(valid[i], document));
+        } catch (err) {
+            console.error(err);
+            throw new ApolloError(err);
+        }
+    }
+    return ids.map(id => documents.get(id) || null);
+}
+
+/**
+ * The batch loaders of each request, by the context of the request.
+ */
+const requestLoaders = new WeakMap();
+
+/**
+ * Get the batch loader of a request for a key, which identifies the query (e.g. the direction, edge collections and
+ * filter of a traversal).
+ *
+ * @param context the context of the request
+ * @param key
+ * @param batchFunction function from a list of IDs to the list of results for each of them
+ * @returns {BatchLoader}
+ */
+function getLoader(context, key, batchFunction) {
+    let loaders = requestLoaders.get(context);
+    if (!loaders) {
+        loaders = new Map();
+        requestLoaders.set(context, loaders);
+    }
+    let loader = loaders.get(key);
+    if (!loader) {
+        loader = new BatchLoader(batchFunction);
+        loaders.set(key, loader);
+    }
+    return loader;
+}
+
+/**
+ * Collects the IDs loaded in the same tick of the event loop, i.e. by the resolvers of a field of all the objects of a
+ * list, and fetches them with a single call to the batch function. Results are not cached between batches, so
+ * resolvers that run after a mutation see its changes.
+ */
+class BatchLoader {
+    constructor(batchFunction) {
+        this.batchFunction = batchFunction;
+        this.queue = [];
+    }
+
+    load(id) {
+        return new Promise((resolve, reject) => {
+            this.queue.push({ id, resolve, reject });
+            if (this.queue.length == 1) {
+                // dispatch after the promise jobs of the sibling resolvers have run
+                Promise.resolve().then(() => process.nextTick(() => this.dispatch()));
+            }
+        });
+    }
+
+    async dispatch() {
+        let queue = this.queue;
+        this.queue = [];
+        let ids = [...new Set(queue.map(item => item.id))];
+        try {
+            let results = await this.batchFunction(ids);
+            let byId = new Map(ids.map((id, i) => [id, results[i]]));
+            queue.forEach(item => item.resolve(byId.get(item.id)));
+        } catch (err) {
+            queue.forEach(item => item.reject(err));
+        }
     }
 }
 
@@ -1038,17 +1268,7 @@ async function getList(args, info) {
     let first = args.first;
     let after = args.after;
 
-    let query = [aql`FOR x IN FLATTEN( FOR i IN [`];
-    if (graphql.isInterfaceType(typeOrInterface)) {
-        for (let i in info.schema.getPossibleTypes(typeOrInterface)) {
-            let possibleType = info.schema.getPossibleTypes(typeOrInterface)[i];
-            i == 0 ? null : query.push(aql`,`);
-            query.push(aql`${db.collection(possibleType.name)}`);
-        }
-    } else {
-        query.push(aql`${db.collection(typeOrInterface.name)}`);
-    }
-    query.push(aql`] RETURN i )`);
+    let query = getListQuery(typeOrInterface, info.schema);
 
     // add filters
     let queryFilters = [];
@@ -1078,6 +1298,22 @@ async function getList(args, info) {
 }
 
 
+/**
+ * Get the start of a query iterating (as x) over the objects of a type or interface. The collection of an object type
+ * is iterated directly, so that the filters that follow can use its indexes.
+ *
+ * @param type
+ * @param schema
+ * @returns {GeneratedAqlQuery[]}
+ */
+function getListQuery(type, schema) {
+    if (graphql.isInterfaceType(type) || graphql.isUnionType(type)) {
+        return [aql`FOR x IN FLATTEN(FOR i IN [`, getPossibleTypes(type, schema), aql`] RETURN i)`];
+    }
+    return [aql`FOR x IN ${db.collection(type.name)}`];
+}
+
+
 /**
  * Create a new info object based on a field name. Does not modify fragments, rootValue, operation, or variableValues
  * in the original info object.
@@ -1186,24 +1422,18 @@ function getResult(ctxt, info, resVar) {
 }
 
 /**
- * Return a result promise that waits for the ongoing transaction to complete.
+ * Return a result promise that resolves as soon as the ongoing transaction completes (or rejects if it fails).
  *
  * @param ctxt
  * @param key
  * @returns {Promise<any>}
  */
 function getResultPromise(ctxt, key) {
-    return new Promise(function (resolve, reject) {
-        (function waitForResult() {
-            if (ctxt.trans.error !== undefined) {
-                reject(ctxt.trans.error);
-                return null;
-            }
-            if (ctxt.trans.results !== undefined) {
-                return resolve(ctxt.trans.results[key]);
-            }
-            setTimeout(waitForResult, 10);
-        })();
+    return ctxt.trans.done.then(() => {
+        if (ctxt.trans.error !== undefined) {
+            throw ctxt.trans.error;
+        }
+        return ctxt.trans.results[key];
     });
 }
 
@@ -1315,6 +1545,8 @@ function initTransaction(ctxt) {
             finalConstraintChecks: [],
             exportedVariables: {}
         };
+        // settled by executeTransaction, after the results (or the error) are stored
+        ctxt.trans.done = new Promise(resolve => ctxt.trans.finish = resolve);
     }
 }
 
@@ -1348,6 +1580,8 @@ async function executeTransaction(ctxt) {
             ctxt.trans.params);
     } catch (e) {
         ctxt.trans.error = new ApolloError(e.message);
+    } finally {
+        ctxt.trans.finish();
     }
 }
 
@@ -1557,9 +1791,7 @@ function getFilters(filterArg, type_to_filter, alias = 'x') {
  */
 async function isEndOfList(parent, args, info) {
     let type = graphql.getNamedType(info.parentType.getFields()['content'].type);
-    let query = [aql`FOR x IN FLATTEN(FOR i IN [`];
-    query.push(getPossibleTypes(type, info.schema));;
-    query.push(aql`] RETURN i)`);
+    let query = getListQuery(type, info.schema);
 
     // add filters
     query.push(...parent._filter);
@@ -1593,9 +1825,7 @@ async function isEndOfList(parent, args, info) {
  */
 async function getTotalCount(parent, args, info) {
     let type = graphql.getNamedType(info.parentType.getFields()['content'].type);
-    let query = [aql`FOR x IN FLATTEN(FOR i IN [`];
-    query.push(getPossibleTypes(type, info.schema));
-    query.push(aql`] RETURN i)`);
+    let query = getListQuery(type, info.schema);
 
     // add filters
     query.push(...parent._filter);
@@ -1,4 +1,5 @@
-const { ApolloServer, gql } = require('apollo-server');
+const { ApolloServer, ApolloError, gql } = require('apollo-server');
+const { getOperationCost } = require('./cost');
 
 async function makeServer(options){
     // Activate/deactivate debug mode
@@ -12,14 +13,42 @@ async function makeServer(options){
     let resolvers = options.resolvers.get({driver});
     let customResolvers = options.customResolvers ? options.customResolvers.get({driver}) : '';
 
+    // Score operations against the cost manifest, if any
+    let plugins = options.costManifest ? [ costLimitPlugin(options.costManifest, options.maxQueryCost) ] : [];
+
     // Create instance of server
     const server = new ApolloServer({
         'typeDefs': gql`${options.baseSchema} ${options.customSchema || ''}`,
-        'resolvers': [ resolvers, customResolvers ]
+        'resolvers': [ resolvers, customResolvers ],
+        plugins
     });
 
     // Return server
     return server;
 }
 
+/**
+ * Plugin rejecting operations whose cost (see cost.js) exceeds the budget, before any resolver runs.
+ *
+ * @param manifest
+ * @param maxCost the budget, or undefined to only report the cost (in debug mode)
+ * @returns plugin
+ */
+function costLimitPlugin(manifest, maxCost) {
+    return {
+        requestDidStart() {
+            return {
+                didResolveOperation({ request, document, operation }) {
+                    let cost = getOperationCost(manifest, document, operation, request.variables || {});
+                    console.debug(`Operation cost: ${cost}`);
+                    if (maxCost && cost > maxCost) {
+                        throw new ApolloError(`Operation cost ${cost} exceeds the maximum cost of ${maxCost}`,
+                            'OPERATION_COST_EXCEEDED', { cost, maxCost });
+                    }
+                }
+            };
+        }
+    };
+}
+
 module.exports = { makeServer };
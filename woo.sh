@@ -487,6 +487,8 @@ cd ${__dir}/graphql-api-generator
 python3 generator.py \
     --input ${input} \
     --output ${output_dir}/resources/api-schema.graphql \
+    --index-manifest ${output_dir}/resources/index-manifest.json \
+    --cost-manifest ${output_dir}/resources/cost-manifest.json \
     --config ${config_file}
 cd ..
 